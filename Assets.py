@@ -0,0 +1,145 @@
+import os
+import struct
+import pygame
+
+# The front end's images and sounds, loaded the first time something asks for them instead of when the game module is
+# imported. Sprites are kept in an on-disk cache already scaled to the size they are drawn at and with their pixels in
+# the game window's byte order, so a warm start reads each one straight back into a surface - no PNG decoding, no
+# scaling and no pixel format conversion. A cached sprite is used only while its source file's modification time and
+# the size asked for match the ones it was cached with, anything else is loaded from the source and the cache updated.
+#
+# Cache layout (all numbers little-endian):
+#   header  magic, entry count
+#   entry   path length, pixel format ("RGBA", "BGRA", ... as in 'pygame.image.tobytes'), source modification time in
+#           nanoseconds, width, height, then the path (relative to the assets folder) and width * height * 4 bytes of
+#           pixels
+
+MAGIC = b"PACSPRT1"
+HEADER = struct.Struct("<8sI")
+ENTRY = struct.Struct("<H4sqHH")
+
+# The game's assets folder, and where the sprite cache is kept in it
+ASSETS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+DEFAULT_CACHE_PATH = os.path.join(ASSETS_PATH, "sprites.cache")
+
+
+class AssetManager:
+    """Loads images and sounds out of the assets folder 'root' on first use and keeps them for later calls. 'image'
+    returns a sprite scaled to a size, through the sprite cache at 'cache_path' (read on the first 'image' call,
+    written back by 'save' if anything was added), and 'sound' a decoded sound by its file name without the extension
+    ('sound_names' lists them). Sprites come back in the game window's pixel format if the window is open when they
+    are first asked for"""
+
+    def __init__(self, root=ASSETS_PATH, cache_path=DEFAULT_CACHE_PATH):
+        self.root = root
+        self.cache_path = cache_path
+        self.images = dict()
+        self.sounds = dict()
+        # sound name -> file in 'root/Sounds', listed the first time a sound is asked for
+        self.sound_files = None
+        # (path, width, height, pixel format) -> (source modification time, pixels), None until the cache is read
+        self.cache = None
+        self.changed = False
+
+    # Returns the image at 'path' (relative to the assets folder) scaled to 'size'
+    def image(self, path, size):
+        size = tuple(size)
+        if (path, size) in self.images:
+            return self.images[path, size]
+        if self.cache is None:
+            self.cache = read_cache(self.cache_path)
+
+        source = os.path.join(self.root, path)
+        modified = os.stat(source).st_mtime_ns
+        pixel_order = pixel_format()
+        key = (path, size[0], size[1], pixel_order)
+        cached = self.cache.get(key)
+        if cached is not None and cached[0] == modified:
+            image = pygame.image.frombytes(cached[1], size, pixel_order)
+        else:
+            image = pygame.transform.scale(pygame.image.load(source), size)
+            if pygame.display.get_surface() is not None:
+                image = image.convert_alpha()
+            self.cache[key] = (modified, pygame.image.tobytes(image, pixel_order))
+            self.changed = True
+        self.images[path, size] = image
+        return image
+
+    # Names of the sounds in the assets' 'Sounds' folder - their file names without the extension
+    def sound_names(self):
+        if self.sound_files is None:
+            folder = os.path.join(self.root, "Sounds")
+            self.sound_files = {os.path.splitext(file_name)[0]: os.path.join(folder, file_name)
+                                for file_name in sorted(os.listdir(folder))}
+        return list(self.sound_files)
+
+    # Returns the sound 'name' (one of 'sound_names'), decoded the first time it is asked for
+    def sound(self, name):
+        if name not in self.sounds:
+            self.sound_names()
+            self.sounds[name] = pygame.mixer.Sound(self.sound_files[name])
+        return self.sounds[name]
+
+    # Writes the sprite cache back if sprites were added to it. A cache that can't be written (a read-only install)
+    # only costs the next start its speed
+    def save(self):
+        if not self.changed:
+            return
+        try:
+            write_cache(self.cache_path, self.cache)
+            self.changed = False
+        except OSError:
+            pass
+
+
+# Byte order of the pixels of a surface converted for the game window (with per-pixel alpha), "RGBA" while no window
+# is open. Sprites cached in this order read back as surfaces that are already in the window's pixel format
+def pixel_format():
+    window = pygame.display.get_surface()
+    if window is None:
+        return "RGBA"
+    masks = pygame.Surface((1, 1), pygame.SRCALPHA).convert_alpha(window).get_masks()
+    for name in ("BGRA", "RGBA", "ARGB"):
+        if pygame.image.frombytes(bytes(4), (1, 1), name).get_masks() == masks:
+            return name
+    return "RGBA"
+
+
+# Reads the sprite cache at 'path' into {(path, width, height, pixel format): (modification time, pixels)}, empty if
+# the file is missing or not a sprite cache
+def read_cache(path):
+    entries = dict()
+    try:
+        with open(path, "rb") as file:
+            data = file.read()
+        magic, count = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            return entries
+        position = HEADER.size
+        for _ in range(count):
+            path_length, pixel_order, modified, width, height = ENTRY.unpack_from(data, position)
+            position += ENTRY.size
+            name = data[position:position + path_length].decode("utf-8")
+            position += path_length
+            pixels = data[position:position + width * height * 4]
+            position += width * height * 4
+            if len(pixels) != width * height * 4:
+                return dict()
+            entries[name, width, height, pixel_order.decode("ascii")] = (modified, pixels)
+    except (OSError, ValueError, struct.error):
+        return dict()
+    return entries
+
+
+# Writes 'entries' (as returned by 'read_cache') to the sprite cache at 'path'
+def write_cache(path, entries):
+    # write to a temporary file first, so a game starting at the same time never reads a half written cache
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, len(entries)))
+        for (name, width, height, pixel_order), (modified, pixels) in entries.items():
+            encoded = name.encode("utf-8")
+            file.write(ENTRY.pack(len(encoded), pixel_order.encode("ascii"), modified, width, height))
+            file.write(encoded)
+            file.write(pixels)
+    os.replace(temporary_path, path)
@@ -0,0 +1,264 @@
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import time
+import GameLogic
+import LevelPack
+
+# Batch self-play - plays large numbers of headless games across a pool of worker processes, with pacman driven by a
+# simple policy instead of the keyboard, and aggregates how the ghosts did: how often each one caught pacman and how
+# long it took. Every game gets its own seed (and level), so any single game can be played again on its own with
+# 'play_game'. Run from the command line, e.g.
+#   python BatchRunner.py --games 2000 --policy dots --workers 8 --output results.jsonl
+
+# The ghosts in the order they are checked for collisions, and the pathfinding each one uses
+GHOSTS = ("blinky", "inky", "pinky", "clyde")
+GHOST_STRATEGIES = {"blinky": "A* heuristic one", "inky": "A* heuristic two", "pinky": "A* heuristic two",
+                    "clyde": "greedy"}
+
+# Chance per frame that the random policy picks a new direction, and per tile that the dots policy takes a random turn
+TURN_CHANCE = 1 / 30
+WANDER_CHANCE = 0.1
+
+# Level pack and pathfinding mode of the games played by this process, set up once per worker by 'init_worker'
+worker_pack = None
+worker_pathfinding = None
+
+
+class RandomPolicy:
+    """Holds a random direction, picking a new one now and then or whenever pacman runs into a wall"""
+
+    def __init__(self, rng):
+        self.rng = rng
+
+    # Returns the direction command for the next frame
+    def __call__(self, game):
+        player = game.player
+        if self.rng.random() < TURN_CHANCE or not player.valid_directions[player.direction]:
+            return random_valid_direction(player, self.rng)
+        return None
+
+
+class DotPolicy:
+    """Heads for the nearest remaining dot along the level's routing table, taking a random turn at some tiles so
+    games on the same level don't all play out the same"""
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.tile = None
+        self.command = None
+
+    # Returns the direction command for the next frame - a new one is only picked when pacman reaches a new tile
+    def __call__(self, game):
+        player, settings = game.player, game.settings
+        tile = (player.center_x // 25, player.center_y // 25)
+        if tile == self.tile:
+            return self.command
+        self.tile = tile
+        self.command = None
+
+        nav = settings.nav
+        start = nav.index(tile)
+        target = settings.level.dots.nearest(tile[1], tile[0])
+        if self.rng.random() < WANDER_CHANCE:
+            self.command = random_valid_direction(player, self.rng)
+        elif start is not None and target is not None:
+            next_tile = settings.routing_table().get_next_tile(start, nav.index((target[1], target[0])))
+            if next_tile is not None:
+                self.command = nav.offsets.index(next_tile - start)
+        return self.command
+
+
+# Policies by the name they are picked with on the command line
+policies = {"random": RandomPolicy, "dots": DotPolicy}
+
+
+# One of the directions pacman can currently move in, picked at random (his current direction if he is boxed in)
+def random_valid_direction(player, rng):
+    directions = [direction for direction in range(4) if player.valid_directions[direction]]
+    if not directions:
+        return player.direction
+    return rng.choice(directions)
+
+
+# Plays one game to the end (or until 'max_frames' frames have passed) and returns its statistics. 'skip_intro' cuts
+# the start-up pause before each life short, since nothing moves during it
+def play_game(seed, level_id=0, policy="random", max_frames=36000, level_pack=None, pathfinding=None,
+              skip_intro=True):
+    settings = GameLogic.GameSettings(level_pack)
+    if pathfinding is not None:
+        settings.ghost_pathfinding = pathfinding
+    if level_id:
+        settings.level_id = level_id
+        GameLogic.load_level(settings)
+    game = GameLogic.Game(settings)
+    rng = random.Random(seed)
+    pacman_policy = policies[policy](rng)
+
+    catches = dict.fromkeys(GHOSTS, 0)
+    catch_frames = {ghost: [] for ghost in GHOSTS}
+    dots_eaten = 0
+    levels_cleared = 0
+    life_frames = 0
+    frame = 0
+    while frame < max_frames and not settings.game_lost:
+        if skip_intro and settings.state == GameLogic.STARTING:
+            settings.startup_counter = settings.fps * 5
+        # a cleared level goes straight on to the next one, as if enter was pressed
+        game.step(pacman_policy(game), enter=settings.game_won)
+        frame += 1
+
+        if settings.state == GameLogic.PLAYING:
+            life_frames += 1
+        dots_eaten += len(settings.cleared_cells)
+        # game_won only lasts until the next frame presses enter
+        levels_cleared += settings.game_won
+        if settings.caught_by is not None:
+            catches[settings.caught_by] += 1
+            catch_frames[settings.caught_by].append(life_frames)
+            life_frames = 0
+
+    return {"seed": seed, "level": level_id, "policy": policy, "frames": frame, "score": settings.score,
+            "dots_eaten": dots_eaten, "levels_cleared": levels_cleared, "game_over": settings.game_lost,
+            "catches": catches, "catch_frames": catch_frames}
+
+
+# Sets up a worker process - opens the level pack (once per process, every game the worker plays shares it)
+def init_worker(pack_path, pathfinding):
+    global worker_pack, worker_pathfinding
+    worker_pack = LevelPack.LevelPack(pack_path) if pack_path is not None else None
+    worker_pathfinding = pathfinding
+
+
+# Plays the game described by a (seed, level_id, policy, max_frames) job in a worker process
+def play_job(job):
+    seed, level_id, policy, max_frames = job
+    return play_game(seed, level_id, policy, max_frames, worker_pack, worker_pathfinding)
+
+
+class BatchStats:
+    """Running totals over the results of a batch, added one game at a time as the results come in"""
+
+    def __init__(self):
+        self.games = 0
+        self.frames = 0
+        self.scores = []
+        self.dots_eaten = 0
+        self.levels_cleared = 0
+        self.games_over = 0
+        self.catches = dict.fromkeys(GHOSTS, 0)
+        self.catch_frames = {ghost: [] for ghost in GHOSTS}
+
+    # Adds the result of one game
+    def add(self, result):
+        self.games += 1
+        self.frames += result["frames"]
+        self.scores.append(result["score"])
+        self.dots_eaten += result["dots_eaten"]
+        self.levels_cleared += result["levels_cleared"]
+        self.games_over += result["game_over"]
+        for ghost in GHOSTS:
+            self.catches[ghost] += result["catches"][ghost]
+            self.catch_frames[ghost].extend(result["catch_frames"][ghost])
+
+    # Returns the aggregated statistics as a dict (what --report-json writes)
+    def summary(self):
+        total_catches = sum(self.catches.values())
+        ghosts = dict()
+        for ghost in GHOSTS:
+            frames = self.catch_frames[ghost]
+            ghosts[ghost] = {"strategy": GHOST_STRATEGIES[ghost], "catches": self.catches[ghost],
+                             "share": self.catches[ghost] / total_catches if total_catches else 0.0,
+                             "mean_frames_to_catch": statistics.fmean(frames) if frames else None,
+                             "median_frames_to_catch": statistics.median(frames) if frames else None}
+        return {"games": self.games, "frames": self.frames,
+                "mean_score": statistics.fmean(self.scores) if self.scores else 0.0,
+                "median_score": statistics.median(self.scores) if self.scores else 0,
+                "mean_dots_eaten": self.dots_eaten / self.games if self.games else 0.0,
+                "levels_cleared": self.levels_cleared, "games_over": self.games_over, "ghosts": ghosts}
+
+    # Returns the aggregated statistics as a printable table
+    def report(self, elapsed=None):
+        summary = self.summary()
+        lines = [f"games {summary['games']}  frames {summary['frames']}  games over {summary['games_over']}  "
+                 f"levels cleared {summary['levels_cleared']}",
+                 f"score mean {summary['mean_score']:.1f} median {summary['median_score']}  "
+                 f"dots eaten per game {summary['mean_dots_eaten']:.1f}"]
+        if elapsed:
+            lines.append(f"{elapsed:.2f} s  {summary['games'] / elapsed:.1f} games/s  "
+                         f"{summary['frames'] / elapsed:.0f} frames/s")
+        lines.append(f"{'ghost':8}{'strategy':20}{'catches':>9}{'share':>8}{'mean ttc':>10}{'median ttc':>12}")
+        for ghost, stats in summary["ghosts"].items():
+            mean = f"{stats['mean_frames_to_catch']:.1f}" if stats["catches"] else "-"
+            median = f"{stats['median_frames_to_catch']:.1f}" if stats["catches"] else "-"
+            lines.append(f"{ghost:8}{stats['strategy']:20}{stats['catches']:>9}{stats['share']:>8.1%}{mean:>10}"
+                         f"{median:>12}")
+        lines.append("(ttc - frames of play from the start of a life until the ghost caught pacman)")
+        return "\n".join(lines)
+
+
+# Plays 'games' games across 'workers' processes (one per core by default) and returns their BatchStats. Game n is
+# played with seed 'seed + n' on one of 'levels' (all the levels by default, picked with the game's seed), from the
+# level pack at 'pack_path' or the built-in levels. Results are written to 'output' (an open file, one JSON line per
+# game) as they come in, in whatever order games finish
+def run_batch(games, policy="random", seed=0, levels=None, max_frames=36000, workers=None, pack_path=None,
+              pathfinding=None, output=None):
+    # the built-in levels are played from their pack, so the workers don't build every level's routing table again
+    # for every game
+    pack = LevelPack.load_cached_pack() if pack_path is None else LevelPack.LevelPack(pack_path)
+    pack_path = pack.path
+    if levels is None:
+        levels = range(len(pack))
+    pack.close()
+    jobs = [(seed + game, random.Random(seed + game).choice(levels), policy, max_frames) for game in range(games)]
+    workers = workers or os.cpu_count() or 1
+
+    stats = BatchStats()
+    # a few chunks per worker - big enough that handing out jobs costs nothing, small enough to even out the load
+    chunk_size = max(1, games // (workers * 8))
+    with multiprocessing.Pool(workers, init_worker, (pack_path, pathfinding)) as pool:
+        for result in pool.imap_unordered(play_job, jobs, chunk_size):
+            stats.add(result)
+            if output is not None:
+                output.write(json.dumps(result) + "\n")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plays headless pacman games in parallel and reports how the "
+                                                 "ghosts did")
+    parser.add_argument("--games", type=int, default=100, help="number of games to play")
+    parser.add_argument("--policy", choices=sorted(policies), default="random", help="how pacman is controlled")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game, the rest count up from it")
+    parser.add_argument("--levels", type=lambda text: [int(level) for level in text.split(",")],
+                        help="comma separated level ids to pick from (all levels by default)")
+    parser.add_argument("--max-frames", type=int, default=36000, help="frames after which a game is stopped")
+    parser.add_argument("--workers", type=int, help="worker processes (one per core by default)")
+    parser.add_argument("--pack", help="level pack to play (the levels in Levels.py by default)")
+    parser.add_argument("--pathfinding", choices=("a_star", "routing_table", "flow_field", "incremental"),
+                        help="ghost pathfinding mode (see GameSettings)")
+    parser.add_argument("--output", help="file to stream the result of every game to, one JSON line each")
+    parser.add_argument("--report-json", help="file to write the aggregated report to")
+    args = parser.parse_args()
+
+    output = open(args.output, "w") if args.output else None
+    start = time.perf_counter()
+    try:
+        stats = run_batch(args.games, args.policy, args.seed, args.levels, args.max_frames, args.workers, args.pack,
+                          args.pathfinding, output)
+    finally:
+        if output is not None:
+            output.close()
+    print(stats.report(time.perf_counter() - start))
+    if args.report_json:
+        with open(args.report_json, "w") as file:
+            json.dump(stats.summary(), file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
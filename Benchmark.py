@@ -0,0 +1,324 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from time import perf_counter_ns
+import BatchRunner
+import GameLogic
+import LevelPack
+import Levels
+
+# Benchmarks of the game's hot paths - fixed, seeded scenarios on each of the built-in levels, timed headless (the
+# rendering benchmarks open the window on SDL's dummy video driver unless another one is set). Only the code being
+# measured is inside the timer, the set-up of every call (placing the ghosts, stepping the game to the next frame
+# to draw) is not. Each benchmark is run '--repeats' times and the best run is kept, which is the figure least
+# disturbed by whatever else the machine is doing. Run from the command line, e.g.
+#   python Benchmark.py --output baseline.json
+#   python Benchmark.py --compare baseline.json
+# '--compare' flags every benchmark that got slower than in the baseline by more than '--threshold' (and exits with
+# status 1 if any did). Only compare results from the same machine.
+
+# Levels the scenarios run on - the layouts in 'Levels.py'
+LEVELS = range(len(Levels.level_layouts))
+# The scripted game every scenario is taken from - pacman heads for the nearest dot (see 'BatchRunner.DotPolicy'),
+# turning at random with a fixed seed, for this many frames
+SCENARIO_SEED = 7
+SCENARIO_FRAMES = 1800
+# With '--quick', only every QUICK_STRIDE-th tile pair is searched by the A* benchmarks
+QUICK_STRIDE = 16
+# Fraction a benchmark can slow down by before '--compare' reports it as a regression
+DEFAULT_THRESHOLD = 0.10
+
+# Scenarios by level id, built on first use - see 'scenario'
+scenarios = dict()
+
+
+class Scenario:
+    """The scripted game on one level - the direction command given on each frame ('inputs'), and the positions and
+    state of pacman and the ghosts after each frame ('states', see 'save_positions')"""
+
+    def __init__(self, level_id):
+        game = new_game(level_id)
+        settings = game.settings
+        policy = BatchRunner.DotPolicy(random.Random(SCENARIO_SEED))
+        self.inputs = []
+        self.states = []
+        for _ in range(SCENARIO_FRAMES):
+            skip_intro(settings)
+            direction_command = policy(game)
+            self.inputs.append(direction_command)
+            game.step(direction_command, enter=settings.game_won or settings.game_lost)
+            self.states.append(save_positions(game))
+
+
+# The scenario of 'level_id'
+def scenario(level_id):
+    if level_id not in scenarios:
+        scenarios[level_id] = Scenario(level_id)
+    return scenarios[level_id]
+
+
+# A new headless game on 'level_id', played from the pack of the built-in levels
+def new_game(level_id, pathfinding="a_star", settings=None):
+    if settings is None:
+        settings = GameLogic.GameSettings(LevelPack.load_cached_pack())
+    settings.ghost_pathfinding = pathfinding
+    if settings.level_id != level_id:
+        settings.level_id = level_id
+        GameLogic.load_level(settings)
+    return GameLogic.Game(settings)
+
+
+# Cuts the start-up pause before each life short - nothing moves during it
+def skip_intro(settings):
+    if settings.state == GameLogic.STARTING:
+        settings.startup_counter = settings.fps * 5
+
+
+# What the collision checks and ghost targeting read - pacman's position and direction, the power-up, and each
+# ghost's position, state and path
+def save_positions(game):
+    player, blinky, inky, pinky, clyde, settings = game.entities()
+    return (player.center_x, player.center_y, player.direction, settings.power_up,
+            tuple((ghost.x_center, ghost.y_center, ghost.dead, ghost.been_eaten, list(ghost.path or ()))
+                  for ghost in (blinky, inky, pinky, clyde)))
+
+
+# Puts the positions saved by 'save_positions' back into 'game'
+def load_positions(game, state):
+    player, blinky, inky, pinky, clyde, settings = game.entities()
+    player.center_x, player.center_y, player.direction, settings.power_up, ghosts = state
+    for ghost, (x, y, dead, been_eaten, path) in zip((blinky, inky, pinky, clyde), ghosts):
+        ghost.x_center = x
+        ghost.y_center = y
+        ghost.dead = dead
+        ghost.been_eaten = been_eaten
+        ghost.path = path
+    settings.ghost_index.rebuild(game.ghosts, settings.swarm, settings.level)
+
+
+# Benchmarks - each one runs once and returns (nanoseconds spent in the measured code, number of operations)
+
+# Ghost.a_star_algorithm between every pair of tiles the ghosts can move between
+def bench_a_star(level_id, quick, use_heuristic_one):
+    game = new_game(level_id)
+    ghost = game.blinky
+    nav = game.settings.nav
+    tiles = [nav.tile(index) for index in nav.nodes if nav.neighbors[index]]
+    stride = QUICK_STRIDE if quick else 1
+    elapsed = 0
+    operations = 0
+    for offset, start in enumerate(tiles):
+        ghost.x_center = start[0] * 25 + 13
+        ghost.y_center = start[1] * 25 + 13
+        for goal in tiles[offset % stride::stride]:
+            ghost.target = (goal[0] * 25 + 13, goal[1] * 25 + 13)
+            begin = perf_counter_ns()
+            ghost.a_star_algorithm(use_heuristic_one)
+            elapsed += perf_counter_ns() - begin
+            operations += 1
+    return elapsed, operations
+
+
+# check_collisions with pacman and the ghosts where they were on each frame of the scenario
+def bench_check_collisions(level_id, quick):
+    game = new_game(level_id)
+    elapsed = 0
+    for state in scenario(level_id).states:
+        load_positions(game, state)
+        begin = perf_counter_ns()
+        GameLogic.check_collisions(*game.entities())
+        elapsed += perf_counter_ns() - begin
+    return elapsed, SCENARIO_FRAMES
+
+
+# update_ghost_targets with pacman and the ghosts where they were on each frame of the scenario
+def bench_update_ghost_targets(level_id, quick):
+    game = new_game(level_id)
+    elapsed = 0
+    for state in scenario(level_id).states:
+        load_positions(game, state)
+        begin = perf_counter_ns()
+        GameLogic.update_ghost_targets(*game.entities())
+        elapsed += perf_counter_ns() - begin
+    return elapsed, SCENARIO_FRAMES
+
+
+# Game.step through the scenario's input, with the ghosts on 'pathfinding'
+def bench_tick(level_id, quick, pathfinding):
+    game = new_game(level_id, pathfinding)
+    settings = game.settings
+    elapsed = 0
+    for direction_command in scenario(level_id).inputs:
+        skip_intro(settings)
+        enter = settings.game_won or settings.game_lost
+        begin = perf_counter_ns()
+        game.step(direction_command, enter)
+        elapsed += perf_counter_ns() - begin
+    return elapsed, SCENARIO_FRAMES
+
+
+# Imports the front end, on SDL's dummy video and audio drivers unless others are set
+def front_end():
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import PacmanGame
+    return PacmanGame
+
+
+# A game in the window on 'level_id' with new front end settings, and the ghosts' sprites set the way the front end
+# sets them
+def new_display_game(level_id):
+    settings = front_end().DisplaySettings()
+    game = new_game(level_id, settings=settings)
+    for ghost in (game.blinky, game.inky, game.pinky, game.clyde):
+        ghost.img = settings.sprites.ghosts[ghost.name]
+    settings.level_layers = None
+    return game
+
+
+# draw_level on each frame of the scenario - the level's layers are cached, as they are during play
+def bench_draw_level(level_id, quick):
+    PacmanGame = front_end()
+    game = new_display_game(level_id)
+    settings = game.settings
+    PacmanGame.draw_level(settings)
+    elapsed = 0
+    for direction_command in scenario(level_id).inputs:
+        skip_intro(settings)
+        game.step(direction_command, settings.game_won or settings.game_lost)
+        begin = perf_counter_ns()
+        PacmanGame.draw_level(settings)
+        elapsed += perf_counter_ns() - begin
+    return elapsed, SCENARIO_FRAMES
+
+
+# A whole frame drawn and displayed on each frame of the scenario, in full or with dirty rects
+def bench_frame(level_id, quick, dirty):
+    PacmanGame = front_end()
+    game = new_display_game(level_id)
+    settings = game.settings
+    draw = PacmanGame.draw_frame_dirty if dirty else PacmanGame.draw_frame
+    settings.dirty_rects = PacmanGame.DirtyRectTracker()
+    draw(game, settings)
+    elapsed = 0
+    for direction_command in scenario(level_id).inputs:
+        skip_intro(settings)
+        game.step(direction_command, settings.game_won or settings.game_lost)
+        begin = perf_counter_ns()
+        draw(game, settings)
+        elapsed += perf_counter_ns() - begin
+    return elapsed, SCENARIO_FRAMES
+
+
+# Every benchmark as (name, function, extra arguments) - each is run on every level in LEVELS
+benchmarks = [("a_star_h1", bench_a_star, (True,)),
+              ("a_star_h2", bench_a_star, (False,)),
+              ("check_collisions", bench_check_collisions, ()),
+              ("update_ghost_targets", bench_update_ghost_targets, ()),
+              ("tick_a_star", bench_tick, ("a_star",)),
+              ("tick_routing_table", bench_tick, ("routing_table",)),
+              ("tick_flow_field", bench_tick, ("flow_field",)),
+              ("tick_incremental", bench_tick, ("incremental",)),
+              ("draw_level", bench_draw_level, ()),
+              ("frame_render", bench_frame, (False,)),
+              ("frame_render_dirty", bench_frame, (True,))]
+
+
+# Runs every benchmark whose name contains one of 'names' (all of them if None) 'repeats' times on every level.
+# Returns {"<benchmark>/level<id>": result}, where each result holds the best and median nanoseconds per operation
+# over the repeats. 'log' (a function taking a line of text) is told about each result as it comes in
+def run_benchmarks(repeats=3, quick=False, names=None, log=None):
+    results = dict()
+    for name, function, arguments in benchmarks:
+        if names and not any(part in name for part in names):
+            continue
+        for level_id in LEVELS:
+            # the scenario is built outside the timed runs
+            scenario(level_id)
+            per_operation = []
+            operations = 0
+            for _ in range(repeats):
+                # no collections in the middle of a run, the same as timeit
+                gc.collect()
+                gc.disable()
+                try:
+                    elapsed, operations = function(level_id, quick, *arguments)
+                finally:
+                    gc.enable()
+                per_operation.append(elapsed / operations)
+            key = f"{name}/level{level_id}"
+            results[key] = {"ns_per_op": min(per_operation), "median_ns_per_op": statistics.median(per_operation),
+                            "operations": operations, "repeats": repeats}
+            if log is not None:
+                log(f"{key:32}{min(per_operation) / 1000:>12.2f} us/op  ({operations} ops)")
+    return results
+
+
+# What the results were measured on, written alongside them
+def environment(quick):
+    return {"python": platform.python_version(), "implementation": platform.python_implementation(),
+            "platform": platform.platform(), "machine": platform.machine(), "cpus": os.cpu_count(),
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"), "quick": quick}
+
+
+# Compares 'results' against the results in 'baseline' (as written by --output). Returns the printable comparison
+# and the names of the benchmarks that got slower by more than 'threshold'
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    lines = [f"{'benchmark':32}{'baseline us':>13}{'current us':>13}{'change':>9}"]
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline["results"]:
+            lines.append(f"{key:32}{'-':>13}{result['ns_per_op'] / 1000:>13.2f}{'new':>9}")
+            continue
+        before = baseline["results"][key]["ns_per_op"]
+        change = result["ns_per_op"] / before - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        elif change < -threshold:
+            flag = "  faster"
+        lines.append(f"{key:32}{before / 1000:>13.2f}{result['ns_per_op'] / 1000:>13.2f}{change:>+9.1%}{flag}")
+    lines.append(f"{len(regressions)} regression(s) over {threshold:.0%}")
+    return "\n".join(lines), regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the game's hot paths on each built-in level")
+    parser.add_argument("--output", help="file to write the results to as JSON")
+    parser.add_argument("--compare", help="results file to compare against, regressions exit with status 1")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="slow-down (as a fraction) reported as a regression by --compare")
+    parser.add_argument("--repeats", type=int, default=3, help="runs of each benchmark, the best one is kept")
+    parser.add_argument("--quick", action="store_true",
+                        help=f"search only every {QUICK_STRIDE}th tile pair in the A* benchmarks")
+    parser.add_argument("--filter", nargs="+", help="only run the benchmarks whose names contain one of these")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if baseline["environment"]["quick"] != args.quick:
+            print("warning: the baseline was run with" + ("" if baseline["environment"]["quick"] else "out") +
+                  " --quick, the A* benchmarks won't be comparable", file=sys.stderr)
+
+    results = run_benchmarks(args.repeats, args.quick, args.filter, print)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"environment": environment(args.quick), "results": results}, file, indent=2)
+    if baseline is not None:
+        comparison, regressions = compare(results, baseline, args.threshold)
+        print(comparison)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,945 @@
+from time import perf_counter_ns
+import GhostRules
+import Levels
+import Navigation
+import Swarm
+
+# Headless game logic for pacman. Nothing in this module touches pygame, so games can be simulated without a window,
+# audio, or frame cap. The pygame front end in 'PacmanGame.py' renders the state kept here and plays the sounds
+# named in 'settings.events'
+
+# Game states - what the main loop is doing on the current frame (settings.state)
+STARTING = "starting"  # paused while the intro/intermission plays at the start of a level or after a death
+PLAYING = "playing"
+DYING = "dying"  # pacman was caught - everything is frozen while the death sound plays
+GAME_OVER = "game_over"  # out of lives - waiting for enter to start a new game
+LEVEL_WON = "level_won"  # all dots eaten - waiting for enter to go to the next level
+
+# Tile flags (see 'Levels.tile_flags') of the tiles pacman can't move into - the ghosts only stop at walls
+PLAYER_BLOCKED = Levels.GHOST_GATE | Levels.WALL
+
+
+class Pacman:
+    """Template for a pacman object (the player). Contains member variables for tracking position and state, and
+    functions for determining valid paths and moving pacman around the grid"""
+
+    def __init__(self):
+        # 'actual' is the top-left corner of the cell pacman is considered to be (despite visual appearance)
+        self.actual_x = (750 // 30) * 15
+        self.actual_y = ((875 - 50) // 33) * 24
+        # pacman coordinate points (in pixels)
+        # Top left corner of where pacman is rendered (not necessarily the cell center of pacman is in)
+        self.visual_x = self.actual_x - 10
+        self.visual_y = self.actual_y - 10
+        # Center is the center-most point of pacman
+        self.center_x = self.actual_x + 13
+        self.center_y = self.actual_y + 13
+        # count of lives left
+        self.lives = 3
+        # direction variables, used to track which direction pacman is currently facing,
+        # valid directions that can be faced, and current direction being input by the user
+        # directions = [right, left, up, down]
+        #                0       1   2    3
+        self.direction = 0
+        self.valid_directions = [False, False, False, False]
+        self.direction_command = 0
+        # power up controls
+        self.eaten_ghosts = 0
+
+    # updates which adjacent cells are currently valid for pacman to move to based on his location on the grid
+    def update_valid_directions(self, settings):
+        # directions = [right, left, up, down]
+        valid_directions = [False, False, False, False]
+        i = self.actual_y // 25
+        j = self.actual_x // 25
+
+        # if out of bounds, player can only move right and left
+        # otherwise check surrounding tiles to determine valid paths
+        if j < 1 or j > 28:
+            valid_directions[0] = True
+            valid_directions[1] = True
+        else:
+            cells = settings.level.cells
+            cols = settings.level.cols
+            flags = Levels.tile_flags
+            cell = i * cols + j
+
+            # if grid square below current position isn't a wall and pacman is properly aligned - moving down is ok
+            if not flags[cells[cell + cols]] & PLAYER_BLOCKED and self.actual_x % 25 == 0:
+                valid_directions[3] = True
+
+            # if grid above current position isn't a wall and pacman is properly aligned - moving up is ok
+            # else handles case where above cell is a wall, but pacman still has space in his own square to move closer
+            # or rather, there is a wall in the next cell up but pacman isn't touching the top of his current cell
+            if not flags[cells[cell - cols]] & PLAYER_BLOCKED and self.actual_x % 25 == 0:
+                valid_directions[2] = True
+            else:
+                if self.direction == 2 and self.actual_y > (i * 25):
+                    valid_directions[2] = True
+
+            # if cell to the right of the current position isn't a wall and pacman is properly aligned,
+            # then moving right is ok
+            if not flags[cells[cell + 1]] & PLAYER_BLOCKED and self.actual_y % 25 == 0:
+                valid_directions[0] = True
+
+            # if cell to the left of the current position isn't a wall and pacman is properly aligned,
+            # then moving left is ok
+            # else handles case where left cell is a wall, but pacman still has space in his own square to move close
+            if not flags[cells[cell - 1]] & PLAYER_BLOCKED and self.actual_y % 25 == 0:
+                valid_directions[1] = True
+            else:
+                if self.direction == 1 and (self.actual_x > (j * 25)):
+                    valid_directions[1] = True
+
+        return valid_directions
+
+    # moves pacman 'pixels' pixels forward if moving in the direction pacman is facing is valid (not a wall)
+    def move_player(self, pixels=1):
+        # direction = [right, left, up, down]
+        if self.direction == 0 and self.valid_directions[0]:
+            self.visual_x += pixels
+            self.center_x += pixels
+            self.actual_x += pixels
+        elif self.direction == 1 and self.valid_directions[1]:
+            self.visual_x -= pixels
+            self.center_x -= pixels
+            self.actual_x -= pixels
+        elif self.direction == 2 and self.valid_directions[2]:
+            self.visual_y -= pixels
+            self.center_y -= pixels
+            self.actual_y -= pixels
+        elif self.direction == 3 and self.valid_directions[3]:
+            self.visual_y += pixels
+            self.center_y += pixels
+            self.actual_y += pixels
+
+    # Counts how many of the next (at most 'limit') one pixel moves would just carry pacman further in a straight line,
+    # given the valid directions at his current position. Over such a run his valid directions and direction can't
+    # change (they only do where he lines up with the grid) and his center stays on the same tile, in or out of
+    # bounds, so a collision check after each pixel would find nothing the last one didn't. If he is stuck against a
+    # wall none of the moves do anything and the whole 'limit' is returned
+    def straight_run(self, settings, limit):
+        if self.valid_directions[self.direction_command] and self.direction_command != self.direction:
+            return 0
+        if not self.valid_directions[self.direction]:
+            return limit
+
+        step = 1 if self.direction in (0, 3) else -1
+        if self.direction < 2:
+            actual, center = self.actual_x, self.center_x
+        else:
+            actual, center = self.actual_y, self.center_y
+
+        low = center // 25 * 25
+        high = low + 24
+        # collisions are only checked while 0 < center_x < width
+        if self.direction < 2:
+            if 0 < center < settings.width:
+                low, high = max(low, 1), min(high, settings.width - 1)
+            elif center <= 0:
+                high = min(high, 0)
+            else:
+                low = max(low, settings.width)
+        run = min(limit, GhostRules.pixels_within(center, step, low, high))
+
+        if actual % 25 == 0:
+            return min(run, 1)
+        return min(run, GhostRules.pixels_within(actual, step, actual // 25 * 25 + 1, actual // 25 * 25 + 24) + 1)
+
+
+class Ghost:
+    """Template for a ghost object (blinky, inky, pinky, and clyde). Contains member variables for tracking position
+    and state, and functions for determining valid paths / pathfinding. It is intended for blinky, inky, and pinky to
+    use the A* algorithm with different heuristic options, while clyde has his own (suboptimal) greedy pathfinding
+    algorithm - Intention is to demonstrate the effectiveness/differences in different pathfinding algorithms
+    behavior"""
+
+    def __init__(self, x_visual, y_visual, x_actual, y_actual, x_center, y_center,
+                 target, speed, img, dead, been_eaten, settings):
+        self.x_visual = x_visual
+        self.y_visual = y_visual
+        self.x_actual = x_actual
+        self.y_actual = y_actual
+        self.x_center = x_center
+        self.y_center = y_center
+        self.target = target
+        self.speed = speed
+        self.img = img
+        self.dead = dead
+        self.been_eaten = been_eaten
+        self.valid_directions = [False, False, False, False]
+        self.path = None
+        # search state kept between paths by the incremental pathfinding mode
+        self.planner = None
+        self.settings = settings
+        # blinky, inky, pinky or clyde and the strategy it chases pacman with - set by the Game
+        self.name = None
+        self.strategy = GhostRules.A_STAR_ONE
+
+    # Updates the ghosts path to its target with the pathfinding method chosen in the settings - measured by the
+    # pathfinding telemetry if the settings have one (see 'Telemetry.py')
+    def update_path(self, use_heuristic_one):
+        if self.settings.telemetry is not None:
+            self.settings.telemetry.measure_search(self, use_heuristic_one)
+        else:
+            self.find_path(use_heuristic_one)
+
+    # Updates the path with the pathfinding method chosen in the settings and returns the method that found it. A*
+    # searches fill 'stats' (if given) with the tiles they expanded and the largest their frontier got
+    def find_path(self, use_heuristic_one, stats=None):
+        if self.settings.ghost_pathfinding == "routing_table":
+            self.route_lookup()
+            return "routing_table"
+        elif self.settings.ghost_pathfinding == "flow_field" and self.flow_field_lookup():
+            return "flow_field"
+        elif self.settings.ghost_pathfinding == "incremental":
+            self.incremental_search(use_heuristic_one, stats)
+            return "incremental"
+        else:
+            self.a_star_algorithm(use_heuristic_one, stats)
+            return "a_star"
+
+    # Sets the path to the next tile of a shortest route to the target, looked up in the level's routing table
+    # instead of searched for. a_star_move only ever follows the first tile of the path, so one tile is enough
+    def route_lookup(self):
+        nav = self.settings.nav
+        start = nav.index((self.x_center // 25, self.y_center // 25))
+        goal = nav.index((self.target[0] // 25, self.target[1] // 25))
+        next_tile = None
+        if start is not None and goal is not None:
+            next_tile = self.settings.routing_table().get_next_tile(start, goal)
+
+        if next_tile is None:
+            self.path = []
+        else:
+            self.path = [nav.tile(next_tile)]
+
+    # Sets the path to the next tile downhill on the flow field leading to the target, if the target tile has one
+    # (pacman's tile, the ghost box, or one of the corners). Returns False if there is no field for the target,
+    # in which case the ghost needs to search for its own path
+    def flow_field_lookup(self):
+        nav = self.settings.nav
+        goal = nav.index((self.target[0] // 25, self.target[1] // 25))
+        field = GhostRules.flow_field(self.settings, goal)
+        if field is None:
+            return False
+
+        start = nav.index((self.x_center // 25, self.y_center // 25))
+        next_tile = None
+        if start is not None:
+            next_tile = field.get_next_tile(start)
+
+        if next_tile is None:
+            self.path = []
+        else:
+            self.path = [nav.tile(next_tile)]
+        return True
+
+    # Calculates a list of path (x,y) values using A* algorithm. There is an option between two heuristics that can be
+    # used. 'use_heuristic_one' is a boolean to choose which to use. The first heuristic is the distance formula from
+    # current position to target (diagonally), the second is Manhattan distance - (vertical distance difference +
+    # horizontal distance difference). The search itself runs on the level's NavGraph (see 'Navigation.py')
+    def a_star_algorithm(self, use_heuristic_one, stats=None):
+        nav = self.settings.nav
+        start = nav.index((self.x_center // 25, self.y_center // 25))
+        goal = nav.index((self.target[0] // 25, self.target[1] // 25))
+        path = None
+        if start is not None and goal is not None:
+            path = nav.a_star(start, goal, use_heuristic_one, stats)
+
+        # an unreachable target leaves the ghost waiting on its current tile
+        if path is None:
+            self.path = []
+        else:
+            self.path = [nav.tile(index) for index in path]
+
+    # A* search that repairs the ghost's previous search instead of starting over, see 'Navigation.IncrementalPlanner'.
+    # The planner is replaced when the level or the heuristic changes
+    def incremental_search(self, use_heuristic_one, stats=None):
+        nav = self.settings.nav
+        if self.planner is None or self.planner.nav is not nav or self.planner.use_heuristic_one != use_heuristic_one:
+            self.planner = Navigation.IncrementalPlanner(nav, use_heuristic_one)
+
+        start = nav.index((self.x_center // 25, self.y_center // 25))
+        goal = nav.index((self.target[0] // 25, self.target[1] // 25))
+        path = None
+        if start is not None and goal is not None:
+            path = self.planner.find_path(start, goal, stats)
+
+        if path is None:
+            self.path = []
+        else:
+            self.path = [nav.tile(index) for index in path]
+
+    # Moves the ghost 'pixels' pixels along its path, the same as updating the path whenever it lines up with the
+    # center of a tile (and pacman is in bounds) then calling a_star_move, one pixel at a time. The pixels between
+    # tile centers are moved in one go
+    def follow_path(self, pixels, use_heuristic_one, player_in_bounds):
+        while pixels > 0:
+            if player_in_bounds and self.y_center % 25 == 13 and self.x_center % 25 == 13:
+                self.update_path(use_heuristic_one)
+            run = self.path_run(pixels, player_in_bounds, False)
+            self.a_star_move(run)
+            pixels -= run
+
+    # Counts how many of the next (at most 'limit') one pixel moves a_star_move would make in the same direction
+    # without passing a point where the path gets updated (see 'GhostRules.path_run'). Returns the whole 'limit' if
+    # the ghost isn't going anywhere
+    def path_run(self, limit, at_centers, every_pixel):
+        if len(self.path) == 0:
+            return limit
+        return GhostRules.path_run(self.x_center, self.y_center, self.path[0][0] * 25 + 13, self.path[0][1] * 25 + 13,
+                                   limit, at_centers, every_pixel)
+
+    # Move ghosts position on board based on A* path - 'pixels' should not carry it past the first tile of the path
+    def a_star_move(self, pixels=1):
+        if len(self.path) == 0:
+            return
+        direction = GhostRules.path_direction(self.x_center, self.y_center, self.path[0][0] * 25 + 13,
+                                              self.path[0][1] * 25 + 13)
+        if direction is not None:
+            self.move(direction, pixels)
+
+    # Moves the ghost 'pixels' pixels in 'direction' (0-3, right/left/up/down)
+    def move(self, direction, pixels):
+        dx = GhostRules.STEP_X[direction] * pixels
+        dy = GhostRules.STEP_Y[direction] * pixels
+        self.x_visual += dx
+        self.x_center += dx
+        self.x_actual += dx
+        self.y_visual += dy
+        self.y_center += dy
+        self.y_actual += dy
+
+    # Moves clyde 'pixels' pixels closer to his target - 'pixels' should come from greedy_run
+    def move_clyde(self, pixels=1):
+        direction = GhostRules.greedy_direction(self.x_center, self.y_center, self.target, self.valid_directions)
+        if direction is not None:
+            self.move(direction, pixels)
+
+    # Counts how many of the next (at most 'limit') one pixel moves move_clyde would make in the same direction -
+    # until he lines up with his target on that axis, or with the grid (where his valid directions can change).
+    # Returns the whole 'limit' if he is stuck
+    def greedy_run(self, limit):
+        direction = GhostRules.greedy_direction(self.x_center, self.y_center, self.target, self.valid_directions)
+        if direction is None:
+            return limit
+        if direction < 2:
+            actual, distance = self.x_actual, abs(self.target[0] - self.x_center)
+        else:
+            actual, distance = self.y_actual, abs(self.target[1] - self.y_center)
+        return GhostRules.greedy_run(direction, actual, distance, limit)
+
+    # determines valid directions similar to the player, only used for clyde
+    def update_valid_clyde_directions(self):
+        self.valid_directions = GhostRules.greedy_directions(self.x_actual, self.y_actual, self.settings)
+
+
+class GameSettings:
+    """Wrapper class for misc config options and game settings. Levels are read from 'level_pack' (a
+    'LevelPack.LevelPack') if one is given, otherwise from the layouts in 'Levels.py'"""
+
+    def __init__(self, level_pack=None):
+        # Height and width of game window
+        self.width = 750
+        self.height = 875
+        # fps should be multiple of 20
+        self.fps = 60
+        # Level / Board settings
+        self.level_id = 0
+        self.level_pack = level_pack
+        self.line_width = 3
+        # Ghost pathfinding - 'a_star' searches the maze each time a ghost picks a new path, 'routing_table' looks
+        # the next tile up in the table of every shortest route on the level (built the first time it is needed),
+        # 'flow_field' has every ghost heading for pacman, the ghost box or a corner step downhill on one shared
+        # distance map per target (other targets still use A*), and 'incremental' repairs each ghost's last A*
+        # search when its start or target only moved a little
+        self.ghost_pathfinding = "a_star"
+        # tiles (self.level), color and navigation data of the current level
+        load_level(self)
+        # movement speed settings - player speed should be at least 2
+        self.player_speed = 4
+        self.ghost_speed = self.player_speed - 1
+        # Power-up settings
+        self.power_up_duration = 8
+        self.power_counter = 0
+        self.power_up = False
+        self.score = 0
+        # Triggers for game state
+        self.game_lost = False
+        self.game_won = False
+        # Counters used to toggle events based on FPS, such as the pause at the start of game while intro sound plays
+        self.counter = 0
+        self.startup_counter = 0
+        # Current game state and the number of frames the death sequence lasts. With 0 frames pacman is reset the
+        # moment he is caught, the front end sets it to the length of the death sound
+        self.state = STARTING
+        self.death_counter = 0
+        self.death_duration = 0
+        # Names of the sounds triggered during the last tick - cleared at the start of every tick
+        # one of: beginning, intermission, chomp, power_pellet, eat_ghost, death
+        self.events = []
+        # (row, column) of the cells whose dot or power-up was eaten during the last tick - also cleared every tick
+        self.cleared_cells = []
+        # Name of the ghost that caught pacman during the last tick (blinky, inky, pinky or clyde), None if he wasn't
+        self.caught_by = None
+        # A 'Profiler.FrameProfiler' that 'Game.step' reports the time of each of its phases to - None (the default)
+        # turns the timing off
+        self.profiler = None
+        # A 'Telemetry.PathfindingTelemetry' that measures every path the ghosts pick - None turns it off
+        self.telemetry = None
+        # Number of extra ghosts let loose on top of the classic four ("swarm" mode), and the 'Swarm.GhostSwarm'
+        # holding them while a game with any is played (None otherwise)
+        self.swarm_size = 0
+        self.swarm = None
+        # Which ghosts (classic and swarm) are on which tile, rebuilt every frame before pacman moves - see
+        # 'Swarm.OccupancyIndex'
+        self.ghost_index = Swarm.OccupancyIndex()
+
+    # Number of dots left on map that need to be eaten - kept by the level's DotLayer ('settings.level.dots'), which
+    # can also count them by region and find the nearest one
+    @property
+    def dots_left(self):
+        return self.level.dots.count
+
+    # The current level's routing table, built the first time something asks for it (see 'load_navigation')
+    def routing_table(self):
+        if self.routes is None:
+            self.routes = Navigation.RoutingTable(self.nav)
+        return self.routes
+
+
+class GameSnapshot:
+    """The mutable state of a Game at one moment, as saved by 'Game.save' - plain tuples of the values of pacman, the
+    ghosts and the settings, and a copy of the level's tiles. Only the simulation is saved: the settings that never
+    change during a game (window size, speeds, pathfinding mode, ...) and anything the front end attaches (sprites,
+    the screen, sounds) are left where they are. The level's navigation data never changes, so it is kept by
+    reference. Snapshots can be reused - saving into one replaces what it held"""
+
+    __slots__ = ("player", "ghosts", "swarm", "settings", "level", "cells", "dots")
+
+    def __init__(self):
+        self.player = None
+        self.ghosts = None
+        self.swarm = None
+        self.settings = None
+        self.level = None
+        self.cells = None
+        self.dots = None
+
+
+class SnapshotRing:
+    """The last 'capacity' snapshots of a game, oldest first, for rewinding it a tick at a time. The snapshots are
+    allocated up front and reused as newer ones push the oldest out"""
+
+    def __init__(self, capacity):
+        self.snapshots = [GameSnapshot() for _ in range(capacity)]
+        self.start = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    # Saves the current state of 'game' as the newest snapshot
+    def push(self, game):
+        slot = (self.start + self.count) % len(self.snapshots)
+        if self.count == len(self.snapshots):
+            self.start = (self.start + 1) % len(self.snapshots)
+        else:
+            self.count += 1
+        game.save(self.snapshots[slot])
+
+    # Winds 'game' back to the snapshot 'ticks' snapshots ago (dropping it and every newer one), or as far back as
+    # the ring goes. Returns False if there was nothing to rewind to
+    def rewind(self, game, ticks=1):
+        if self.count == 0:
+            return False
+        self.count -= min(ticks, self.count)
+        game.restore(self.snapshots[(self.start + self.count) % len(self.snapshots)])
+        return True
+
+    # Drops every snapshot
+    def clear(self):
+        self.start = 0
+        self.count = 0
+
+
+class Game:
+    """A single game of pacman without any rendering or audio. Owns the settings, the player and the four ghosts
+    ('ghosts', also kept by name), and advances them one frame at a time through 'step', which runs as fast as it is
+    called (no frame cap). With 'settings.swarm_size' set, any number of extra ghosts join them (see 'Swarm.py')"""
+
+    def __init__(self, settings=None):
+        self.settings = settings if settings is not None else GameSettings()
+        settings = self.settings
+
+        # Initialize player - on the level's spawn tile
+        self.player = Pacman()
+        player = self.player
+        reset_player(player, settings)
+
+        # initialize ghosts - placed on their spawn tiles by reset_ghosts
+        ghosts = []
+        for name, strategy in zip(GhostRules.GHOST_NAMES, GhostRules.GHOST_STRATEGIES):
+            ghost = Ghost(0, 0, 0, 0, 0, 0, (player.center_x, player.center_y), settings.ghost_speed, None, False,
+                          False, settings)
+            ghost.name = name
+            ghost.strategy = strategy
+            ghosts.append(ghost)
+        self.blinky, self.inky, self.pinky, self.clyde = ghosts
+        self.ghosts = tuple(ghosts)
+        settings.swarm = Swarm.GhostSwarm(settings, settings.swarm_size) if settings.swarm_size else None
+        reset_ghosts(self.blinky, self.inky, self.pinky, self.clyde, settings)
+
+        # True while the start-up pause, the death sequence, or a game won/lost pop-up is holding everything in place
+        self.beginning_of_game = True
+
+    # Loading next level on game win/loss - what pressing enter does
+    def press_enter(self):
+        player, blinky, inky, pinky, clyde, settings = self.entities()
+        if settings.game_lost:
+            settings.level_id = -1
+            player.lives = 3
+            settings.score = 0
+            load_next_level(player, blinky, inky, pinky, clyde, settings)
+        elif settings.game_won:
+            if settings.level_id >= level_count(settings) - 1:
+                settings.level_id = -1
+            load_next_level(player, blinky, inky, pinky, clyde, settings)
+
+    # Saves the state of the game into 'snapshot' (a new GameSnapshot if None) and returns it
+    def save(self, snapshot=None):
+        if snapshot is None:
+            snapshot = GameSnapshot()
+        player, settings = self.player, self.settings
+        snapshot.player = (player.actual_x, player.actual_y, player.visual_x, player.visual_y, player.center_x,
+                           player.center_y, player.lives, player.direction, tuple(player.valid_directions),
+                           player.direction_command, player.eaten_ghosts)
+        snapshot.ghosts = tuple((ghost.x_visual, ghost.y_visual, ghost.x_actual, ghost.y_actual, ghost.x_center,
+                                 ghost.y_center, ghost.target, ghost.speed, ghost.dead, ghost.been_eaten,
+                                 tuple(ghost.valid_directions), None if ghost.path is None else tuple(ghost.path))
+                                for ghost in self.ghosts)
+        snapshot.swarm = settings.swarm.save() if settings.swarm is not None else None
+        snapshot.settings = (settings.level_id, settings.level_color, settings.spawns, settings.nav, settings.routes,
+                             settings.flow_fields, settings.player_flow_field, settings.power_counter,
+                             settings.power_up, settings.score, settings.game_lost, settings.game_won, settings.counter,
+                             settings.startup_counter, settings.state, settings.death_counter, tuple(settings.events),
+                             tuple(settings.cleared_cells), settings.caught_by, self.beginning_of_game)
+        snapshot.level = settings.level
+        snapshot.cells = bytes(settings.level.cells)
+        snapshot.dots = (settings.level.dots.dots, settings.level.dots.power_ups, settings.level.dots.count)
+        return snapshot
+
+    # Puts the game back in the state saved in 'snapshot'. The incremental pathfinding mode's search trees aren't
+    # saved - the ghosts start new searches, which still find shortest paths but may break ties between them
+    # differently than the original game did
+    def restore(self, snapshot):
+        player, settings = self.player, self.settings
+        (player.actual_x, player.actual_y, player.visual_x, player.visual_y, player.center_x, player.center_y,
+         player.lives, player.direction, valid_directions, player.direction_command,
+         player.eaten_ghosts) = snapshot.player
+        player.valid_directions = list(valid_directions)
+        for ghost, values in zip(self.ghosts, snapshot.ghosts):
+            (ghost.x_visual, ghost.y_visual, ghost.x_actual, ghost.y_actual, ghost.x_center, ghost.y_center,
+             ghost.target, ghost.speed, ghost.dead, ghost.been_eaten, valid_directions, path) = values
+            ghost.valid_directions = list(valid_directions)
+            ghost.path = None if path is None else list(path)
+            ghost.planner = None
+        (settings.level_id, settings.level_color, settings.spawns, settings.nav, settings.routes, settings.flow_fields,
+         settings.player_flow_field, settings.power_counter, settings.power_up, settings.score, settings.game_lost,
+         settings.game_won, settings.counter, settings.startup_counter, settings.state, settings.death_counter, events,
+         cleared_cells, settings.caught_by, self.beginning_of_game) = snapshot.settings
+        settings.events = list(events)
+        settings.cleared_cells = list(cleared_cells)
+        settings.level = snapshot.level
+        settings.level.cells[:] = snapshot.cells
+        settings.level.dots.dots, settings.level.dots.power_ups, settings.level.dots.count = snapshot.dots
+        if settings.swarm is not None:
+            settings.swarm.restore(snapshot.swarm)
+
+    # Returns the (player, blinky, inky, pinky, clyde, settings) tuple that the module level functions expect
+    def entities(self):
+        return self.player, self.blinky, self.inky, self.pinky, self.clyde, self.settings
+
+    # Advances the game by one frame. 'direction_command' is the direction currently held by the user
+    # (0-3, right/left/up/down - None leaves the previous command in place) and 'enter' is whether enter was pressed
+    def step(self, direction_command=None, enter=False):
+        player, blinky, inky, pinky, clyde, settings = self.entities()
+        profiler = settings.profiler
+        telemetry = settings.telemetry
+        if telemetry is not None:
+            telemetry.count_frame(settings.level_id)
+        settings.events.clear()
+        settings.cleared_cells.clear()
+        settings.caught_by = None
+
+        if enter:
+            self.press_enter()
+        if direction_command is not None:
+            player.direction_command = direction_command
+
+        # moving player to other side when they go off-screen through the side hallways
+        if player.visual_x > settings.width:
+            player.visual_x = -47
+            player.actual_x = player.visual_x + 10
+            player.center_x = player.visual_x + 23
+        elif player.visual_x < -50:
+            player.visual_x = settings.width - 3
+            player.actual_x = player.visual_x + 10
+            player.center_x = player.visual_x + 23
+
+        # start-up pause timer for beginning/end of the game, and the timer for the death sequence
+        if settings.state == STARTING and settings.startup_counter >= settings.fps * 5:
+            settings.state = PLAYING
+        if settings.state == STARTING:
+            settings.startup_counter += 1
+        elif settings.state == DYING:
+            settings.death_counter += 1
+            if settings.death_counter >= settings.death_duration:
+                finish_player_death(player, blinky, inky, pinky, clyde, settings)
+        self.beginning_of_game = settings.state != PLAYING
+
+        # counter for animations / flicker
+        if settings.counter < settings.fps:
+            settings.counter += 1
+        else:
+            settings.counter = 0
+
+        # timer for when a powerup is picked up - else-if resets settings when power-up ends
+        if settings.power_up and settings.power_counter < settings.fps * settings.power_up_duration:
+            settings.power_counter += 1
+        elif settings.power_up and settings.power_counter >= settings.fps * settings.power_up_duration:
+            settings.power_counter = 0
+            settings.power_up = False
+            player.eaten_ghosts = 0
+            for ghost in self.ghosts:
+                ghost.been_eaten = False
+                ghost.speed = settings.ghost_speed
+            if settings.swarm is not None:
+                settings.swarm.end_power_up()
+        if profiler is not None:
+            profiler.mark("timers")
+
+        # Player movement
+        if not self.beginning_of_game:
+            settings.ghost_index.rebuild(self.ghosts, settings.swarm, settings.level)
+            # Move the player one pixel for each count of player speed
+            pixels = settings.player_speed
+            while pixels > 0:
+                pixels -= 1
+                # Check what directions pacman is able to move too (which adjacent tiles are not walls)
+                player.valid_directions = player.update_valid_directions(settings)
+
+                # Check if the users movement input matches a valid direction - if so adjust Pacman's visual direction
+                for i in range(4):
+                    if player.direction_command == i and player.valid_directions[i]:
+                        player.direction = i
+
+                # if not special case of game won/lost (or just caught), move the player and check resulting collisions
+                if not settings.game_lost and not settings.game_won and settings.state != DYING:
+                    player.move_player()
+                    position = (player.center_x, player.center_y)
+                    check_collisions(player, blinky, inky, pinky, clyde, settings)
+
+                    # The pixels that just carry pacman further along his tile are moved all at once - unless the
+                    # collisions ended the game or sent him back to the start
+                    if (pixels > 0 and position == (player.center_x, player.center_y) and not settings.game_lost and
+                            not settings.game_won and settings.state != DYING):
+                        player.valid_directions = player.update_valid_directions(settings)
+                        run = player.straight_run(settings, pixels)
+                        player.move_player(run)
+                        pixels -= run
+        if profiler is not None:
+            profiler.mark("player")
+
+        # Ghost movement
+        # update ghost targets
+        update_ghost_targets(player, blinky, inky, pinky, clyde, settings)
+        if profiler is not None:
+            profiler.mark("ghost_targets")
+
+        if not self.beginning_of_game and settings.state != DYING:
+            player_in_bounds = 0 <= player.center_x // 25 < settings.level.cols
+            for ghost in self.ghosts:
+                if ghost.strategy != GhostRules.GREEDY:
+                    # Move the ghost one pixel per value of its current speed - if changing directions is possible
+                    # (it is in the middle of a tile) and player is not out of bounds (using the hallways), update
+                    # its path to pacman using A* with its heuristic (1 for blinky, 2 for inky and pinky)
+                    ghost.follow_path(ghost.speed, ghost.strategy == GhostRules.A_STAR_ONE, player_in_bounds)
+                    continue
+
+                # Greedy ghosts (clyde) have their own pathfinding - they simply attempt to increase/decrease their
+                # position relative to pacman, if their x-coord is lower, then increase by 1, if higher than decrease
+                # etc. They use it unless they've been eaten and need to return to the ghost box, which they use A*
+                # for (heuristic 2), otherwise they would probably never make it to the box
+                if telemetry is not None and not ghost.dead:
+                    greedy_start = perf_counter_ns()
+                # whether he reached a tile center (where he can pick a new direction) this frame, for the telemetry
+                at_center = False
+                pixels = ghost.speed
+                while pixels > 0:
+                    if not ghost.dead:
+                        at_center = at_center or ghost.x_center % 25 == 13 and ghost.y_center % 25 == 13
+                        ghost.update_valid_clyde_directions()
+                        run = ghost.greedy_run(pixels)
+                        ghost.move_clyde(run)
+                    else:
+                        ghost.update_path(False)
+                        run = ghost.path_run(pixels, False, True)
+                        ghost.a_star_move(run)
+                    pixels -= run
+                if telemetry is not None and not ghost.dead:
+                    telemetry.record_greedy(ghost, perf_counter_ns() - greedy_start, at_center)
+
+            if settings.swarm is not None:
+                settings.swarm.move(GhostRules.chase_targets(player, blinky, settings),
+                                    GhostRules.flee_targets(settings), GhostRules.ghost_box_target(settings),
+                                    player_in_bounds)
+        if profiler is not None:
+            profiler.mark("ghosts")
+
+
+# Puts pacman back on his spawn tile, facing right
+def reset_player(player, settings):
+    player.actual_x = (settings.width // 30) * settings.spawns[0][0]
+    player.actual_y = ((settings.height - 50) // 33) * settings.spawns[0][1]
+    player.visual_x = player.actual_x - 10
+    player.visual_y = player.actual_y - 10
+    player.center_x = player.actual_x + 13
+    player.center_y = player.actual_y + 13
+    player.direction = 0
+
+
+# Sets ghosts back to default settings / positions - on their spawn tiles
+def reset_ghosts(blinky, inky, pinky, clyde, settings):
+    for ghost, (x, y) in zip((blinky, inky, pinky, clyde), settings.spawns[1:]):
+        ghost.x_visual = (settings.width // 30) * x - 10
+        ghost.y_visual = ((settings.height - 50) // 33) * y - 10
+        ghost.x_actual = (settings.width // 30) * x
+        ghost.y_actual = ((settings.height - 50) // 33) * y
+        ghost.x_center = (settings.width // 30) * x + 13
+        ghost.y_center = ((settings.height - 50) // 33) * y + 13
+        ghost.speed = settings.ghost_speed
+        ghost.dead = False
+        ghost.been_eaten = False
+    if settings.swarm is not None:
+        settings.swarm.reset()
+
+
+# resets the game board to the next appropriate level on a game win/loss
+def load_next_level(player, blinky, inky, pinky, clyde, settings):
+    # reset stage
+    settings.level_id += 1
+    load_level(settings)
+
+    # play intro or intermission sound
+    if settings.game_lost:
+        settings.events.append("beginning")
+    else:
+        settings.events.append("intermission")
+
+    # Reset game won/lost
+    settings.game_lost = False
+    settings.game_won = False
+
+    # Reset Player
+    reset_player(player, settings)
+    settings.power_up = False
+    settings.power_counter = settings.fps * settings.power_up_duration
+    settings.startup_counter = 0
+    settings.state = STARTING
+
+    # Reset Ghosts
+    reset_ghosts(blinky, inky, pinky, clyde, settings)
+
+
+# Loads the tiles, color, spawn tiles and navigation data of level 'settings.level_id' - out of the level pack if
+# there is one, which has the routing table already built. 'settings.spawns' holds the (column, row) tiles pacman,
+# blinky, inky, pinky and clyde start on
+def load_level(settings):
+    if settings.level_pack is None:
+        settings.level = Levels.level_grids[settings.level_id].copy()
+        settings.level_color = Levels.level_colors[settings.level_id]
+        settings.spawns = Levels.DEFAULT_SPAWNS
+        load_navigation(settings)
+    else:
+        packed_level = settings.level_pack.level(settings.level_id)
+        settings.level = packed_level.grid.copy()
+        settings.level_color = packed_level.color
+        settings.spawns = packed_level.spawns
+        load_navigation(settings, *packed_level.navigation())
+
+
+# Number of levels in the game, before it loops back to the first
+def level_count(settings):
+    if settings.level_pack is None:
+        return len(Levels.level_grids)
+    return len(settings.level_pack)
+
+
+# Builds the navigation data for the current level - the graph the A* searches run on, the routing table, and the
+# flow fields for the targets that never move (the ghost box and the four corners). A graph and routing table
+# that were already built for the level can be passed in. The routing table and flow fields take far longer to build
+# than the graph and only some pathfinding modes use them, so they are left to be built the first time they are
+# needed ('GameSettings.routing_table' and 'Ghost.flow_field_lookup')
+def load_navigation(settings, nav=None, routes=None):
+    settings.nav = nav if nav is not None else Navigation.NavGraph(settings.level)
+    settings.routes = routes
+    # goal tile -> flow field, None until a ghost first heads for the goal
+    settings.flow_fields = dict()
+    for target in (GhostRules.ghost_box_target(settings),) + GhostRules.flee_targets(settings):
+        settings.flow_fields[settings.nav.index((target[0] // 25, target[1] // 25))] = None
+    # Pacman's flow field, rebuilt by update_ghost_targets whenever he moves onto a new tile
+    settings.player_flow_field = None
+
+
+# Updates the ghosts targeting, whether they should be targeting pacman, the ghost box, fleeing to a corner, etc.
+def update_ghost_targets(player, blinky, inky, pinky, clyde, settings):
+    # In flow field mode, one distance map from pacman's tile is shared by every ghost chasing him. It only needs
+    # rebuilding when pacman moves onto a new tile
+    if settings.ghost_pathfinding == "flow_field":
+        player_tile = settings.nav.index((player.center_x // 25, player.center_y // 25))
+        field = settings.player_flow_field
+        if player_tile is not None and settings.nav.walkable[player_tile] and (field is None or
+                                                                               field.goal != player_tile):
+            settings.player_flow_field = Navigation.FlowField(settings.nav, player_tile)
+
+    # Each ghost chases pacman by its own rules (see 'GhostRules.chase_targets'), unless it is fleeing to its corner
+    # during a power-up or dead and heading back to the ghost box
+    chase = GhostRules.chase_targets(player, blinky, settings)
+    corners = GhostRules.flee_targets(settings)
+    box = GhostRules.ghost_box_target(settings)
+    for role, ghost in enumerate((blinky, inky, pinky, clyde)):
+        ghost.target = GhostRules.ghost_target(chase[role], corners[role], box, settings.power_up, ghost.dead,
+                                               ghost.been_eaten)
+
+
+# Performs all collision checks, such as getting a dot or power-up, or colliding with a ghost, etc.
+def check_collisions(player, blinky, inky, pinky, clyde, settings):
+    # players (x,y) coordinates on the grid (tiles are 25x25 in pixels)
+    j = player.center_x // 25
+    i = player.center_y // 25
+
+    # Player Collisions
+    # if player is not out of bounds
+    if 0 < player.center_x < settings.width:
+
+        cells = settings.level.cells
+        cell = i * settings.level.cols + j
+
+        # check if players center position is a small dot. if so, remove dot from level and increase score by 10
+        if Levels.tile_flags[cells[cell]] & Levels.DOT:
+            settings.events.append("chomp")
+            settings.level.clear(cell)
+            settings.cleared_cells.append((i, j))
+            settings.score += 10
+
+        # check if players center position is a large dot. if so, remove dot from level and increase score by 50
+        # also updates game setting to reflect that a power-up was just picked up
+        if Levels.tile_flags[cells[cell]] & Levels.POWER_UP:
+            settings.events.append("power_pellet")
+            settings.level.clear(cell)
+            settings.cleared_cells.append((i, j))
+            settings.score += 50
+            settings.power_up = True
+            settings.power_counter = 0
+            player.eaten_ghosts = 0
+            # Tries to slow the ghosts down by a value of 2, but if their speed would be reduced to <= 0 sets them to 1
+            for ghost in (blinky, inky, pinky, clyde):
+                ghost.been_eaten = False
+                if not ghost.dead:
+                    ghost.speed = settings.ghost_speed - 2 if settings.ghost_speed - 2 > 1 else 1
+            if settings.swarm is not None:
+                settings.swarm.start_power_up()
+
+        # Check if all dots are gone
+        if settings.dots_left <= 0:
+            settings.game_won = True
+            settings.state = LEVEL_WON
+
+        # Check if collided with each ghost on pacman's tile (classic and swarm, looked up in the occupancy index) -
+        # eaten while the power-up lasts (200, 400, 800, 1600 points, and no more than that for any further ghosts
+        # of the swarm), otherwise pacman is caught
+        classic = (blinky, inky, pinky, clyde)
+        swarm = settings.swarm
+        for ghost_id in settings.ghost_index.on_tile(i, j):
+            if ghost_id < len(classic):
+                ghost = classic[ghost_id]
+                been_eaten, dead, catcher = ghost.been_eaten, ghost.dead, ghost.name
+            else:
+                ghost = ghost_id - len(classic)
+                been_eaten, dead, catcher = swarm.been_eaten[ghost], swarm.dead[ghost], "swarm"
+
+            if settings.power_up and not been_eaten:
+                settings.events.append("eat_ghost")
+                player.eaten_ghosts += 1
+                settings.score += 200 * (2 ** min(player.eaten_ghosts, 4))
+                if ghost_id >= len(classic):
+                    swarm.eat(ghost)
+                    continue
+                ghost.been_eaten = True
+                ghost.dead = True
+                ghost.speed = settings.ghost_speed
+                # switch greedy ghosts to a* to return to box
+                if ghost.strategy == GhostRules.GREEDY:
+                    update_ghost_targets(player, blinky, inky, pinky, clyde, settings)
+                    ghost.update_path(False)
+            elif not dead:
+                player_death(player, blinky, inky, pinky, clyde, settings, catcher)
+
+    # Ghost collisions
+    # Check if ghosts have made it back to their target in the box
+    # only possible if ghost is dead, they are at their target path, and they aren't currently colliding with pacman
+    for ghost in (blinky, inky, pinky, clyde):
+        if ghost.dead and len(ghost.path) == 0 and not (i == ghost.y_center // 25 and j == ghost.x_center // 25):
+            ghost.dead = False
+    # the swarm keeps its dead ghosts that are out of path in 'waiting'
+    if settings.swarm is not None and settings.swarm.waiting:
+        swarm = settings.swarm
+        for ghost in sorted(swarm.waiting):
+            if not (i == swarm.y[ghost] // 25 and j == swarm.x[ghost] // 25):
+                swarm.dead[ghost] = 0
+                swarm.waiting.discard(ghost)
+
+
+# Repositions the level when player dies - triggers game loss if no extra lives remaining. 'catcher' is the name of
+# the ghost that caught him
+def player_death(player, blinky, inky, pinky, clyde, settings, catcher=None):
+    # already caught this tick or earlier - the death sequence is playing, or it already ended the game or sent
+    # everyone back to the start
+    if settings.state in (DYING, GAME_OVER, STARTING):
+        return
+    settings.caught_by = catcher
+
+    # play pacman death sound effect - everything stays frozen in place until it's finished
+    settings.events.append("death")
+    settings.state = DYING
+    settings.death_counter = 0
+    if settings.death_duration <= 0:
+        finish_player_death(player, blinky, inky, pinky, clyde, settings)
+
+
+# End of the death sequence - takes a life and resets the level, or ends the game if no extra lives remaining
+def finish_player_death(player, blinky, inky, pinky, clyde, settings):
+    # reduce lives by 1
+    player.lives -= 1
+
+    # End game if out of lives
+    if player.lives < 0:
+        settings.game_lost = True
+        settings.state = GAME_OVER
+        settings.startup_counter = 0
+        return
+
+    # reset timers
+    settings.state = STARTING
+    settings.startup_counter = 0
+    settings.power_up = False
+
+    # reset player back to original positions
+    reset_player(player, settings)
+
+    # Reset Ghosts
+    reset_ghosts(blinky, inky, pinky, clyde, settings)
+
+    settings.events.append("beginning")
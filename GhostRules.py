@@ -0,0 +1,231 @@
+import Levels
+import Navigation
+
+# The rules every ghost follows - what it targets, how clyde's greedy movement picks its way, and how a ghost steps
+# along its path - shared by the classic ghosts ('GameLogic.Ghost') and the swarm's ('Swarm.GhostSwarm'), so the two
+# only differ in how their state is stored. Ghost positions are in pixels: 'actual' is the top-left corner of the 25 x
+# 25 pixel tile a ghost is considered to be on, and its center is 13 pixels right of and below that.
+
+# Ghost strategies - the pathfinding a ghost uses to chase pacman. 'A_STAR_ONE' is A* with heuristic one (distance
+# formula, blinky's), 'A_STAR_TWO' A* with heuristic two (Manhattan distance, inky's and pinky's) and 'GREEDY' clyde's
+# greedy movement, which just tries to close the gap on one axis at a time and gets stuck behind walls
+A_STAR_ONE, A_STAR_TWO, GREEDY = range(3)
+STRATEGY_NAMES = ("a_star_one", "a_star_two", "greedy")
+
+# The classic ghosts, in the order they move and are checked for collisions, and the strategy each one chases pacman
+# with. Their chase rules (see 'chase_targets') are picked by position in this order - a ghost's "role"
+GHOST_NAMES = ("blinky", "inky", "pinky", "clyde")
+GHOST_STRATEGIES = (A_STAR_ONE, A_STAR_TWO, A_STAR_TWO, GREEDY)
+
+# Direction = [right, left, up, down] - the pixel step of each
+STEP_X = (1, -1, 0, 0)
+STEP_Y = (0, 0, -1, 1)
+
+
+# Target of a dead ghost - the center of the ghost box
+def ghost_box_target(settings):
+    return (settings.width // 30) * 16 + 13, ((settings.height - 50) // 33) * 15 + 13
+
+
+# Targets the ghosts flee to while pacman has a power-up - a different corner of the grid for each ghost
+# returned in the order blinky, inky, pinky, clyde
+def flee_targets(settings):
+    return (((settings.width // 30) * 27 + 13, ((settings.height - 50) // 33) * 30 + 13),
+            ((settings.width // 30) * 2 + 13, ((settings.height - 50) // 33) * 30 + 13),
+            ((settings.width // 30) * 27 + 13, ((settings.height - 50) // 33) * 2 + 13),
+            ((settings.width // 30) * 2 + 13, ((settings.height - 50) // 33) * 2 + 13))
+
+
+# The targets of the four roles while chasing pacman, in the order blinky, inky, pinky, clyde. 'blinky' is the ghost
+# inky's target depends on
+def chase_targets(player, blinky, settings):
+    # Blinky always targets the player - (A* , heuristic 1)
+    blinky_target = (player.center_x, player.center_y)
+
+    cells = settings.level.cells
+    cols = settings.level.cols
+    flags = Levels.tile_flags
+
+    # inky attempts to target in-between blinky and pacman (A* , heuristic 2),
+    # but if that targets something unreachable, such as a wall tile, target defaults to pacman
+    if ((blinky.x_center + player.center_x) // 2 // 25 > 28 or
+            (blinky.y_center + player.center_y) // 2 // 25 > 28 or
+            flags[cells[((blinky.y_center + player.center_y) // 2 // 25 > 28) * cols +
+                        ((blinky.x_center + player.center_x) // 2 // 25 > 28)]] & Levels.WALL):
+        inky_target = (player.center_x, player.center_y)
+    else:
+        inky_target = (((blinky.x_center + player.center_x) // 2), ((player.center_y + blinky.y_center) // 2))
+
+    # Pinky tries to target 4 spaces ahead of pacman (A* , heuristic 2),
+    # but if that target is out of bounds or a wall/unreachable, it will default to targeting pacman
+    pinky_target = (player.center_x, player.center_y)
+    row = player.center_y // 25 * cols
+    column = player.center_x // 25
+    if player.direction == 0:
+        if not ((player.center_x + 100) // 25 > 28 or flags[cells[row + (player.center_x + 100) // 25]] & Levels.WALL):
+            pinky_target = (player.center_x + 100, player.center_y)
+    elif player.direction == 1:
+        if not ((player.center_x - 100) // 25 < 1 or flags[cells[row + (player.center_x - 100) // 25]] & Levels.WALL):
+            pinky_target = (player.center_x - 100, player.center_y)
+    elif player.direction == 2:
+        if not ((player.center_y - 100) // 25 < 1 or
+                flags[cells[(player.center_y - 100) // 25 * cols + column]] & Levels.WALL):
+            pinky_target = (player.center_x, player.center_y - 100)
+    elif player.direction == 3:
+        if not ((player.center_y + 100) // 25 > 28 or
+                flags[cells[(player.center_y + 100) // 25 * cols + column]] & Levels.WALL):
+            pinky_target = (player.center_x, player.center_y + 100)
+
+    # Clyde does not use his target value when moving towards pacman,
+    # but changes his x,y position based on his relative position to pacman instead
+    clyde_target = (player.center_x, player.center_y)
+    return blinky_target, inky_target, pinky_target, clyde_target
+
+
+# Target of a ghost that would chase 'chase' - if pacman currently has a power-up, and the ghost hasn't been eaten
+# yet, it flees to 'corner' instead, and if it is dead it returns to the ghost box ('box') to respawn
+def ghost_target(chase, corner, box, power_up, dead, been_eaten):
+    if dead:
+        return box
+    if power_up and not been_eaten:
+        return corner
+    return chase
+
+
+# The next tile (as a NavGraph index) after 'start' on the way to 'goal', picked with the pathfinding mode chosen in
+# the settings - looked up in the routing table or a flow field, or else the first step of an A* search with
+# heuristic one or two. None if there is nowhere to go (already there, or the goal is unreachable). The classic
+# ghosts keep whole paths and an incremental mode on top of this (see 'Ghost.find_path')
+def next_tile(settings, start, goal, use_heuristic_one):
+    if settings.ghost_pathfinding == "routing_table":
+        return settings.routing_table().get_next_tile(start, goal)
+    if settings.ghost_pathfinding == "flow_field":
+        field = flow_field(settings, goal)
+        if field is not None:
+            return field.get_next_tile(start)
+    path = settings.nav.a_star(start, goal, use_heuristic_one)
+    return path[0] if path else None
+
+
+# The flow field leading to the tile 'goal' if it has one - pacman's tile, the ghost box or one of the corners (built
+# the first time a ghost heads for it) - None otherwise
+def flow_field(settings, goal):
+    flow_fields = settings.flow_fields
+    if goal in flow_fields and flow_fields[goal] is None:
+        flow_fields[goal] = Navigation.FlowField(settings.nav, goal)
+    field = flow_fields.get(goal)
+    player_field = settings.player_flow_field
+    if field is None and player_field is not None and player_field.goal == goal:
+        field = player_field
+    return field
+
+
+# Direction a ghost centered on (x, y) moves in to reach the tile center (next_x, next_y) - along x first, then y.
+# None if it is already there
+def path_direction(x, y, next_x, next_y):
+    if next_x > x:
+        return 0
+    elif next_x < x:
+        return 1
+    elif next_y < y:
+        return 2
+    elif next_y > y:
+        return 3
+    return None
+
+
+# Counts how many of the next (at most 'limit') one pixel moves towards the tile center (next_x, next_y) a ghost
+# centered on (x, y) makes in the same direction without passing a point where its path gets updated - a tile center
+# if 'at_centers', or the edge of the current tile if 'every_pixel' (the path is updated every pixel, but only changes
+# with the ghost's tile). Returns the whole 'limit' if the ghost isn't going anywhere
+def path_run(x, y, next_x, next_y, limit, at_centers, every_pixel):
+    if next_x != x:
+        position, other, distance = x, y, next_x - x
+    elif next_y != y:
+        position, other, distance = y, x, next_y - y
+    else:
+        return limit
+
+    step = 1 if distance > 0 else -1
+    run = min(limit, abs(distance))
+    if at_centers and other % 25 == 13:
+        run = min(run, (13 - position) * step % 25 or 25)
+    if every_pixel:
+        run = min(run, pixels_within(position, step, position // 25 * 25, position // 25 * 25 + 24) + 1)
+    return run
+
+
+# Directions greedy movement can take a ghost whose tile starts at (x_actual, y_actual), as [right, left, up, down].
+# Similar to the player's, except the ghosts only stop at walls
+def greedy_directions(x_actual, y_actual, settings):
+    valid_directions = [False, False, False, False]
+    i = y_actual // 25
+    j = x_actual // 25
+
+    # if out of bounds, can only move right and left - otherwise check surrounding tiles to determine valid paths
+    if j < 1 or j > 28:
+        valid_directions[0] = True
+        valid_directions[1] = True
+    else:
+        cells = settings.level.cells
+        cols = settings.level.cols
+        flags = Levels.tile_flags
+        cell = i * cols + j
+
+        # if grid square below current position isn't a wall and properly aligned - moving down is ok
+        if not flags[cells[cell + cols]] & Levels.WALL and (0 <= x_actual % 25 <= 0):
+            valid_directions[3] = True
+
+        # if grid above current position isn't a wall and properly aligned - moving up is ok
+        # else handles case where above cell is a wall, but there is space to move closer
+        if not flags[cells[cell - cols]] & Levels.WALL and (0 <= x_actual % 25 <= 0):
+            valid_directions[2] = True
+        else:
+            if y_actual > (i * 25):
+                valid_directions[2] = True
+
+        # if cell to the right of the current position isn't a wall and properly aligned - moving right is ok
+        if not flags[cells[cell + 1]] & Levels.WALL and (0 <= y_actual % 25 <= 0):
+            valid_directions[0] = True
+
+        # if cell to the left of the current position isn't a wall and properly aligned - moving left is ok
+        # else handles case where left cell is a wall, but there is space to move closer
+        if not flags[cells[cell - 1]] & Levels.WALL and (0 <= y_actual % 25 <= 0):
+            valid_directions[1] = True
+        else:
+            if x_actual > (j * 25):
+                valid_directions[1] = True
+    return valid_directions
+
+
+# Direction greedy movement takes a ghost centered on (x, y) in, given its 'valid_directions' - up, right, left or
+# down, the first that closes the gap to 'target' on that axis. None if it is stuck
+def greedy_direction(x, y, target, valid_directions):
+    if target[1] < y and valid_directions[2]:
+        return 2
+    elif target[0] > x and valid_directions[0]:
+        return 0
+    elif target[0] < x and valid_directions[1]:
+        return 1
+    elif target[1] > y and valid_directions[3]:
+        return 3
+    return None
+
+
+# Counts how many of the next (at most 'limit') one pixel moves greedy movement makes in 'direction' (from
+# greedy_direction) - until the ghost lines up with its target on that axis, or with the grid (where its valid
+# directions can change). 'actual' is the ghost's actual coordinate on the axis it moves along, 'distance' how far
+# its center is from the target on that axis
+def greedy_run(direction, actual, distance, limit):
+    step = STEP_X[direction] + STEP_Y[direction]
+    run = min(limit, distance)
+    if actual % 25 == 0:
+        return min(run, 1)
+    return min(run, pixels_within(actual, step, actual // 25 * 25 + 1, actual // 25 * 25 + 24) + 1)
+
+
+# Number of one pixel steps in the direction of 'step' (1 or -1) that 'value' can take and stay within [low, high]
+def pixels_within(value, step, low, high):
+    if step > 0:
+        return high - value
+    return value - low
@@ -0,0 +1,177 @@
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+import Levels
+import Navigation
+
+# Binary level packs - a whole set of levels in one file, along with everything derived from them that is slow to
+# build (the routing table takes longer to build than the rest of a level load put together). The tables are
+# computed once when a pack is written, and opening a pack only maps the file into memory - a level is read when
+# the game loads it, and its tables are used straight out of the memory map without being copied. The routing table
+# grows with the square of the level's walkable tiles, so packs of many levels can be written without it - a level
+# whose record ends after the adjacency has none, and the game builds it if a pathfinding mode needs it.
+#
+# Layout (all numbers little-endian):
+#   header       magic, level count, digest of the levels the pack was written from
+#   index        (offset, size) of each level record
+#   level record rows, cols, number of walkable tiles (nodes), color length, (column, row) spawn tile of pacman,
+#                blinky, inky, pinky and clyde, then the color name, the tiles (rows * cols bytes, as in
+#                'Levels.LevelGrid'), the adjacency (one byte per tile, see 'NavGraph.adjacency_bits'), a padding
+#                byte if needed, and (optionally) the routing table - distances (nodes * nodes uint16) then next hops
+#                (nodes * nodes bytes), laid out as in 'Navigation.RoutingTable', and a padding byte if needed
+
+MAGIC = b"PACPACK1"
+HEADER = struct.Struct("<8sI20s")
+INDEX_ENTRY = struct.Struct("<QQ")
+LEVEL_HEADER = struct.Struct("<HHHH10B")
+
+# Where the pack of the built-in levels is kept - next to the game's other assets
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "levels.pack")
+
+# (column, row) of the tiles pacman, blinky, inky, pinky and clyde start on in the built-in levels
+DEFAULT_SPAWNS = Levels.DEFAULT_SPAWNS
+
+
+class PackedLevel:
+    """A single level read out of the record at 'offset' ('length' bytes long) of a LevelPack - its LevelGrid, color
+    and spawn tiles. The adjacency and routing tables are views into the pack's memory map, which 'navigation' builds
+    the level's NavGraph and RoutingTable on (once - later loads of the level share them). 'distance' and 'next_hop'
+    are None if the pack was written without the routing table"""
+
+    def __init__(self, view, offset, length):
+        rows, cols, node_count, color_length, *spawns = LEVEL_HEADER.unpack_from(view, offset)
+        self.spawns = tuple(zip(spawns[0::2], spawns[1::2]))
+        position = offset + LEVEL_HEADER.size
+        self.color = bytes(view[position:position + color_length]).decode("utf-8")
+        position += color_length
+        size = rows * cols
+        self.grid = Levels.LevelGrid(view[position:position + size], cols)
+        position += size
+        self.adjacency = view[position:position + size]
+        position += size
+        position += (position - offset) % 2
+        table_size = node_count * node_count
+        self.distance = self.next_hop = None
+        if position + 3 * table_size <= offset + length:
+            self.distance = view[position:position + 2 * table_size].cast("H")
+            if sys.byteorder != "little":
+                self.distance = array("H", self.distance)
+                self.distance.byteswap()
+            position += 2 * table_size
+            self.next_hop = view[position:position + table_size]
+        self.nav = None
+        self.routes = None
+
+    # Returns the level's (NavGraph, RoutingTable) - the routing table is None if the pack doesn't have it
+    def navigation(self):
+        if self.nav is None:
+            self.nav = Navigation.NavGraph(self.grid, self.adjacency)
+            if self.next_hop is not None:
+                self.routes = Navigation.RoutingTable(self.nav, self.distance, self.next_hop)
+        return self.nav, self.routes
+
+
+class LevelPack:
+    """A level pack file opened read-only through mmap. Opening only checks the header - levels are read (and then
+    kept) the first time they are asked for, so a pack of thousands of mazes costs next to nothing to open"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.map)
+        magic, self.count, self.digest = HEADER.unpack_from(self.view, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a level pack")
+        self.levels = dict()
+
+    def __len__(self):
+        return self.count
+
+    # Returns the PackedLevel for 'level_id'
+    def level(self, level_id):
+        if not 0 <= level_id < self.count:
+            raise IndexError(f"level {level_id} is not in {self.path} ({self.count} levels)")
+        if level_id not in self.levels:
+            offset, length = INDEX_ENTRY.unpack_from(self.view, HEADER.size + level_id * INDEX_ENTRY.size)
+            self.levels[level_id] = PackedLevel(self.view, offset, length)
+        return self.levels[level_id]
+
+    # Unmaps the file - only possible once nothing uses the levels read from it any more
+    def close(self):
+        self.levels.clear()
+        self.view.release()
+        self.map.close()
+
+
+# Digest of a set of levels, stored in the pack so a pack can be checked against the levels it was written from
+def levels_digest(layouts, colors):
+    digest = hashlib.sha1()
+    for layout, color in zip(layouts, colors):
+        digest.update(struct.pack("<HH", len(layout), len(layout[0])))
+        digest.update(bytes(value for row in layout for value in row))
+        digest.update(color.encode("utf-8") + b"\0")
+    return digest.digest()
+
+
+# Writes a level pack of 'layouts' (lists of rows, as in 'Levels.level_layouts') and their 'colors'. 'spawns' holds
+# the spawn tiles of each level, DEFAULT_SPAWNS for every level if not given. Builds every level's routing table,
+# unless 'routing_tables' is False
+def write_pack(path, layouts, colors, spawns=None, routing_tables=True):
+    records = []
+    for level_id, layout in enumerate(layouts):
+        grid = Levels.LevelGrid(layout)
+        nav = Navigation.NavGraph(grid)
+        color = colors[level_id].encode("utf-8")
+        level_spawns = spawns[level_id] if spawns is not None else DEFAULT_SPAWNS
+
+        record = bytearray(LEVEL_HEADER.pack(grid.rows, grid.cols, len(nav.nodes), len(color),
+                                             *(value for tile in level_spawns for value in tile)))
+        record += color
+        record += grid.template
+        record += nav.adjacency_bits()
+        if len(record) % 2:
+            record += b"\0"
+        if routing_tables:
+            routes = Navigation.RoutingTable(nav)
+            distance = array("H", routes.distance)
+            if sys.byteorder != "little":
+                distance.byteswap()
+            record += distance.tobytes()
+            record += routes.next_hop
+        # records start on even offsets, so the distances inside them are aligned
+        if len(record) % 2:
+            record += b"\0"
+        records.append(record)
+
+    # write to a temporary file first, so a pack that is open somewhere else is never half written
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, len(records), levels_digest(layouts, colors)))
+        offset = HEADER.size + len(records) * INDEX_ENTRY.size
+        for record in records:
+            file.write(INDEX_ENTRY.pack(offset, len(record)))
+            offset += len(record)
+        for record in records:
+            file.write(record)
+    os.replace(temporary_path, path)
+
+
+# Opens the level pack at 'path' (DEFAULT_PATH by default), (re)writing it first if it is missing or was written from
+# different levels than 'layouts' and 'colors' (the built-in levels by default)
+def load_cached_pack(path=DEFAULT_PATH, layouts=None, colors=None):
+    if layouts is None:
+        layouts, colors = Levels.level_layouts, Levels.level_colors
+    digest = levels_digest(layouts, colors)
+    try:
+        pack = LevelPack(path)
+        if pack.digest == digest and len(pack) == len(layouts):
+            return pack
+        pack.close()
+    except (OSError, ValueError, struct.error):
+        pass
+    write_pack(path, layouts, colors)
+    return LevelPack(path)
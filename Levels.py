@@ -113,3 +113,150 @@ level_layouts = [[[7, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5
                   [8, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 9]]]
 
 level_colors = ["blue", "red", "green"]
+
+# (column, row) of the tiles pacman, blinky, inky, pinky and clyde start on in the built-in levels - a level pack
+# keeps its own for each level
+DEFAULT_SPAWNS = ((15, 24), (14, 12), (12, 15), (14, 15), (16, 15))
+
+# Tile flags - what each tile value means to the game, looked up with 'tile_flags[value]'
+DOT = 1  # small dot (1)
+POWER_UP = 2  # big dot (2)
+GHOST_GATE = 4  # ghost gate (3) - blocks pacman but not the ghosts
+WALL = 8  # walls and the unreachable space inside them (4 - 10) - blocks everything
+tile_flags = bytes([0, DOT, POWER_UP, GHOST_GATE, WALL, WALL, WALL, WALL, WALL, WALL, WALL])
+
+# Translation tables turning each tile value into the digit '1' if it is a dot (or power-up), '0' otherwise
+dot_digits = bytes(ord("1") if value < len(tile_flags) and tile_flags[value] & DOT else ord("0")
+                   for value in range(256))
+power_up_digits = bytes(ord("1") if value < len(tile_flags) and tile_flags[value] & POWER_UP else ord("0")
+                        for value in range(256))
+
+
+class LevelGrid:
+    """A level layout stored as one flat bytearray, row after row - the tile in row 'i', column 'j' is
+    'cells[i * cols + j]', holding the same values as 'level_layouts'. The untouched layout is kept as 'template', so
+    a fresh copy of the level (all dots back in place) is a single buffer copy. 'dots' tracks the dots and power-ups
+    still on the level - eat them with 'clear' so the two stay in sync"""
+
+    def __init__(self, layout, cols=None, template_dots=None):
+        if cols is None:
+            self.rows = len(layout)
+            self.cols = len(layout[0])
+            self.template = bytes(value for row in layout for value in row)
+        else:
+            # already flattened
+            self.rows = len(layout) // cols
+            self.cols = cols
+            self.template = bytes(layout)
+        self.cells = bytearray(self.template)
+        self.template_dots = template_dots if template_dots is not None else DotLayer(self)
+        self.dots = self.template_dots.copy()
+
+    # Returns a copy of the level as it was before any dots were eaten
+    def copy(self):
+        return LevelGrid(self.template, self.cols, self.template_dots)
+
+    # Puts every eaten dot and power-up back in place
+    def reset(self):
+        self.cells[:] = self.template
+        self.dots = self.template_dots.copy()
+
+    # Tile value in row 'i', column 'j'
+    def get(self, i, j):
+        return self.cells[i * self.cols + j]
+
+    # Empties a tile whose dot or power-up was eaten
+    def clear(self, cell):
+        self.cells[cell] = 0
+        self.dots.remove(cell)
+
+    # Number of dots and power-ups left on the level
+    def count_dots(self):
+        return self.dots.count
+
+
+class DotLayer:
+    """Bitsets of the dots and power-ups left on a LevelGrid - bit 'i * cols + j' of 'dots' (or 'power_ups') is set
+    while the tile in row 'i', column 'j' still has a dot (or power-up) on it. 'count' is the total left of both"""
+
+    def __init__(self, grid):
+        self.rows = grid.rows
+        self.cols = grid.cols
+        # the tiles written out as a binary number, last tile first, read in one go
+        self.dots = int(grid.cells.translate(dot_digits)[::-1], 2)
+        self.power_ups = int(grid.cells.translate(power_up_digits)[::-1], 2)
+        self.count = self.dots.bit_count() + self.power_ups.bit_count()
+        # bitmasks of the regions counted so far, by (top, left, bottom, right)
+        self.region_masks = dict()
+
+    def copy(self):
+        layer = DotLayer.__new__(DotLayer)
+        layer.__dict__.update(self.__dict__)
+        return layer
+
+    # Removes the dot or power-up (if any) from a tile
+    def remove(self, cell):
+        bit = 1 << cell
+        if (self.dots | self.power_ups) & bit:
+            self.dots &= ~bit
+            self.power_ups &= ~bit
+            self.count -= 1
+
+    # Number of dots and power-ups left in rows top to bottom - 1, columns left to right - 1
+    def count_in(self, top, left, bottom, right):
+        key = (top, left, bottom, right)
+        mask = self.region_masks.get(key)
+        if mask is None:
+            row_mask = (1 << max(right - left, 0)) - 1
+            mask = 0
+            for row in range(max(top, 0), min(bottom, self.rows)):
+                mask |= row_mask << (row * self.cols + left)
+            self.region_masks[key] = mask
+        return ((self.dots | self.power_ups) & mask).bit_count()
+
+    # Number of dots and power-ups left in each quarter of the level - top left, top right, bottom left, bottom right
+    def quadrant_counts(self):
+        middle_row = self.rows // 2
+        middle_column = self.cols // 2
+        return (self.count_in(0, 0, middle_row, middle_column),
+                self.count_in(0, middle_column, middle_row, self.cols),
+                self.count_in(middle_row, 0, self.rows, middle_column),
+                self.count_in(middle_row, middle_column, self.rows, self.cols))
+
+    # Returns the (row, column) of the dot or power-up closest to row 'i', column 'j' by grid (Manhattan) distance, or
+    # None if the level is cleared. Each row is searched with a couple of bit operations, nearest rows first
+    def nearest(self, i, j, include_power_ups=True):
+        remaining = self.dots | self.power_ups if include_power_ups else self.dots
+        if not remaining:
+            return None
+        # tiles off the grid (the side hallways) search from the nearest column on it
+        j = min(max(j, 0), self.cols - 1)
+        row_mask = (1 << self.cols) - 1
+
+        best = None
+        best_distance = self.rows + self.cols
+        for offset in range(self.rows):
+            if offset >= best_distance:
+                break
+            for row in ((i - offset, i + offset) if offset else (i,)):
+                if not 0 <= row < self.rows:
+                    continue
+                bits = remaining >> (row * self.cols) & row_mask
+                if not bits:
+                    continue
+                # closest column at or left of j, then at or right of j
+                left = bits & ((2 << j) - 1)
+                if left:
+                    column = left.bit_length() - 1
+                    if offset + j - column < best_distance:
+                        best, best_distance = (row, column), offset + j - column
+                right = bits >> j
+                if right:
+                    column = j + (right & -right).bit_length() - 1
+                    if offset + column - j < best_distance:
+                        best, best_distance = (row, column), offset + column - j
+        return best
+
+
+# The layouts above as LevelGrids - levels are loaded with 'level_grids[level_id].copy()'
+level_grids = [LevelGrid(layout) for layout in level_layouts]
@@ -0,0 +1,286 @@
+import random
+import Levels
+import LevelPack
+
+# Procedural maze generator. Mazes come out in the tile encoding documented at the top of 'Levels.py' - as nested
+# lists like 'Levels.level_layouts', or straight as a 'Levels.LevelGrid'. Every maze is mirrored left to right and
+# fully connected, without dead ends, and has the ghost box (with its gate) in the middle, a pair of side tunnels,
+# and a power-up near each corner. At the default size of 30 x 33 the ghost box, spawn tiles and corners are where
+# the game expects them, so the mazes can be played (see 'LevelPack.write_pack' and 'generate_pack')
+#
+# The corridors are laid out on a lattice of corridor rows and columns at least MIN_GAP tiles apart, so every wall
+# is at least two tiles thick. A random spanning tree of the lattice (picked a mirrored pair of segments at a time)
+# keeps the maze connected, then a few more segments add loops, and the dead ends get one more segment each. The
+# walls are drawn by outlining the solid areas left between the corridors - worked out with bit operations on whole
+# boards at once rather than tile by tile, which is what makes generating thousands of mazes a second possible
+
+# Ghost box size (walls included), and the least/most tiles between two corridor rows or columns
+BOX_WIDTH = 8
+BOX_HEIGHT = 5
+MIN_GAP = 3
+MAX_GAP = 6
+
+# Chance of each lattice segment left out of the spanning tree being added back to make a loop
+LOOP_CHANCE = 0.3
+
+# Translation tables from the digits of a bitboard written out in binary to each tile value
+tile_digits = [bytes.maketrans(b"01", bytes([0, value])) for value in range(11)]
+
+
+class MazeGenerator:
+    """Generates random mazes of one size. Everything that only depends on the size (the fixed corridors, the
+    ghost box and the bit masks of the board) is worked out once, so batches of mazes are cheap. Mazes are drawn
+    from 'rng', a random.Random - the same seed always gives the same maze"""
+
+    def __init__(self, width=30, height=33):
+        if width % 2 or width < 24 or height < 25:
+            raise ValueError("mazes need an even width of at least 24 and a height of at least 25")
+        self.width = width
+        self.height = height
+        # ghost box in the middle, with a corridor all the way around it
+        self.box_top = height // 2 - 3
+        self.box_left = width // 2 - BOX_WIDTH // 2
+        self.box_bottom = self.box_top + BOX_HEIGHT - 1
+        self.box_right = self.box_left + BOX_WIDTH - 1
+        # pacman starts in the middle of the corridor row 6 tiles below the box
+        self.start_row = self.box_bottom + 7
+
+        # corridor rows/columns that are always there - around the edges, around the box, and through pacman's start
+        self.fixed_rows = sorted({2, self.box_top - 1, self.box_bottom + 1, self.start_row, height - 3})
+        # columns are picked on the left half and mirrored, and must stay MIN_GAP away from their own mirror image
+        self.last_column = width // 2 - 2
+        self.fixed_columns = [2, self.box_left - 1]
+        for low, high in zip(self.fixed_rows, self.fixed_rows[1:]):
+            if high - low < MIN_GAP:
+                raise ValueError(f"a height of {height} leaves no room between the fixed corridors")
+
+        # bitboards - bit (row + 1) * stride + column + 1 is the tile at row, column, with a border of open tiles
+        # around the board so shifting a board by one row/column never wraps onto the other side
+        self.stride = width + 2
+        self.row_mask = (1 << width) - 1
+        self.inside = 0
+        for row in range(height):
+            self.inside |= self.row_mask << self.bit(row, 0)
+        self.board_bits = (height + 2) * self.stride
+        self.board_format = f"0{self.board_bits}b"
+
+        self.box_inside = 0
+        for row in range(self.box_top + 1, self.box_bottom):
+            self.box_inside |= ((1 << (BOX_WIDTH - 2)) - 1) << self.bit(row, self.box_left + 1)
+        self.gate = 0b11 << self.bit(self.box_top, self.box_left + 3)
+
+        # (column, row) spawn tiles of pacman, blinky, inky, pinky and clyde - the same as LevelPack.DEFAULT_SPAWNS
+        # at the default size
+        middle_row = self.box_top + 2
+        self.spawns = ((width // 2, self.start_row), (width // 2 - 1, self.box_top - 1),
+                       (self.box_left + 1, middle_row), (self.box_left + 3, middle_row),
+                       (self.box_left + 5, middle_row))
+
+    # bit of the tile at 'row', 'column' on a bitboard
+    def bit(self, row, column):
+        return (row + 1) * self.stride + column + 1
+
+    # Returns a random maze as a LevelGrid
+    def grid(self, rng):
+        rows = self.corridor_lines(self.fixed_rows, rng)
+        left_columns = self.corridor_lines(self.fixed_columns, rng)
+        if left_columns[-1] + MIN_GAP <= self.last_column and rng.random() < 0.5:
+            left_columns.append(rng.randint(left_columns[-1] + MIN_GAP, self.last_column))
+        columns = left_columns + [self.width - 1 - column for column in reversed(left_columns)]
+
+        open_tiles, no_dots = self.carve(rows, columns, rng)
+        return self.encode(open_tiles, no_dots, rows)
+
+    # Returns a random maze as a list of rows of tile values, the same as a layout in 'Levels.level_layouts'
+    def layout(self, rng):
+        cells = self.grid(rng).template
+        return [list(cells[row * self.width:(row + 1) * self.width]) for row in range(self.height)]
+
+    # Fills in random corridor lines between the 'fixed' ones, every gap between MIN_GAP and MAX_GAP tiles
+    def corridor_lines(self, fixed, rng):
+        lines = [fixed[0]]
+        for end in fixed[1:]:
+            while end - lines[-1] > MAX_GAP:
+                lines.append(lines[-1] + rng.randint(MIN_GAP, min(MAX_GAP, end - lines[-1] - MIN_GAP)))
+            lines.append(end)
+        return lines
+
+    # True if the tile at 'row', 'column' is part of the ghost box
+    def in_box(self, row, column):
+        return self.box_top <= row <= self.box_bottom and self.box_left <= column <= self.box_right
+
+    # Picks which segments of the corridor lattice become corridors. Returns the bitboards of the open tiles and of
+    # the open tiles that get no dots (the corridor around the ghost box and the tunnels)
+    def carve(self, rows, columns, rng):
+        width = self.width
+        # segments between neighboring lattice points that don't cut through the ghost box, as
+        # (row, column, row, column), grouped with their mirror image
+        pairs = dict()
+        for row in rows:
+            for left, right in zip(columns, columns[1:]):
+                if self.in_box(row, left) or self.in_box(row, right) or (
+                        self.box_top <= row <= self.box_bottom and left < self.box_left and right > self.box_right):
+                    continue
+                segment = (row, left, row, right)
+                mirror = (row, width - 1 - right, row, width - 1 - left)
+                pairs.setdefault(min(segment, mirror), set()).update((segment, mirror))
+        for column in columns:
+            for top, bottom in zip(rows, rows[1:]):
+                if self.in_box(top, column) or self.in_box(bottom, column) or (
+                        self.box_left <= column <= self.box_right and top < self.box_top and bottom > self.box_bottom):
+                    continue
+                segment = (top, column, bottom, column)
+                mirror = (top, width - 1 - column, bottom, width - 1 - column)
+                pairs.setdefault(min(segment, mirror), set()).update((segment, mirror))
+        pairs = [tuple(sorted(pair)) for _, pair in sorted(pairs.items())]
+
+        # the corridor around the ghost box, and the middle of pacman's starting row, are always there
+        ring_rows = (self.box_top - 1, self.box_bottom + 1)
+        ring_columns = (self.box_left - 1, self.box_right + 1)
+        middle = width // 2
+
+        def required(pair):
+            row, left, bottom, right = pair[0]
+            if row == bottom:
+                return ((row in ring_rows and ring_columns[0] <= left and right <= ring_columns[1]) or
+                        (row == self.start_row and left < middle <= right))
+            return left in ring_columns and ring_rows[0] <= row and bottom <= ring_rows[1]
+
+        fixed = [pair for pair in pairs if required(pair)]
+        optional = [pair for pair in pairs if not required(pair)]
+        rng.shuffle(optional)
+
+        # random spanning tree over the lattice points (union-find), then the loops
+        parent = dict()
+
+        def find(point):
+            parent.setdefault(point, point)
+            while parent[point] != point:
+                parent[point] = parent[parent[point]]
+                point = parent[point]
+            return point
+
+        chosen = []
+        skipped = []
+        for pair in fixed + optional:
+            joins = False
+            for row, column, end_row, end_column in pair:
+                start, end = find((row, column)), find((end_row, end_column))
+                if start != end:
+                    parent[start] = end
+                    joins = True
+            if joins or pair in fixed:
+                chosen.append(pair)
+            else:
+                skipped.append(pair)
+        for pair in list(skipped):
+            if rng.random() < LOOP_CHANCE:
+                chosen.append(pair)
+                skipped.remove(pair)
+
+        # no dead ends - a lattice point with a single corridor gets another one, if it has one to give
+        degree = dict()
+        for pair in chosen:
+            for row, column, end_row, end_column in pair:
+                degree[(row, column)] = degree.get((row, column), 0) + 1
+                degree[(end_row, end_column)] = degree.get((end_row, end_column), 0) + 1
+        for point in sorted(degree):
+            if degree[point] != 1:
+                continue
+            options = [pair for pair in skipped if any(point in ((segment[0], segment[1]), (segment[2], segment[3]))
+                                                       for segment in pair)]
+            if options:
+                pair = rng.choice(options)
+                skipped.remove(pair)
+                chosen.append(pair)
+                for row, column, end_row, end_column in pair:
+                    degree[(row, column)] = degree.get((row, column), 0) + 1
+                    degree[(end_row, end_column)] = degree.get((end_row, end_column), 0) + 1
+
+        open_tiles = 0
+        for pair in chosen:
+            for row, column, end_row, end_column in pair:
+                if row == end_row:
+                    open_tiles |= ((1 << (end_column - column + 1)) - 1) << self.bit(row, column)
+                else:
+                    for tile_row in range(row, end_row + 1):
+                        open_tiles |= 1 << self.bit(tile_row, column)
+
+        no_dots = 0
+        for row in ring_rows:
+            no_dots |= ((1 << (BOX_WIDTH + 2)) - 1) << self.bit(row, ring_columns[0])
+        for row in range(ring_rows[0], ring_rows[1] + 1):
+            no_dots |= 1 << self.bit(row, ring_columns[0]) | 1 << self.bit(row, ring_columns[1])
+
+        # side tunnels through the outer walls, on one of the corridor rows that reaches the edge
+        tunnel_row = rng.choice(rows[1:-1])
+        tunnels = 0b11 << self.bit(tunnel_row, 0) | 0b11 << self.bit(tunnel_row, width - 2)
+        return open_tiles | tunnels, (no_dots | tunnels) & (open_tiles | tunnels)
+
+    # Turns the bitboards of the open tiles into a LevelGrid - walls outline the solid areas, with the ghost box,
+    # dots and power-ups filled in
+    def encode(self, open_tiles, no_dots, rows):
+        stride = self.stride
+        solid = self.inside & ~open_tiles
+        # solid neighbors of each tile - off the board counts as open
+        up, down = solid << stride, solid >> stride
+        left, right = solid << 1, solid >> 1
+
+        open_up, open_down = solid & ~up, solid & ~down
+        open_left, open_right = solid & ~left, solid & ~right
+        # straight walls and the outside corners of the solid areas
+        horizontal = (open_up | open_down) & ~open_left & ~open_right
+        vertical = (open_left | open_right) & ~open_up & ~open_down
+        top_left = open_up & open_left
+        top_right = open_up & open_right
+        bottom_left = open_down & open_left
+        bottom_right = open_down & open_right
+        # inside corners - tiles with only a diagonal neighbor open
+        enclosed = solid & ~(open_up | open_down | open_left | open_right)
+        top_left |= enclosed & ~(solid >> (stride + 1))
+        top_right |= enclosed & ~(solid >> (stride - 1))
+        bottom_left |= enclosed & ~(solid << (stride - 1))
+        bottom_right |= enclosed & ~(solid << (stride + 1))
+        unreachable = enclosed & (solid << (stride + 1)) & (solid << (stride - 1)) & (solid >> (stride - 1)) & (
+            solid >> (stride + 1))
+
+        # the ghost box is carved out of a solid block, so its outline is already its wall
+        unreachable &= ~self.box_inside
+        horizontal &= ~self.gate
+
+        # power-ups at the second corridor row from the top and bottom, next to the outer walls
+        power_ups = 0
+        for row in (rows[1], rows[-2]):
+            power_ups |= 1 << self.bit(row, 2) | 1 << self.bit(row, self.width - 3)
+        power_ups &= open_tiles
+        dots = open_tiles & ~no_dots & ~power_ups
+
+        # each board written out in binary (last tile first) is one digit per tile, which translates to one byte
+        # per tile - the boards don't overlap, so the bytes can be combined as big integers
+        tiles = 0
+        for value, board in ((1, dots), (2, power_ups), (3, self.gate), (4, vertical), (5, horizontal),
+                             (6, top_right), (7, top_left), (8, bottom_left), (9, bottom_right), (10, unreachable)):
+            digits = format(board, self.board_format).encode().translate(tile_digits[value])
+            tiles |= int.from_bytes(digits, "big")
+        cells = tiles.to_bytes(self.board_bits, "little")
+        return Levels.LevelGrid(b"".join([cells[self.bit(row, 0):self.bit(row, 0) + self.width]
+                                          for row in range(self.height)]), self.width)
+
+
+# Returns 'count' random mazes as layouts (lists of rows, as in 'Levels.level_layouts'), the same every time for the
+# same 'seed'
+def generate_layouts(count, seed=None, width=30, height=33):
+    generator = MazeGenerator(width, height)
+    rng = random.Random(seed)
+    return [generator.layout(rng) for _ in range(count)]
+
+
+# Writes 'count' random mazes to a level pack (see 'LevelPack.py'), colored in turn with the colors of the built-in
+# levels. The pack can be played by passing 'LevelPack.LevelPack(path)' to 'GameLogic.GameSettings'. The mazes'
+# routing tables are left out unless 'routing_tables' is set - they are the bulk of a pack's size and writing time,
+# and the game builds a level's table when it is played if its pathfinding mode needs one
+def generate_pack(path, count, seed=None, routing_tables=False):
+    generator = MazeGenerator()
+    layouts = generate_layouts(count, seed)
+    colors = [Levels.level_colors[level_id % len(Levels.level_colors)] for level_id in range(count)]
+    LevelPack.write_pack(path, layouts, colors, [generator.spawns] * count, routing_tables)
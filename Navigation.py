@@ -0,0 +1,409 @@
+import math
+from array import array
+from collections import deque
+from heapq import heapify, heappop, heappush
+import Levels
+
+# Precomputed navigation data for the ghosts. Everything here is derived from a level layout once, when the level is
+# loaded, so the ghosts can look routes up instead of searching the maze every time they reach a tile center.
+# Dots being eaten (1 or 2 -> 0) never changes which tiles are traversable, so the data stays valid for the whole level
+
+# Marks a missing entry in the distance and next-hop tables (no route between the two tiles)
+UNREACHABLE = 0xFFFF
+NO_ROUTE = 255
+
+
+class NavGraph:
+    """Graph of the tiles the ghosts can move between on a single level. Tiles are identified by a flat index,
+    'x * rows + y', so ordering tiles by index is the same as ordering them by their (x, y) tuples. 'neighbors' holds
+    the adjacent traversable tiles for every tile in the order right, left, up, down, and tiles in the side hallways
+    (x < 1 or x > cols - 2) have no neighbors, so routes never run through the hallways. Also holds the A* heuristic
+    tables: 'euclidean' (heuristic one, rounded distance formula) and 'manhattan' (heuristic two), both indexed by
+    'heuristic_key[goal] - heuristic_key[tile] + heuristic_center'"""
+
+    def __init__(self, level, adjacency=None):
+        self.rows = level.rows
+        self.cols = level.cols
+        self.size = self.rows * self.cols
+        # flat index offsets for each direction = [right, left, up, down]
+        self.offsets = (self.rows, -self.rows, -1, 1)
+
+        # the ghosts can walk through everything but walls (empty space, dots and the ghost gate)
+        self.walkable = bytearray(self.size)
+        for cell, value in enumerate(level.template):
+            if not Levels.tile_flags[value] & Levels.WALL:
+                self.walkable[cell % self.cols * self.rows + cell // self.cols] = 1
+
+        self.neighbors = [() for _ in range(self.size)]
+        if adjacency is None:
+            for x in range(1, self.cols - 1):
+                for y in range(1, self.rows - 1):
+                    index = x * self.rows + y
+                    self.neighbors[index] = tuple(index + offset for offset in self.offsets
+                                                  if self.walkable[index + offset])
+        else:
+            # precomputed (see 'adjacency_bits') - bit d of each tile is set if its neighbor in direction d is walkable
+            for index, bits in enumerate(adjacency):
+                if bits:
+                    self.neighbors[index] = tuple(index + offset for direction, offset in enumerate(self.offsets)
+                                                  if bits >> direction & 1)
+
+        # tiles that can be routed between, and the position of each one in that list (-1 for the rest)
+        self.nodes = [index for index in range(self.size) if self.walkable[index]]
+        self.node_id = [-1] * self.size
+        for node, index in enumerate(self.nodes):
+            self.node_id[index] = node
+
+        # the reverse of 'neighbors' - distances to a goal are searched backwards from it
+        self.leads_into = [[] for _ in range(self.size)]
+        for index in self.nodes:
+            for neighbor in self.neighbors[index]:
+                self.leads_into[neighbor].append(index)
+
+        # heuristic tables - 'heuristic_key' spaces tiles out so the difference of two keys is unique for every
+        # (dx, dy) offset between them, which lets the heuristic be read straight out of a table without abs()/sqrt()
+        stride = 2 * self.rows
+        self.heuristic_key = [x * stride + y for x in range(self.cols) for y in range(self.rows)]
+        self.heuristic_center = (self.cols - 1) * stride + (self.rows - 1)
+        self.euclidean = [0] * ((2 * self.cols - 1) * stride)
+        self.manhattan = [0] * ((2 * self.cols - 1) * stride)
+        for dx in range(1 - self.cols, self.cols):
+            for dy in range(1 - self.rows, self.rows):
+                key = dx * stride + dy + self.heuristic_center
+                self.euclidean[key] = math.sqrt(dx ** 2 + dy ** 2).__round__()
+                self.manhattan[key] = abs(dx) + abs(dy)
+
+    # converts an (x, y) tile to its flat index, None if it is off the grid
+    def index(self, tile):
+        if 0 <= tile[0] < self.cols and 0 <= tile[1] < self.rows:
+            return tile[0] * self.rows + tile[1]
+        return None
+
+    # converts a flat index back to its (x, y) tile
+    def tile(self, index):
+        return divmod(index, self.rows)
+
+    # 'neighbors' packed into one byte per tile, in the form the constructor accepts as 'adjacency'
+    def adjacency_bits(self):
+        bits = bytearray(self.size)
+        for index, neighbors in enumerate(self.neighbors):
+            for neighbor in neighbors:
+                bits[index] |= 1 << self.offsets.index(neighbor - index)
+        return bits
+
+    # Finds a path from 'start' to 'goal' (flat indices) with the A* algorithm, using heuristic one (distance formula)
+    # or heuristic two (Manhattan distance). Returns the list of flat indices after 'start' up to and including 'goal',
+    # or None if the goal can't be reached. Ties in the frontier are broken by tile index, the same order the
+    # original (x, y) tuple based search used, so both return the same paths. If 'stats' (a list of two) is given, it
+    # is filled with the number of tiles the search expanded and the largest the frontier got
+    def a_star(self, start, goal, use_heuristic_one, stats=None):
+        heuristic = self.euclidean if use_heuristic_one else self.manhattan
+        keys = self.heuristic_key
+        goal_key = keys[goal] + self.heuristic_center
+        neighbors = self.neighbors
+
+        cost_so_far = [-1] * self.size
+        came_from = [-1] * self.size
+        closed = bytearray(self.size)
+        cost_so_far[start] = 0
+        frontier = [(0, start)]
+        peak = 1
+
+        while frontier:
+            current = heappop(frontier)[1]
+            if current == goal:
+                break
+            # tiles are pushed again when a cheaper way to them is found, skip the outdated entries
+            if closed[current]:
+                continue
+            closed[current] = 1
+
+            new_cost = cost_so_far[current] + 1
+            for next_tile in neighbors[current]:
+                old_cost = cost_so_far[next_tile]
+                if old_cost < 0 or new_cost < old_cost:
+                    cost_so_far[next_tile] = new_cost
+                    heappush(frontier, (new_cost + heuristic[goal_key - keys[next_tile]], next_tile))
+                    came_from[next_tile] = current
+            if len(frontier) > peak:
+                peak = len(frontier)
+
+        if stats is not None:
+            # the goal is taken off the frontier but the search stops before closing it
+            stats[0] = closed.count(1) + (cost_so_far[goal] >= 0)
+            stats[1] = peak
+        if cost_so_far[goal] < 0:
+            return None
+
+        current = goal
+        path = []
+        while current != start:
+            path.append(current)
+            current = came_from[current]
+        path.reverse()
+        return path
+
+
+# Fills 'distance[base + tile]' with the number of steps from every tile to 'goal' using a breadth first search
+# backwards from the goal. Tiles that can't reach the goal are left as they were (UNREACHABLE)
+def breadth_first_distances(nav, goal, distance, base=0):
+    leads_into = nav.leads_into
+    distance[base + goal] = 0
+    frontier = deque([goal])
+    while frontier:
+        current = frontier.popleft()
+        step = distance[base + current] + 1
+        for previous in leads_into[current]:
+            if distance[base + previous] == UNREACHABLE:
+                distance[base + previous] = step
+                frontier.append(previous)
+
+
+# Returns the first neighbor (right, left, up, down) of 'index' that is one step closer to the goal of the distances
+# stored at 'distance[base + tile]', None if the tile is the goal or can't reach it
+def downhill_neighbor(nav, index, distance, base=0):
+    remaining = distance[base + index]
+    if remaining == UNREACHABLE or remaining == 0:
+        return None
+    for neighbor in nav.neighbors[index]:
+        if distance[base + neighbor] == remaining - 1:
+            return neighbor
+    return None
+
+
+class FlowField:
+    """Breadth first distance map from every tile of a level to a single goal tile. Any number of ghosts heading for
+    the same goal can share one field, and each of them finds its next tile by stepping 'downhill' to the neighbor
+    that is one step closer to the goal, which only looks at the (at most four) neighbors of its current tile"""
+
+    def __init__(self, nav, goal):
+        self.nav = nav
+        self.goal = goal
+        self.distance = array("H", [UNREACHABLE]) * nav.size
+        breadth_first_distances(nav, goal, self.distance)
+
+    # flat index of the next tile on a shortest path from 'index' to the goal, None if already there or unreachable
+    def get_next_tile(self, index):
+        return downhill_neighbor(self.nav, index, self.distance)
+
+
+class RoutingTable:
+    """All-pairs distance and next-hop tables for a level's NavGraph. Only walkable tiles have entries, so both are
+    flat arrays indexed by 'node_id[goal] * len(nodes) + node_id[tile]'. 'distance' is the number of steps from the
+    tile to the goal (UNREACHABLE if there is no path), and 'next_hop' is the direction (0-3 = right, left, up, down)
+    of the first step of a shortest path from the tile to the goal (NO_ROUTE if there is no path or the tile is the
+    goal). Built with one breadth first search per goal tile, unless the tables are passed in already built (read
+    from a level pack, see 'LevelPack.py')"""
+
+    def __init__(self, nav, distance=None, next_hop=None):
+        self.nav = nav
+        count = len(nav.nodes)
+        if distance is not None:
+            self.distance = distance
+            self.next_hop = next_hop
+            return
+
+        self.distance = array("H", [UNREACHABLE]) * (count * count)
+        self.next_hop = bytearray([NO_ROUTE]) * (count * count)
+        blank = array("H", [UNREACHABLE]) * nav.size
+        for goal in nav.nodes:
+            base = nav.node_id[goal] * count
+            goal_distance = array("H", blank)
+            breadth_first_distances(nav, goal, goal_distance)
+            for node, index in enumerate(nav.nodes):
+                self.distance[base + node] = goal_distance[index]
+                neighbor = downhill_neighbor(nav, index, goal_distance)
+                if neighbor is not None:
+                    self.next_hop[base + node] = nav.offsets.index(neighbor - index)
+
+    # steps from 'start' to 'goal' (flat indices), UNREACHABLE if there is no path
+    def get_distance(self, start, goal):
+        node_id = self.nav.node_id
+        if node_id[start] < 0 or node_id[goal] < 0:
+            return UNREACHABLE
+        return self.distance[node_id[goal] * len(self.nav.nodes) + node_id[start]]
+
+    # flat index of the next tile on a shortest path from 'start' to 'goal', None if already there or unreachable
+    def get_next_tile(self, start, goal):
+        node_id = self.nav.node_id
+        if node_id[start] < 0 or node_id[goal] < 0:
+            return None
+        direction = self.next_hop[node_id[goal] * len(self.nav.nodes) + node_id[start]]
+        if direction == NO_ROUTE:
+            return None
+        return start + self.nav.offsets[direction]
+
+
+# How far (in tiles, Manhattan distance) the goal of an IncrementalPlanner can move between searches and still have
+# the old search repaired, anything further (such as pacman wrapping through a side hallway) starts a new search
+REPAIR_DISTANCE = 8
+
+
+class IncrementalPlanner:
+    """A* search for a single ghost that keeps its search tree between searches instead of starting from scratch.
+    Distances in the tree are measured from the tile the search started at (the root), so they stay correct when
+    the goal moves - the frontier is re-sorted for the new goal and the search carries on from where it stopped,
+    which often finds the new goal already expanded. When the ghost moves on to the next tile of its path, the
+    branch of the tree under that tile is kept (its distances just shrink by one) and the rest is thrown away.
+    Big jumps - a new start that isn't next to the old one, a goal that moved more than REPAIR_DISTANCE tiles (pacman
+    using a side hallway, the ghosts switching to fleeing) - start a new search. Paths are always shortest paths.
+    'expansions' counts the tiles expanded over the planner's lifetime, and 'frontier_peak' is the largest the frontier
+    got during the last search"""
+
+    def __init__(self, nav, use_heuristic_one):
+        self.nav = nav
+        self.use_heuristic_one = use_heuristic_one
+        self.heuristic = nav.euclidean if use_heuristic_one else nav.manhattan
+        self.root = None
+        self.goal = None
+        self.expansions = 0
+        self.frontier_peak = 0
+        self.cost_so_far = []
+        self.came_from = []
+        self.closed = bytearray()
+        # expanded tiles in the order they were expanded - a tile is always expanded after the tile it came from
+        self.expanded = []
+        # tiles reached but not expanded yet, and the priority queue they are sorted in for the current goal.
+        # Ties are broken towards the tile furthest from the root, which keeps repairs from spreading out sideways
+        self.open = set()
+        self.frontier = []
+
+    # Returns the list of flat indices after 'start' up to and including 'goal' on a shortest path between them,
+    # or None if the goal can't be reached. 'stats' is filled the same as for 'NavGraph.a_star' - with the tiles this
+    # search expanded (not counting those kept from earlier searches) and the largest the frontier got
+    def find_path(self, start, goal, stats=None):
+        expansions = self.expansions
+        if start != self.root:
+            if self.root is not None and self.closed[start] and start in self.nav.neighbors[self.root]:
+                self.move_root(start)
+            else:
+                self.restart(start)
+        if goal != self.goal:
+            if self.goal is not None and self.tiles_apart(goal, self.goal) <= REPAIR_DISTANCE:
+                self.goal = goal
+                self.sort_frontier()
+            else:
+                self.goal = goal
+                self.restart(start)
+
+        self.frontier_peak = len(self.frontier)
+        if not self.closed[goal]:
+            self.search()
+        if stats is not None:
+            stats[0] = self.expansions - expansions
+            stats[1] = self.frontier_peak
+        if self.cost_so_far[goal] < 0:
+            return None
+
+        current = goal
+        path = []
+        while current != start:
+            path.append(current)
+            current = self.came_from[current]
+        path.reverse()
+        return path
+
+    # Manhattan distance between two flat indices
+    def tiles_apart(self, a, b):
+        a_x, a_y = divmod(a, self.nav.rows)
+        b_x, b_y = divmod(b, self.nav.rows)
+        return abs(a_x - b_x) + abs(a_y - b_y)
+
+    # Throws the search tree away and starts a new one from 'start'
+    def restart(self, start):
+        size = self.nav.size
+        self.root = start
+        self.cost_so_far = [-1] * size
+        self.came_from = [-1] * size
+        self.closed = bytearray(size)
+        self.expanded = []
+        self.cost_so_far[start] = 0
+        self.open = {start}
+        self.sort_frontier()
+
+    # Re-roots the search tree at 'start', a child of the old root. Every expanded tile below 'start' keeps its path,
+    # one step shorter, and the tiles next to them become the new frontier
+    def move_root(self, start):
+        size = self.nav.size
+        cost_so_far = self.cost_so_far
+        came_from = self.came_from
+        offset = cost_so_far[start]
+
+        new_cost = [-1] * size
+        new_came_from = [-1] * size
+        new_closed = bytearray(size)
+        kept = []
+        for index in self.expanded:
+            if index == start or (index != self.root and new_closed[came_from[index]]):
+                new_closed[index] = 1
+                new_cost[index] = cost_so_far[index] - offset
+                new_came_from[index] = came_from[index]
+                kept.append(index)
+        new_came_from[start] = -1
+
+        self.open = set()
+        for index in kept:
+            step = new_cost[index] + 1
+            for neighbor in self.nav.neighbors[index]:
+                if not new_closed[neighbor] and (new_cost[neighbor] < 0 or step < new_cost[neighbor]):
+                    new_cost[neighbor] = step
+                    new_came_from[neighbor] = index
+                    self.open.add(neighbor)
+
+        self.root = start
+        self.cost_so_far = new_cost
+        self.came_from = new_came_from
+        self.closed = new_closed
+        self.expanded = kept
+        self.sort_frontier()
+
+    # Rebuilds the priority queue of the frontier for the current goal
+    def sort_frontier(self):
+        if self.goal is None:
+            self.frontier = []
+            return
+        heuristic = self.heuristic
+        keys = self.nav.heuristic_key
+        goal_key = keys[self.goal] + self.nav.heuristic_center
+        cost_so_far = self.cost_so_far
+        self.frontier = [(cost_so_far[index] + heuristic[goal_key - keys[index]], -cost_so_far[index], index)
+                         for index in self.open]
+        heapify(self.frontier)
+
+    # Carries on the A* search until the goal is expanded or there is nothing left to expand
+    def search(self):
+        heuristic = self.heuristic
+        keys = self.nav.heuristic_key
+        goal_key = keys[self.goal] + self.nav.heuristic_center
+        neighbors = self.nav.neighbors
+        cost_so_far = self.cost_so_far
+        came_from = self.came_from
+        closed = self.closed
+        frontier = self.frontier
+        goal = self.goal
+
+        while frontier:
+            current = heappop(frontier)[2]
+            if closed[current]:
+                continue
+            closed[current] = 1
+            self.open.discard(current)
+            self.expanded.append(current)
+            self.expansions += 1
+
+            # the goal's neighbors are still added to the frontier, so the tree stays usable if the goal moves
+            new_cost = cost_so_far[current] + 1
+            for next_tile in neighbors[current]:
+                if closed[next_tile]:
+                    continue
+                old_cost = cost_so_far[next_tile]
+                if old_cost < 0 or new_cost < old_cost:
+                    cost_so_far[next_tile] = new_cost
+                    came_from[next_tile] = current
+                    self.open.add(next_tile)
+                    heappush(frontier, (new_cost + heuristic[goal_key - keys[next_tile]], -new_cost, next_tile))
+            if len(frontier) > self.frontier_peak:
+                self.frontier_peak = len(frontier)
+
+            if current == goal:
+                break
@@ -0,0 +1,159 @@
+import random
+import numpy as np
+import GameLogic
+import LevelPack
+import Levels
+
+# The game as a programmatic environment, in the style of a Gym environment - 'reset' starts a game and 'step' plays
+# an action and returns what happened, without any rendering or audio. Needs NumPy.
+#
+#   env = PacmanEnv(frame_skip=4)
+#   observation, info = env.reset(seed=0)
+#   while True:
+#       observation, reward, terminated, truncated, info = env.step(action)
+#       if terminated or truncated:
+#           break
+
+# Channels of the tile observation - walls and the ghost gate don't change during a level, the dots and power-ups
+# are cleared as they are eaten, and each entity marks the tile its center is on (if it is on the grid)
+WALL_CHANNEL, GATE_CHANNEL, DOT_CHANNEL, POWER_UP_CHANNEL = range(4)
+PACMAN_CHANNEL, BLINKY_CHANNEL, INKY_CHANNEL, PINKY_CHANNEL, CLYDE_CHANNEL = range(4, 9)
+CHANNELS = 9
+
+# Actions are the direction pacman is told to go - right, left, up, down (his 'direction_command')
+ACTION_COUNT = 4
+
+# Entries of the status observation
+POWER_UP, POWER_FRAMES_LEFT, LIVES = range(3)
+GHOST_DEAD = 3  # to 6, one for each ghost
+STATUS_SIZE = 7
+
+
+class PacmanEnv:
+    """A headless game of pacman behind a reset / step interface. Every 'step' plays one action for 'frame_skip'
+    ticks and returns the observation, the reward (how much the score went up), whether the game is over
+    (terminated) or was cut off after 'max_frames' ticks (truncated), and an info dict. Games start on 'level_id',
+    or on a random level picked with the seed passed to 'reset' if it is None, and carry on to the next level when
+    one is cleared. Levels come from 'level_pack' (the pack of the built-in levels by default, which has the routing
+    tables already built), and the ghosts use the 'pathfinding' mode of GameSettings (the game's default if None).
+
+    The observation is a dict of arrays that are allocated once and updated in place - 'tiles' (CHANNELS x rows x
+    cols of 0/1, see the *_CHANNEL constants), 'entities' (the center pixel (x, y) of pacman, blinky, inky, pinky and
+    clyde) and 'status' (see POWER_UP, POWER_FRAMES_LEFT, LIVES and GHOST_DEAD). The same arrays (and info dict) are
+    returned by every call, so copy them to keep an observation past the next step"""
+
+    def __init__(self, frame_skip=4, level_id=0, level_pack=None, pathfinding=None, max_frames=None,
+                 skip_intro=True):
+        self.frame_skip = frame_skip
+        self.level_id = level_id
+        self.level_pack = level_pack if level_pack is not None else LevelPack.load_cached_pack()
+        self.pathfinding = pathfinding
+        self.max_frames = max_frames
+        # the start-up pause before each life is skipped - nothing moves during it
+        self.skip_intro = skip_intro
+        self.rng = random.Random()
+        self.game = None
+        self.frames = 0
+        self.score = 0
+
+        level = self.level_pack.level(0).grid
+        self.rows, self.cols = level.rows, level.cols
+        self.tiles = np.zeros((CHANNELS, self.rows, self.cols), np.uint8)
+        self.entities = np.zeros((5, 2), np.int32)
+        self.status = np.zeros(STATUS_SIZE, np.int32)
+        self.observation = {"tiles": self.tiles, "entities": self.entities, "status": self.status}
+        self.info = {"score": 0, "level_id": 0, "frames": 0, "levels_cleared": 0, "caught_by": None}
+        # the level the tile channels were last filled from, and the tile each entity was last marked on
+        self.level = None
+        self.marked = [None] * 5
+        # flags of every tile value, and a buffer for the flags of the current level's tiles
+        self.flag_table = np.frombuffer(Levels.tile_flags, np.uint8)
+        self.flags = np.zeros(self.rows * self.cols, np.uint8)
+
+    # Starts a new game and returns (observation, info). 'seed' seeds the choice of level when the environment
+    # doesn't start on a fixed one
+    def reset(self, seed=None):
+        if seed is not None:
+            self.rng.seed(seed)
+        settings = GameLogic.GameSettings(self.level_pack)
+        if self.pathfinding is not None:
+            settings.ghost_pathfinding = self.pathfinding
+        level_id = self.level_id if self.level_id is not None else self.rng.randrange(len(self.level_pack))
+        if level_id:
+            settings.level_id = level_id
+            GameLogic.load_level(settings)
+        self.game = GameLogic.Game(settings)
+        self.frames = 0
+        self.score = 0
+        self.info["levels_cleared"] = 0
+        self.level = None
+        self.update_observation()
+        return self.observation, self.info
+
+    # Plays 'action' (0-3, right/left/up/down) for 'frame_skip' ticks, or until the game ends. Returns
+    # (observation, reward, terminated, truncated, info)
+    def step(self, action):
+        game = self.game
+        settings = game.settings
+        caught_by = None
+        for _ in range(self.frame_skip):
+            if self.skip_intro and settings.state == GameLogic.STARTING:
+                settings.startup_counter = settings.fps * 5
+            # a cleared level goes straight on to the next one, as if enter was pressed
+            game.step(action, enter=settings.game_won)
+            self.frames += 1
+            self.info["levels_cleared"] += settings.game_won
+            caught_by = settings.caught_by or caught_by
+            # the eaten dots are only listed until the next tick
+            if settings.level is self.level:
+                for i, j in settings.cleared_cells:
+                    self.tiles[DOT_CHANNEL, i, j] = 0
+                    self.tiles[POWER_UP_CHANNEL, i, j] = 0
+            if settings.game_lost or self.frames == self.max_frames:
+                break
+
+        reward = settings.score - self.score
+        self.score = settings.score
+        self.info["caught_by"] = caught_by
+        self.update_observation()
+        return self.observation, reward, settings.game_lost, self.frames == self.max_frames, self.info
+
+    # Brings the observation arrays and info up to date with the game
+    def update_observation(self):
+        player, blinky, inky, pinky, clyde, settings = self.game.entities()
+        if settings.level is not self.level:
+            self.fill_tiles(settings.level)
+
+        for index, (x, y) in enumerate(((player.center_x, player.center_y), (blinky.x_center, blinky.y_center),
+                                        (inky.x_center, inky.y_center), (pinky.x_center, pinky.y_center),
+                                        (clyde.x_center, clyde.y_center))):
+            self.entities[index, 0] = x
+            self.entities[index, 1] = y
+            channel = PACMAN_CHANNEL + index
+            if self.marked[index] is not None:
+                self.tiles[channel, self.marked[index][0], self.marked[index][1]] = 0
+                self.marked[index] = None
+            if 0 <= x // 25 < self.cols and 0 <= y // 25 < self.rows:
+                self.tiles[channel, y // 25, x // 25] = 1
+                self.marked[index] = (y // 25, x // 25)
+
+        self.status[POWER_UP] = settings.power_up
+        power_frames = settings.fps * settings.power_up_duration - settings.power_counter
+        self.status[POWER_FRAMES_LEFT] = power_frames if settings.power_up else 0
+        self.status[LIVES] = player.lives
+        for index, ghost in enumerate((blinky, inky, pinky, clyde)):
+            self.status[GHOST_DEAD + index] = ghost.dead
+
+        self.info["score"] = settings.score
+        self.info["level_id"] = settings.level_id
+        self.info["frames"] = self.frames
+
+    # Fills the tile channels from a newly loaded level
+    def fill_tiles(self, level):
+        self.level = level
+        np.take(self.flag_table, np.frombuffer(level.cells, np.uint8), out=self.flags)
+        for channel, flag in ((WALL_CHANNEL, Levels.WALL), (GATE_CHANNEL, Levels.GHOST_GATE),
+                              (DOT_CHANNEL, Levels.DOT), (POWER_UP_CHANNEL, Levels.POWER_UP)):
+            np.not_equal(self.flags & flag, 0, out=self.tiles[channel].reshape(-1), casting="unsafe")
+        self.tiles[PACMAN_CHANNEL:] = 0
+        self.marked = [None] * 5
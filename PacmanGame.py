@@ -1,949 +1,655 @@
-import copy
-import math
-from queue import PriorityQueue
-import pygame
-import Levels
-
-
-class Pacman:
-    """Template for a pacman object (the player). Contains member variables for tracking position and state, and
-    functions for determining valid paths, and moving and drawing pacman on the screen"""
-
-    def __init__(self):
-        # 'actual' is the top-left corner of the cell pacman is considered to be (despite visual appearance)
-        self.actual_x = (750 // 30) * 15
-        self.actual_y = ((875 - 50) // 33) * 24
-        # pacman coordinate points (in pixels)
-        # Top left corner of where pacman is rendered (not necessarily the cell center of pacman is in)
-        self.visual_x = self.actual_x - 10
-        self.visual_y = self.actual_y - 10
-        # Center is the center-most point of pacman
-        self.center_x = self.actual_x + 13
-        self.center_y = self.actual_y + 13
-        # count of lives left
-        self.lives = 3
-        # direction variables, used to track which direction pacman is currently facing,
-        # valid directions that can be faced, and current direction being input by the user
-        # directions = [right, left, up, down]
-        #                0       1   2    3
-        self.direction = 0
-        self.valid_directions = [False, False, False, False]
-        self.direction_command = 0
-        # power up controls
-        self.eaten_ghosts = 0
-
-    # Displays the player/pacman, different rotation of image based on the direction moving
-    def draw(self, settings):
-        # direction = [right, left, up, down]
-        if self.direction == 0:
-            settings.screen.blit(player_images[(settings.counter % 20) // 5],
-                                 (self.visual_x, self.visual_y))
-        if self.direction == 1:
-            settings.screen.blit(pygame.transform.flip(player_images[(settings.counter % 20) // 5], True, False),
-                                 (self.visual_x, self.visual_y))
-        if self.direction == 2:
-            settings.screen.blit(pygame.transform.rotate(player_images[(settings.counter % 20) // 5], 90),
-                                 (self.visual_x, self.visual_y))
-        if self.direction == 3:
-            settings.screen.blit(pygame.transform.rotate(player_images[(settings.counter % 20) // 5], 270),
-                                 (self.visual_x, self.visual_y))
-
-    # updates which adjacent cells are currently valid for pacman to move to based on his location on the grid
-    def update_valid_directions(self, settings):
-        # directions = [right, left, up, down]
-        valid_directions = [False, False, False, False]
-        i = self.actual_y // 25
-        j = self.actual_x // 25
-
-        # if out of bounds, player can only move right and left
-        # otherwise check surrounding tiles to determine valid paths
-        if j < 1 or j > 28:
-            valid_directions[0] = True
-            valid_directions[1] = True
-        else:
-            # if grid square below current position isn't a wall and pacman is properly aligned - moving down is ok
-            if settings.level[i + 1][j] < 3 and self.actual_x % 25 == 0:
-                valid_directions[3] = True
-
-            # if grid above current position isn't a wall and pacman is properly aligned - moving up is ok
-            # else handles case where above cell is a wall, but pacman still has space in his own square to move closer
-            # or rather, there is a wall in the next cell up but pacman isn't touching the top of his current cell
-            if settings.level[i - 1][j] < 3 and self.actual_x % 25 == 0:
-                valid_directions[2] = True
-            else:
-                if self.direction == 2 and self.actual_y > (i * 25):
-                    valid_directions[2] = True
-
-            # if cell to the right of the current position isn't a wall and pacman is properly aligned,
-            # then moving right is ok
-            if settings.level[i][j + 1] < 3 and self.actual_y % 25 == 0:
-                valid_directions[0] = True
-
-            # if cell to the left of the current position isn't a wall and pacman is properly aligned,
-            # then moving left is ok
-            # else handles case where left cell is a wall, but pacman still has space in his own square to move close
-            if settings.level[i][j - 1] < 3 and self.actual_y % 25 == 0:
-                valid_directions[1] = True
-            else:
-                if self.direction == 1 and (self.actual_x > (j * 25)):
-                    valid_directions[1] = True
-
-        return valid_directions
-
-    # moves pacman if moving forward in the direction pacman is facing is valid (not a wall)
-    def move_player(self):
-        # direction = [right, left, up, down]
-        if self.direction == 0 and self.valid_directions[0]:
-            self.visual_x += 1
-            self.center_x += 1
-            self.actual_x += 1
-        elif self.direction == 1 and self.valid_directions[1]:
-            self.visual_x -= 1
-            self.center_x -= 1
-            self.actual_x -= 1
-        elif self.direction == 2 and self.valid_directions[2]:
-            self.visual_y -= 1
-            self.center_y -= 1
-            self.actual_y -= 1
-        elif self.direction == 3 and self.valid_directions[3]:
-            self.visual_y += 1
-            self.center_y += 1
-            self.actual_y += 1
-
-
-class Ghost:
-    """Template for a ghost object (blinky, inky, pinky, and clyde). Contains member variables for tracking position
-    and state, and functions for determining valid paths / pathfinding. It is intended for blinky, inky, and pinky to
-    use the A* algorithm with different heuristic options, while clyde has his own (suboptimal) greedy pathfinding
-    algorithm - Intention is to demonstrate the effectiveness/differences in different pathfinding algorithms
-    behavior"""
-
-    def __init__(self, x_visual, y_visual, x_actual, y_actual, x_center, y_center,
-                 target, speed, img, dead, been_eaten, settings):
-        self.x_visual = x_visual
-        self.y_visual = y_visual
-        self.x_actual = x_actual
-        self.y_actual = y_actual
-        self.x_center = x_center
-        self.y_center = y_center
-        self.target = target
-        self.speed = speed
-        self.img = img
-        self.dead = dead
-        self.been_eaten = been_eaten
-        self.valid_directions = [False, False, False, False]
-        self.path = None
-        self.settings = settings
-
-    def draw(self):
-        if (not self.settings.power_up and not self.dead) or (
-                self.been_eaten and self.settings.power_up and not self.dead):
-            self.settings.screen.blit(self.img, (self.x_visual, self.y_visual))
-        elif self.settings.power_up and not self.dead and not self.been_eaten:
-            self.settings.screen.blit(spooked_img, (self.x_visual, self.y_visual))
-        else:
-            self.settings.screen.blit(dead_img, (self.x_visual, self.y_visual))
-
-    # Calculates a list of path (x,y) values using A* algorithm. There is an option between two heuristics that can be
-    # used. 'use_heuristic_one' is a boolean to choose which to use.
-    def a_star_algorithm(self, use_heuristic_one):
-        start = (self.x_center // 25, self.y_center // 25)
-        goal = (self.target[0] // 25, self.target[1] // 25)
-        frontier = PriorityQueue()
-        frontier.put((0, start))
-        came_from = dict()
-        cost_so_far = dict()
-        came_from[start] = None
-        cost_so_far[start] = 0
-
-        while not frontier.empty():
-            current = frontier.get()
-            if current == goal:
-                break
-
-            for next_tile in self.find_neighbors(current):
-                new_cost = cost_so_far[(current[1])] + 1
-                if next_tile not in cost_so_far or new_cost < cost_so_far[next_tile]:
-                    cost_so_far[next_tile] = new_cost
-                    priority = new_cost + self.heuristic(goal, next_tile, use_heuristic_one)
-                    frontier.put((priority, next_tile))
-                    came_from[next_tile] = current[1]
-
-        current = goal
-        path = []
-        while current != start:
-            path.append(current)
-            current = came_from[current]
-        path.reverse()
-
-        self.path = path
-
-    # Returns result of one of two heuristics, first is distance formula from current position to target (diagonally)
-    # second is Manhattan distance - (vertical distance difference + horizontal distance difference)
-    def heuristic(self, a, b, use_heuristic_one):
-        if use_heuristic_one:
-            return math.sqrt((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2).__round__()
-        else:
-            return abs(a[0] - b[0]) + abs(a[1] - b[1])
-
-    # knowing the valid possible directions, creates a list of adjacent tiles that are traversable
-    def find_neighbors(self, current):
-        # directions = [right, left, up, down]
-        self.update_valid_directions_astar(current[1][0], current[1][1])
-        neighbors = []
-        for i, neighbor in enumerate(self.valid_directions):
-            if neighbor:
-                if i == 0:
-                    neighbors.append((current[1][0] + 1, current[1][1]))
-                elif i == 1:
-                    neighbors.append((current[1][0] - 1, current[1][1]))
-                elif i == 2:
-                    neighbors.append((current[1][0], current[1][1] - 1))
-                elif i == 3:
-                    neighbors.append((current[1][0], current[1][1] + 1))
-
-        return neighbors
-
-    # given a current tile, determines which adjacent tiles are valid/traversable
-    def update_valid_directions_astar(self, actual_x, actual_y):
-        # directions = [right, left, up, down]
-        valid_directions = [False, False, False, False]
-        i = actual_y
-        j = actual_x
-
-        if j < 1 or j > 28:
-            pass
-        else:
-            if self.settings.level[i + 1][j] < 4:
-                valid_directions[3] = True
-            if self.settings.level[i - 1][j] < 4:
-                valid_directions[2] = True
-            if self.settings.level[i][j + 1] < 4:
-                valid_directions[0] = True
-            if self.settings.level[i][j - 1] < 4:
-                valid_directions[1] = True
-
-        self.valid_directions = valid_directions
-
-    # Move ghosts position on board based on A* path
-    def a_star_move(self):
-        # direction = [right, left, up, down]
-        if len(self.path) == 0:
-            return
-        if self.path[0][0] * 25 + 13 > self.x_center:
-            self.x_visual += 1
-            self.x_center += 1
-            self.x_actual += 1
-        elif self.path[0][0] * 25 + 13 < self.x_center:
-            self.x_visual -= 1
-            self.x_center -= 1
-            self.x_actual -= 1
-        elif self.path[0][1] * 25 + 13 < self.y_center:
-            self.y_visual -= 1
-            self.y_center -= 1
-            self.y_actual -= 1
-        elif self.path[0][1] * 25 + 13 > self.y_center:
-            self.y_visual += 1
-            self.y_center += 1
-            self.y_actual += 1
-
-    def move_clyde(self):
-        if self.target[1] < self.y_center and self.valid_directions[2]:
-            self.y_center -= 1
-            self.y_visual -= 1
-            self.y_actual -= 1
-        elif self.target[0] > self.x_center and self.valid_directions[0]:
-            self.x_center += 1
-            self.x_visual += 1
-            self.x_actual += 1
-        elif self.target[0] < self.x_center and self.valid_directions[1]:
-            self.x_center -= 1
-            self.x_visual -= 1
-            self.x_actual -= 1
-        elif self.target[1] > self.y_center and self.valid_directions[3]:
-            self.y_center += 1
-            self.y_visual += 1
-            self.y_actual += 1
-
-    # determines valid directions similar to the player, only used for clyde
-    def update_valid_clyde_directions(self):
-        # directions = [right, left, up, down]
-        valid_directions = [False, False, False, False]
-        i = self.y_actual // 25
-        j = self.x_actual // 25
-
-        # if out of bounds, can only move right and left - otherwise check surrounding tiles to determine valid paths
-        if j < 1 or j > 28:
-            valid_directions[0] = True
-            valid_directions[1] = True
-        else:
-            # if grid square below current position isn't a wall and properly aligned - moving down is ok
-            if self.settings.level[i + 1][j] < 4 and (0 <= self.x_actual % 25 <= 0):
-                valid_directions[3] = True
-
-            # if grid above current position isn't a wall and properly aligned - moving up is ok
-            # else handles case where above cell is a wall, but there is space to move closer
-            if self.settings.level[i - 1][j] < 4 and (0 <= self.x_actual % 25 <= 0):
-                valid_directions[2] = True
-            else:
-                if self.y_actual > (i * 25):
-                    valid_directions[2] = True
-
-            # if cell to the right of the current position isn't a wall and properly aligned - moving right is ok
-            if self.settings.level[i][j + 1] < 4 and (0 <= self.y_actual % 25 <= 0):
-                valid_directions[0] = True
-
-            # if cell to the left of the current position isn't a wall and properly aligned - moving left is ok
-            # else handles case where left cell is a wall, but there is space to move closer
-            if self.settings.level[i][j - 1] < 4 and (0 <= self.y_actual % 25 <= 0):
-                valid_directions[1] = True
-            else:
-                if self.x_actual > (j * 25):
-                    valid_directions[1] = True
-
-            self.valid_directions = valid_directions
-
-
-class GameSettings:
-    """Wrapper class for misc config options and game settings"""
-
-    def __init__(self):
-        # Height and width of game window
-        self.width = 750
-        self.height = 875
-        # fps should be multiple of 20
-        self.fps = 60
-        # Pygame Settings
-        self.channel = pygame.mixer.find_channel()
-        self.screen = pygame.display.set_mode((self.width, self.height))
-        self.clock = pygame.time.Clock()
-        self.font = pygame.font.Font("freesansbold.ttf", 20)
-        # Level / Board settings
-        self.level_id = 0
-        self.level = copy.deepcopy(Levels.level_layouts[0])
-        self.level_color = Levels.level_colors[0]
-        self.line_width = 3
-        # movement speed settings - player speed should be at least 2
-        self.player_speed = 4
-        self.ghost_speed = self.player_speed - 1
-        # Power-up settings
-        self.power_up_duration = 8
-        self.power_counter = 0
-        self.power_up = False
-        self.score = 0
-        # Triggers for game state
-        self.game_lost = False
-        self.game_won = False
-        # Number of dots left on map that need to be eaten
-        self.dots_left = 0
-        for row in self.level:
-            for index in row:
-                if index == 1 or index == 2:
-                    self.dots_left += 1
-        # Counters used to toggle events based on FPS, such as the pause at the start of game while intro sound plays
-        self.counter = 0
-        self.startup_counter = 0
-
-
-# Initialize pygame module
-pygame.init()
-
-# Game Assets
-# Loading entity images
-player_images = []
-for g in range(1, 5):
-    player_images.append(pygame.transform.scale(pygame.image.load(f"assets/player_images/{g}.png"), (45, 45)))
-blinky_img = pygame.transform.scale(pygame.image.load(f"assets/ghost_images/blinky.png"), (45, 45))
-pinky_img = pygame.transform.scale(pygame.image.load(f"assets/ghost_images/pinky.png"), (45, 45))
-inky_img = pygame.transform.scale(pygame.image.load(f"assets/ghost_images/inky.png"), (45, 45))
-clyde_img = pygame.transform.scale(pygame.image.load(f"assets/ghost_images/clyde.png"), (45, 45))
-spooked_img = pygame.transform.scale(pygame.image.load(f"assets/ghost_images/scared.png"), (45, 45))
-dead_img = pygame.transform.scale(pygame.image.load(f"assets/ghost_images/dead.png"), (45, 45))
-
-# Sounds
-beginning_intro = "./assets/Sounds/pacman_beginning.wav"
-intermission_sound = "./assets/Sounds/pacman_intermission.wav"
-pacman_chomp = "./assets/Sounds/pacman_chomp.mp3"
-pacman_death = "./assets/Sounds/pacman_death.wav"
-eat_ghost_sound = "./assets/Sounds/pacman_eatghost.wav"
-power_pellet_sound = "./assets/Sounds/power_pellet_eaten.wav"
-power_up_active_sound = "./assets/Sounds/ghosts_ambient_scared2.wav"
-
-
-# Sets ghosts back to default settings / positions
-def reset_ghosts(blinky, inky, pinky, clyde, settings):
-    blinky.x_visual = (settings.width // 30) * 14 - 10
-    blinky.y_visual = ((settings.height - 50) // 33) * 12 - 10
-    blinky.x_actual = (settings.width // 30) * 14
-    blinky.y_actual = ((settings.height - 50) // 33) * 12
-    blinky.x_center = (settings.width // 30) * 14 + 13
-    blinky.y_center = ((settings.height - 50) // 33) * 12 + 13
-    blinky.speed = settings.ghost_speed
-    blinky.dead = False
-    blinky.been_eaten = False
-
-    inky.x_visual = (settings.width // 30) * 12 - 10
-    inky.y_visual = ((settings.height - 50) // 33) * 15 - 10
-    inky.x_actual = (settings.width // 30) * 12
-    inky.y_actual = ((settings.height - 50) // 33) * 15
-    inky.x_center = (settings.width // 30) * 12 + 13
-    inky.y_center = ((settings.height - 50) // 33) * 15 + 13
-    inky.speed = settings.ghost_speed
-    inky.dead = False
-    inky.been_eaten = False
-
-    pinky.x_visual = (settings.width // 30) * 14 - 10
-    pinky.y_visual = ((settings.height - 50) // 33) * 15 - 10
-    pinky.x_actual = (settings.width // 30) * 14
-    pinky.y_actual = ((settings.height - 50) // 33) * 15
-    pinky.x_center = (settings.width // 30) * 14 + 13
-    pinky.y_center = ((settings.height - 50) // 33) * 15 + 13
-    pinky.speed = settings.ghost_speed
-    pinky.dead = False
-    pinky.been_eaten = False
-
-    clyde.x_visual = (settings.width // 30) * 16 - 10
-    clyde.y_visual = ((settings.height - 50) // 33) * 15 - 10
-    clyde.x_actual = (settings.width // 30) * 16
-    clyde.y_actual = ((settings.height - 50) // 33) * 15
-    clyde.x_center = (settings.width // 30) * 16 + 13
-    clyde.y_center = ((settings.height - 50) // 33) * 15 + 13
-    clyde.speed = settings.ghost_speed
-    clyde.dead = False
-    clyde.been_eaten = False
-
-
-# Main game loop
-def main():
-    # Initialize game settings
-    settings = GameSettings()
-
-    # Initialize player
-    player = Pacman()
-
-    # initialize ghosts
-    blinky = Ghost((settings.width // 30) * 14 - 10, ((settings.height - 50) // 33) * 12 - 10,
-                   (settings.width // 30) * 14, ((settings.height - 50) // 33) * 12, (settings.width // 30) * 14 + 13,
-                   ((settings.height - 50) // 33) * 12 + 13, (player.center_x, player.center_y),
-                   settings.ghost_speed, blinky_img, False, False, settings)
-
-    inky = Ghost((settings.width // 30) * 12 - 10, ((settings.height - 50) // 33) * 15 - 10,
-                 (settings.width // 30) * 12, ((settings.height - 50) // 33) * 15, (settings.width // 30) * 12 + 13,
-                 ((settings.height - 50) // 33) * 15 + 13, (player.center_x, player.center_y),
-                 settings.ghost_speed, inky_img, False, False, settings)
-
-    pinky = Ghost((settings.width // 30) * 14 - 10, ((settings.height - 50) // 33) * 15 - 10,
-                  (settings.width // 30) * 14, ((settings.height - 50) // 33) * 15, (settings.width // 30) * 14 + 13,
-                  ((settings.height - 50) // 33) * 15 + 13, (player.center_x, player.center_y),
-                  settings.ghost_speed, pinky_img, False, False, settings)
-
-    clyde = Ghost((settings.width // 30) * 16 - 10, ((settings.height - 50) // 33) * 15 - 10,
-                  (settings.width // 30) * 16, ((settings.height - 50) // 33) * 15, (settings.width // 30) * 16 + 13,
-                  ((settings.height - 50) // 33) * 15 + 13, (player.center_x, player.center_y),
-                  settings.ghost_speed, clyde_img, False, False, settings)
-
-    running = True
-    pygame.mixer.Sound(beginning_intro).play()
-
-    while running:
-
-        # player controls - wasd or arrow keys - should function like joystick controls
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_RIGHT or event.key == pygame.K_d:
-                    player.direction_command = 0
-                if event.key == pygame.K_LEFT or event.key == pygame.K_a:
-                    player.direction_command = 1
-                if event.key == pygame.K_UP or event.key == pygame.K_w:
-                    player.direction_command = 2
-                if event.key == pygame.K_DOWN or event.key == pygame.K_s:
-                    player.direction_command = 3
-                if event.key == pygame.K_RETURN:
-                    # Loading next level on game win/loss
-                    if settings.game_lost:
-                        settings.level_id = -1
-                        player.lives = 3
-                        settings.score = 0
-                        load_next_level(player, blinky, inky, pinky, clyde, settings)
-                    elif settings.game_won:
-                        if settings.level_id >= len(Levels.level_layouts) - 1:
-                            settings.level_id = -1
-                            load_next_level(player, blinky, inky, pinky, clyde, settings)
-                        else:
-                            load_next_level(player, blinky, inky, pinky, clyde, settings)
-            if event.type == pygame.KEYUP:
-                if (event.key == pygame.K_RIGHT or event.key == pygame.K_d) and player.direction_command == 0:
-                    player.direction_command = player.direction
-                if (event.key == pygame.K_LEFT or event.key == pygame.K_a) and player.direction_command == 1:
-                    player.direction_command = player.direction
-                if (event.key == pygame.K_UP or event.key == pygame.K_w) and player.direction_command == 2:
-                    player.direction_command = player.direction
-                if (event.key == pygame.K_DOWN or event.key == pygame.K_s) and player.direction_command == 3:
-                    player.direction_command = player.direction
-
-        settings.clock.tick(settings.fps)
-
-        # moving player to other side when they go off-screen through the side hallways
-        if player.visual_x > settings.width:
-            player.visual_x = -47
-            player.actual_x = player.visual_x + 10
-            player.center_x = player.visual_x + 23
-        elif player.visual_x < -50:
-            player.visual_x = settings.width - 3
-            player.actual_x = player.visual_x + 10
-            player.center_x = player.visual_x + 23
-
-        # start-up pause timer for beginning/end of the game
-        if settings.startup_counter < settings.fps * 5 and not settings.game_lost and not settings.game_won:
-            beginning_of_game = True
-            settings.startup_counter += 1
-        elif settings.game_lost or settings.game_won:
-            beginning_of_game = True
-        else:
-            beginning_of_game = False
-
-        # counter for animations / flicker
-        if settings.counter < settings.fps:
-            settings.counter += 1
-        else:
-            settings.counter = 0
-
-        # timer for when a powerup is picked up - else-if resets settings when power-up ends
-        if settings.power_up and settings.power_counter < settings.fps * settings.power_up_duration:
-            settings.power_counter += 1
-        elif settings.power_up and settings.power_counter >= settings.fps * settings.power_up_duration:
-            settings.power_counter = 0
-            settings.power_up = False
-            player.eaten_ghosts = 0
-            blinky.been_eaten = False
-            inky.been_eaten = False
-            pinky.been_eaten = False
-            clyde.been_eaten = False
-            blinky.speed = settings.ghost_speed
-            inky.speed = settings.ghost_speed
-            pinky.speed = settings.ghost_speed
-            clyde.speed = settings.ghost_speed
-
-        # Drawing game objects onto the screen
-        settings.screen.fill("black")
-        draw_level(settings)
-        player.draw(settings)
-        blinky.draw()
-        inky.draw()
-        pinky.draw()
-        clyde.draw()
-        draw_misc(player, settings)
-
-        # Player movement
-        if not beginning_of_game:
-            # Move the player once for each count of player speed
-            for j in range(settings.player_speed):
-                # Check what directions pacman is able to move too (which adjacent tiles are not walls)
-                player.valid_directions = player.update_valid_directions(settings)
-
-                # Check if the users movement input matches a valid direction - if so adjust Pacman's visual direction
-                for i in range(4):
-                    if player.direction_command == i and player.valid_directions[i]:
-                        player.direction = i
-
-                # if not special case of game won/lost, move the player and check resulting collisions
-                if not settings.game_lost and not settings.game_won:
-                    player.move_player()
-                    check_collisions(player, blinky, inky, pinky, clyde, settings)
-
-        # Ghost movement
-        # update ghost targets
-        update_ghost_targets(player, blinky, inky, pinky, clyde, settings)
-
-        if not beginning_of_game:
-            # Move blinky once per value of his current speed
-            for j in range(blinky.speed):
-                # if blinky changing directions is possible (he is in the middle of a tile)
-                # and player is not out of bounds (using the hallways) - update blinky's path to pacman
-                # using A* algorithm with heuristic 1
-                if blinky.y_center % 25 == 13 and blinky.x_center % 25 == 13 and (0 <= player.center_x // 25 < 30):
-                    blinky.a_star_algorithm(True)
-                blinky.a_star_move()
-
-            # Using heuristic 2 for inky and pinky, repeating pathfinding logic for inky and pinky
-            for j in range(inky.speed):
-                if inky.y_center % 25 == 13 and inky.x_center % 25 == 13 and (0 <= player.center_x // 25 < 30):
-                    inky.a_star_algorithm(False)
-                inky.a_star_move()
-            for j in range(pinky.speed):
-                if pinky.y_center % 25 == 13 and pinky.x_center % 25 == 13 and (0 <= player.center_x // 25 < 30):
-                    pinky.a_star_algorithm(False)
-                pinky.a_star_move()
-
-            # Repeat for clyde with his own pathfinding - he simply attempts to increase/decrease his
-            # position relative to pacman, if his x-coord is lower, then increase by 1, if higher than decrease etc.
-            # Clyde uses his normal (poor) pathfinding unless he's been eaten and needs to return to the ghost box
-            # Clyde uses A* to return to box (heuristic 2), otherwise he would probably never make it to the box
-            for j in range(clyde.speed):
-                if not clyde.dead:
-                    clyde.update_valid_clyde_directions()
-                    clyde.move_clyde()
-                else:
-                    clyde.a_star_algorithm(False)
-                    clyde.a_star_move()
-
-        # display everything onto screen
-        pygame.display.flip()
-
-
-# resets the game board to the next appropriate level on a game win/loss
-def load_next_level(player, blinky, inky, pinky, clyde, settings):
-    # reset stage
-    settings.level_id += 1
-    settings.level = copy.deepcopy(Levels.level_layouts[settings.level_id])
-    settings.level_color = Levels.level_colors[settings.level_id]
-
-    settings.dots_left = 0
-    for r in settings.level:
-        for i in r:
-            if i == 1 or i == 2:
-                settings.dots_left += 1
-
-    # play intro or intermission sound
-    if settings.game_lost:
-        pygame.mixer.Sound(beginning_intro).play()
-    else:
-        pygame.mixer.Sound(intermission_sound).play()
-
-    # Reset game won/lost
-    settings.game_lost = False
-    settings.game_won = False
-
-    # Reset Player
-    player.actual_x = (settings.width // 30) * 15
-    player.actual_y = ((settings.height - 50) // 33) * 24
-    player.visual_x = player.actual_x - 10
-    player.visual_y = player.actual_y - 10
-    player.center_x = player.actual_x + 13
-    player.center_y = player.actual_y + 13
-    player.direction = 0
-    settings.power_up = False
-    settings.power_counter = settings.fps * settings.power_up_duration
-    settings.startup_counter = 0
-
-    # Reset Ghosts
-    reset_ghosts(blinky, inky, pinky, clyde, settings)
-
-
-# Updates the ghosts targeting, whether they should be targeting pacman, the ghost box, fleeing to a corner, etc.
-def update_ghost_targets(player, blinky, inky, pinky, clyde, settings):
-    # Blinky always targets the player - (A* , heuristic 1)
-    blinky.target = (player.center_x, player.center_y)
-
-    # inky attempts to target in-between blinky and pacman (A* , heuristic 2),
-    # but if that targets something unreachable, such as a wall tile, target defaults to pacman
-    if ((blinky.x_center + player.center_x) // 2 // 25 > 28 or
-            (blinky.y_center + player.center_y) // 2 // 25 > 28 or
-            settings.level[(blinky.y_center + player.center_y) // 2 // 25 > 28][
-                (blinky.x_center + player.center_x) // 2 // 25 > 28] > 3):
-        inky.target = (player.center_x, player.center_y)
-    else:
-        inky.target = (((blinky.x_center + player.center_x) // 2), ((player.center_y + blinky.y_center) // 2))
-
-    # Pinky tries to target 4 spaces ahead of pacman (A* , heuristic 2),
-    # but if that target is out of bounds or a wall/unreachable, it will default to targeting pacman
-    if player.direction == 0:
-        if (player.center_x + 100) // 25 > 28 or settings.level[player.center_y // 25][(player.center_x + 100) // 25] > 3:
-            pinky.target = (player.center_x, player.center_y)
-        else:
-            pinky.target = (player.center_x + 100, player.center_y)
-    elif player.direction == 1:
-        if (player.center_x - 100) // 25 < 1 or settings.level[player.center_y // 25][(player.center_x - 100) // 25] > 3:
-            pinky.target = (player.center_x, player.center_y)
-        else:
-            pinky.target = (player.center_x - 100, player.center_y)
-    elif player.direction == 2:
-        if (player.center_y - 100) // 25 < 1 or settings.level[(player.center_y - 100) // 25][player.center_x // 25] > 3:
-            pinky.target = (player.center_x, player.center_y)
-        else:
-            pinky.target = (player.center_x, player.center_y - 100)
-    elif player.direction == 3:
-        if (player.center_y + 100) // 25 > 28 or settings.level[(player.center_y + 100) // 25][player.center_x // 25] > 3:
-            pinky.target = (player.center_x, player.center_y)
-        else:
-            pinky.target = (player.center_x, player.center_y + 100)
-
-    # Clyde does not use his target value when moving towards pacman,
-    # but changes his x,y position based on his relative position to pacman instead
-    clyde.target = (player.center_x, player.center_y)
-
-    # if pacman currently has a power-up, and the ghost hasn't been eaten yet, their target is to flee to one
-    # of the four corners of the grid
-    if settings.power_up and not blinky.been_eaten:
-        blinky.target = ((settings.width // 30) * 27 + 13, ((settings.height - 50) // 33) * 30 + 13)
-    if settings.power_up and not inky.been_eaten:
-        inky.target = ((settings.width // 30) * 2 + 13, ((settings.height - 50) // 33) * 30 + 13)
-    if settings.power_up and not pinky.been_eaten:
-        pinky.target = ((settings.width // 30) * 27 + 13, ((settings.height - 50) // 33) * 2 + 13)
-    if settings.power_up and not clyde.been_eaten:
-        clyde.target = ((settings.width // 30) * 2 + 13, ((settings.height - 50) // 33) * 2 + 13)
-
-    # If the ghost is dead it's target is to return to the ghost box to respawn
-    if blinky.dead:
-        blinky.target = ((settings.width // 30) * 16 + 13, ((settings.height - 50) // 33) * 15 + 13)
-    if inky.dead:
-        inky.target = ((settings.width // 30) * 16 + 13, ((settings.height - 50) // 33) * 15 + 13)
-    if pinky.dead:
-        pinky.target = ((settings.width // 30) * 16 + 13, ((settings.height - 50) // 33) * 15 + 13)
-    if clyde.dead:
-        clyde.target = ((settings.width // 30) * 16 + 13, ((settings.height - 50) // 33) * 15 + 13)
-
-
-# Draws the game board by using the values in the grid imported from 'Levels.py'
-def draw_level(settings):
-    num1 = ((settings.height - 50) // 33)
-    num2 = (settings.width // 30)
-    for i, row1 in enumerate(settings.level):
-        for j, value in enumerate(row1):
-
-            # Draw a small circle if a 1 (small dot)
-            if value == 1:
-                pygame.draw.circle(settings.screen, "white", (j * num2 + (.5 * num2), i * num1 + (.5 * num1)), 4)
-
-            # Draw a larger circle if a 2 (power-up)
-            if value == 2 and settings.counter > settings.fps // 2:
-                pygame.draw.circle(settings.screen, "white", (j * num2 + (.5 * num2), i * num1 + (.5 * num1)), 10)
-
-            # Draw a white horizontal line if a 3 (Ghost door)
-            if value == 3:
-                pygame.draw.line(settings.screen, "white", (j * num2, i * num1 + (.5 * num1)),
-                                 (j * num2 + num2, i * num1 + (.5 * num1)), settings.line_width)
-
-            # Draw vertical line if a 4 (wall)
-            if value == 4:
-                pygame.draw.line(settings.screen, settings.level_color, (j * num2 + (.5 * num2), i * num1),
-                                 (j * num2 + (.5 * num2), i * num1 + num1), settings.line_width)
-
-            # Draw a horizontal line if a 5 (wall)
-            if value == 5:
-                pygame.draw.line(settings.screen, settings.level_color, (j * num2, i * num1 + (.5 * num1)),
-                                 (j * num2 + num2, i * num1 + (.5 * num1)), settings.line_width)
-
-            # Draw the top right of a circle if a 6 (wall corner)
-            if value == 6:
-                pygame.draw.arc(settings.screen, settings.level_color,
-                                ((j * num2 - (num2 * .5)), (i * num1 + (.5 * num1)), num2 + 2, num1),
-                                0, math.pi / 2.0, settings.line_width)
-
-            # Draw the top left of a circle if a 7 (wall corner)
-            if value == 7:
-                pygame.draw.arc(settings.screen, settings.level_color,
-                                ((j * num2 + (num2 * .5)), (i * num1 + (.5 * num1)), num2, num1),
-                                math.pi / 2, math.pi, settings.line_width)
-
-            # Draw the bottom left of a circle if an 8 (wall corner)
-            if value == 8:
-                pygame.draw.arc(settings.screen, settings.level_color,
-                                ((j * num2 + (num2 * .5)), (i * num1 - (.5 * num1)), num2, num1 + 2),
-                                math.pi, 3 * math.pi / 2.0, settings.line_width)
-
-            # Draw the bottom right of a circle (wall corner)
-            if value == 9:
-                pygame.draw.arc(settings.screen, settings.level_color,
-                                ((j * num2 - (num2 * .5)), (i * num1 - (.5 * num1)), num2 + 2, num1 + 2),
-                                3 * math.pi / 2.0, 2 * math.pi, settings.line_width - 1)
-
-
-# Draws misc items on the screen, such as game over/won pop-ups, lives remaining, and the current score
-def draw_misc(player, settings):
-    # Display the score
-    score_text = settings.font.render(f"Score: {settings.score}", True, "white")
-    settings.screen.blit(score_text, (10, 845))
-
-    # Display the amount of remaining lives
-    for i in range(player.lives):
-        settings.screen.blit(pygame.transform.scale(player_images[0], (30, 30)), (625 + i * 40, 835))
-
-    if settings.game_lost:
-        pygame.draw.rect(settings.screen, settings.level_color, [50, 225, 650, 250], 0, 10)
-        pygame.draw.rect(settings.screen, "black", [75, 250, 600, 200], 0, 10)
-        game_lost_text = settings.font.render("Game Over! Press Enter to play again!", True, "white")
-        settings.screen.blit(game_lost_text, (175, 325))
-
-    if settings.game_won:
-        pygame.draw.rect(settings.screen, settings.level_color, [50, 225, 650, 250], 0, 10)
-        pygame.draw.rect(settings.screen, "black", [75, 250, 600, 200], 0, 10)
-        game_won_text = settings.font.render("You Won! Press Enter to go to next level!", True, "white")
-        settings.screen.blit(game_won_text, (175, 325))
-
-
-# Performs all collision checks, such as getting a dot or power-up, or colliding with a ghost, etc.
-def check_collisions(player, blinky, inky, pinky, clyde, settings):
-    # players (x,y) coordinates on the grid (tiles are 25x25 in pixels)
-    j = player.center_x // 25
-    i = player.center_y // 25
-
-    # Player Collisions
-    # if player is not out of bounds
-    if 0 < player.center_x < settings.width:
-
-        # check if players center position is a small dot. if so, remove dot from level and increase score by 10
-        if settings.level[i][j] == 1:
-            settings.channel.queue(pygame.mixer.Sound(pacman_chomp))
-            settings.level[i][j] = 0
-            settings.score += 10
-            settings.dots_left -= 1
-
-        # check if players center position is a large dot. if so, remove dot from level and increase score by 50
-        # also updates game setting to reflect that a power-up was just picked up
-        if settings.level[i][j] == 2:
-            pygame.mixer.Sound(power_pellet_sound).play()
-            settings.level[i][j] = 0
-            settings.score += 50
-            settings.dots_left -= 1
-            settings.power_up = True
-            settings.power_counter = 0
-            player.eaten_ghosts = 0
-            blinky.been_eaten = False
-            inky.been_eaten = False
-            pinky.been_eaten = False
-            clyde.been_eaten = False
-            # Tries to slow the ghosts down by a value of 2, but if their speed would be reduced to <= 0 sets them to 1
-            if settings.ghost_speed - 2 > 1:
-                if not blinky.dead:
-                    blinky.speed = settings.ghost_speed - 2
-                if not inky.dead:
-                    inky.speed = settings.ghost_speed - 2
-                if not pinky.dead:
-                    pinky.speed = settings.ghost_speed - 2
-                if not clyde.dead:
-                    clyde.speed = settings.ghost_speed - 2
-            else:
-                if not blinky.dead:
-                    blinky.speed = 1
-                if not inky.dead:
-                    inky.speed = 1
-                if not pinky.dead:
-                    pinky.speed = 1
-                if not clyde.dead:
-                    clyde.speed = 1
-
-        # Check if all dots are gone
-        if settings.dots_left <= 0:
-            settings.game_won = True
-
-        # Check if collided with blinky
-        if i == blinky.y_center // 25 and j == blinky.x_center // 25:
-            if settings.power_up:
-                if not blinky.been_eaten:
-                    pygame.mixer.Sound(eat_ghost_sound).play()
-                    player.eaten_ghosts += 1
-                    # increase score by 200, 400, 800, 1600
-                    settings.score += 200 * (2 ** player.eaten_ghosts)
-                    blinky.been_eaten = True
-                    blinky.dead = True
-                    blinky.speed = settings.ghost_speed
-                elif not blinky.dead:
-                    player_death(player, blinky, inky, pinky, clyde, settings)
-            elif not blinky.dead:
-                player_death(player, blinky, inky, pinky, clyde, settings)
-
-        # Check if collided with inky
-        if i == inky.y_center // 25 and j == inky.x_center // 25:
-            if settings.power_up:
-                if not inky.been_eaten:
-                    pygame.mixer.Sound(eat_ghost_sound).play()
-                    player.eaten_ghosts += 1
-                    settings.score += 200 * (2 ** player.eaten_ghosts)
-                    inky.been_eaten = True
-                    inky.dead = True
-                    inky.speed = settings.ghost_speed
-                elif not inky.dead:
-                    player_death(player, blinky, inky, pinky, clyde, settings)
-            elif not inky.dead:
-                player_death(player, blinky, inky, pinky, clyde, settings)
-
-        # Check if collided with pinky
-        if i == pinky.y_center // 25 and j == pinky.x_center // 25:
-            if settings.power_up:
-                if not pinky.been_eaten:
-                    pygame.mixer.Sound(eat_ghost_sound).play()
-                    player.eaten_ghosts += 1
-                    settings.score += 200 * (2 ** player.eaten_ghosts)
-                    pinky.been_eaten = True
-                    pinky.dead = True
-                    pinky.speed = settings.ghost_speed
-                elif not pinky.dead:
-                    player_death(player, blinky, inky, pinky, clyde, settings)
-            elif not pinky.dead:
-                player_death(player, blinky, inky, pinky, clyde, settings)
-
-        # Check if collided with clyde
-        if i == clyde.y_center // 25 and j == clyde.x_center // 25:
-            if settings.power_up:
-                if not clyde.been_eaten:
-                    pygame.mixer.Sound(eat_ghost_sound).play()
-                    player.eaten_ghosts += 1
-                    settings.score += 200 * (2 ** player.eaten_ghosts)
-                    clyde.been_eaten = True
-                    clyde.dead = True
-                    clyde.speed = settings.ghost_speed
-                    # switch to a* to return to box
-                    update_ghost_targets(player, blinky, inky, pinky, clyde, settings)
-                    clyde.a_star_algorithm(False)
-                elif not clyde.dead:
-                    player_death(player, blinky, inky, pinky, clyde, settings)
-            elif not clyde.dead:
-                player_death(player, blinky, inky, pinky, clyde, settings)
-
-    # Ghost collisions
-    # Check if ghosts have made it back to their target in the box
-    # only possible if ghost is dead, they are at their target path, and they aren't currently colliding with pacman
-    if blinky.dead and len(blinky.path) == 0 and not (i == blinky.y_center // 25 and j == blinky.x_center // 25):
-        blinky.dead = False
-    if inky.dead and len(inky.path) == 0 and not (i == inky.y_center // 25 and j == inky.x_center // 25):
-        inky.dead = False
-    if pinky.dead and len(pinky.path) == 0 and not (i == pinky.y_center // 25 and j == pinky.x_center // 25):
-        pinky.dead = False
-    if clyde.dead and len(clyde.path) == 0 and not (i == clyde.y_center // 25 and j == clyde.x_center // 25):
-        clyde.dead = False
-
-
-# Repositions the level when player dies - triggers game loss if no extra lives remaining
-def player_death(player, blinky, inky, pinky, clyde, settings):
-    # play pacman death sound effect - pause game until it's finished
-    # playsound(pacman_death)
-    pygame.mixer.Sound(pacman_death).play()
-    while pygame.mixer.get_busy():
-        pygame.time.wait(500)
-
-    # reduce lives by 1
-    player.lives -= 1
-
-    # End game if out of lives
-    if player.lives < 0:
-        settings.game_lost = True
-        settings.startup_counter = 0
-        return
-
-    # reset timers
-    settings.startup_counter = 0
-    settings.power_up = False
-
-    # reset player back to original positions
-    player.actual_x = (settings.width // 30) * 15
-    player.actual_y = ((settings.height - 50) // 33) * 24
-    player.visual_x = player.actual_x - 10
-    player.visual_y = player.actual_y - 10
-    player.center_x = player.actual_x + 13
-    player.center_y = player.actual_y + 13
-    player.direction = 0
-
-    # Reset Ghosts
-    reset_ghosts(blinky, inky, pinky, clyde, settings)
-
-    pygame.mixer.Sound(beginning_intro).play()
-
-
-# Initial call to main game loop
-main()
-
-# Closing pygame module
-pygame.quit()
+import argparse
+import math
+import pygame
+import LevelPack
+from Assets import AssetManager
+import Replay
+from Profiler import FrameProfiler
+from Telemetry import PathfindingTelemetry
+from GameLogic import Game, GameSettings, SnapshotRing
+from GhostRules import GHOST_NAMES
+
+
+class DisplaySettings(GameSettings):
+    """Game settings extended with the pygame resources used by the front end - the game window, frame clock, font,
+    sprites and sounds. Pygame is initialized here rather than when the module is imported, so the front end's code
+    can be imported without opening a window"""
+
+    def __init__(self):
+        # levels are loaded from a pack written next to the other assets the first time the game runs - a pack that
+        # can't be written (a read-only install) only means the levels are read from 'Levels.py' instead
+        try:
+            level_pack = LevelPack.load_cached_pack()
+        except OSError:
+            level_pack = None
+        super().__init__(level_pack)
+        # Pygame Settings
+        pygame.init()
+        self.assets = AssetManager()
+        self.sounds = SoundBank(self.assets)
+        self.screen = pygame.display.set_mode((self.width, self.height))
+        self.clock = pygame.time.Clock()
+        self.font = pygame.font.Font("freesansbold.ttf", 20)
+        # the window is open by now, so the sprites are loaded in its pixel format
+        self.sprites = SpriteAtlas(self.assets)
+        self.assets.save()
+        # Cached surfaces of the current level, see LevelLayers
+        self.level_layers = None
+        # Redraw and update only the changed areas of the screen each frame instead of the whole window
+        # (helps software rendered and remote displays)
+        self.dirty_rect_rendering = False
+        self.dirty_rects = DirtyRectTracker()
+        # The frame profiler's percentiles drawn over the game while profiling (F3 turns profiling on and off)
+        self.profiler_hud = ProfilerHud()
+        # Keep everything frozen for as long as the death sound plays, counted in frames so the window stays responsive
+        self.death_duration = math.ceil(self.sounds.sounds[pacman_death].get_length() * self.fps)
+
+
+# Game Assets - entity images, relative to the assets folder and loaded through the AssetManager at the size they are
+# drawn at
+sprite_size = (45, 45)
+life_size = (30, 30)
+player_images = [f"player_images/{g}.png" for g in range(1, 5)]
+ghost_images = {name: f"ghost_images/{name}.png" for name in GHOST_NAMES}
+spooked_image = "ghost_images/scared.png"
+dead_image = "ghost_images/dead.png"
+
+# Sounds - names of the files in 'assets/Sounds', played through the SoundBank
+beginning_intro = "pacman_beginning"
+intermission_sound = "pacman_intermission"
+pacman_chomp = "pacman_chomp"
+pacman_death = "pacman_death"
+eat_ghost_sound = "pacman_eatghost"
+power_pellet_sound = "power_pellet_eaten"
+power_up_active_sound = "ghosts_ambient_scared2"
+
+
+class SoundBank:
+    """Every sound in 'assets/Sounds', decoded once by 'assets' (an AssetManager) when the game starts, and a fixed
+    pool of reserved mixer channels to play them on - one for the chomp sound, two shared by the short sound effects,
+    and one for the longer jingles (intro, intermission, death). Chomps never pile up: while one plays at most one
+    more is queued after it and any others are dropped"""
+
+    def __init__(self, assets):
+        # decoded up front, so playing a sound never reads or decodes anything in the middle of a frame
+        self.sounds = {name: assets.sound(name) for name in assets.sound_names()}
+        pygame.mixer.set_reserved(4)
+        self.chomp_channel = pygame.mixer.Channel(0)
+        self.effect_channels = [pygame.mixer.Channel(1), pygame.mixer.Channel(2)]
+        self.jingle_channel = pygame.mixer.Channel(3)
+        # effect channel to take over next when all of them are busy
+        self.next_effect = 0
+
+    # Plays the chomp sound, or queues it after the one playing - dropped if another chomp is already queued
+    def play_chomp(self):
+        if not self.chomp_channel.get_busy():
+            self.chomp_channel.play(self.sounds[pacman_chomp])
+        elif self.chomp_channel.get_queue() is None:
+            self.chomp_channel.queue(self.sounds[pacman_chomp])
+
+    # Plays a short sound effect on a free effect channel, cutting off the oldest effect if none are free
+    def play_effect(self, name):
+        for channel in self.effect_channels:
+            if not channel.get_busy():
+                channel.play(self.sounds[name])
+                return
+        self.effect_channels[self.next_effect].play(self.sounds[name])
+        self.next_effect = (self.next_effect + 1) % len(self.effect_channels)
+
+    # Plays a jingle, replacing any jingle that is still playing
+    def play_jingle(self, name):
+        self.jingle_channel.play(self.sounds[name])
+
+
+class SpriteAtlas:
+    """Every sprite the game draws, pre-transformed and packed into one surface, so that drawing a sprite is a single
+    blit of part of the atlas with no transform calls while the game runs. 'player' holds the area of each pacman
+    frame, indexed [direction][animation frame] (direction = [right, left, up, down]), 'ghosts' the area of each
+    ghost's normal image, and 'scared', 'dead' and 'life' (the remaining lives icon) the other areas. The images are
+    loaded through 'assets' (an AssetManager). Needs the game window to be open, as the atlas is converted to the
+    window's pixel format"""
+
+    def __init__(self, assets):
+        size = sprite_size
+        # rows 0-3 hold pacman facing each direction, row 4 the ghost images and the lives icon
+        self.surface = pygame.Surface((size[0] * 7, size[1] * 5), pygame.SRCALPHA)
+
+        self.player = []
+        for direction in range(4):
+            frames = []
+            for frame, path in enumerate(player_images):
+                image = assets.image(path, size)
+                if direction == 1:
+                    image = pygame.transform.flip(image, True, False)
+                elif direction == 2:
+                    image = pygame.transform.rotate(image, 90)
+                elif direction == 3:
+                    image = pygame.transform.rotate(image, 270)
+                frames.append(self.add(image, frame * size[0], direction * size[1]))
+            self.player.append(frames)
+
+        self.ghosts = dict()
+        for column, (name, path) in enumerate(ghost_images.items()):
+            self.ghosts[name] = self.add(assets.image(path, size), column * size[0], 4 * size[1])
+        self.scared = self.add(assets.image(spooked_image, size), 4 * size[0], 4 * size[1])
+        self.dead = self.add(assets.image(dead_image, size), 5 * size[0], 4 * size[1])
+        self.life = self.add(assets.image(player_images[0], life_size), 6 * size[0], 4 * size[1])
+
+        self.surface = self.surface.convert_alpha()
+
+    # Copies 'image' into the atlas at (x, y) exactly as it is (no blending) and returns the area it takes up
+    def add(self, image, x, y):
+        self.surface.blit(image, (x, y), special_flags=pygame.BLEND_RGBA_MAX)
+        return pygame.Rect((x, y), image.get_size())
+
+
+# Displays the player/pacman, different rotation of image based on the direction moving
+def draw_player(player, settings):
+    # direction = [right, left, up, down]
+    settings.screen.blit(settings.sprites.surface, (player.visual_x, player.visual_y),
+                         settings.sprites.player[player.direction][(settings.counter % 20) // 5])
+
+
+# Displays a ghost, using the scared image while fleeing a power-up and the dead image while returning to the box
+# 'ghost.img' is the area of the ghost's normal image in the sprite atlas
+def draw_ghost(ghost, settings):
+    if (not settings.power_up and not ghost.dead) or (
+            ghost.been_eaten and settings.power_up and not ghost.dead):
+        settings.screen.blit(settings.sprites.surface, (ghost.x_visual, ghost.y_visual), ghost.img)
+    elif settings.power_up and not ghost.dead and not ghost.been_eaten:
+        settings.screen.blit(settings.sprites.surface, (ghost.x_visual, ghost.y_visual), settings.sprites.scared)
+    else:
+        settings.screen.blit(settings.sprites.surface, (ghost.x_visual, ghost.y_visual), settings.sprites.dead)
+
+
+# Plays the sounds the game logic triggered during the last frame
+def play_sounds(settings):
+    for event in settings.events:
+        if event == "chomp":
+            settings.sounds.play_chomp()
+        elif event == "power_pellet":
+            settings.sounds.play_effect(power_pellet_sound)
+        elif event == "eat_ghost":
+            settings.sounds.play_effect(eat_ghost_sound)
+        elif event == "beginning":
+            settings.sounds.play_jingle(beginning_intro)
+        elif event == "intermission":
+            settings.sounds.play_jingle(intermission_sound)
+        elif event == "death":
+            # play pacman death sound effect - the game logic holds everything in place until it's finished
+            settings.sounds.play_jingle(pacman_death)
+
+
+# Main game loop. The game is recorded to the file 'record_path' if given (see 'Replay.py'), and if 'replay_path' is
+# given the game recorded in that file is played back instead of taking input from the keyboard. 'profile' starts the
+# game with the frame profiler on, as does giving 'trace_path' or 'csv_path' - the timeline of every profiled frame is
+# written to those (as a Chrome trace and as CSV) when the game is closed. With 'telemetry_path' the ghosts'
+# pathfinding is measured and the statistics written there when the game is closed. 'swarm' extra ghosts join the
+# classic four (see 'Swarm.py'), and 'dirty_rects' only redraws the parts of the window that changed each frame
+def main(record_path=None, replay_path=None, profile=False, trace_path=None, csv_path=None, telemetry_path=None,
+         swarm=0, dirty_rects=False):
+    # Initialize game settings, player and ghosts
+    settings = DisplaySettings()
+    settings.swarm_size = swarm
+    settings.dirty_rect_rendering = dirty_rects
+    if telemetry_path is not None:
+        settings.telemetry = PathfindingTelemetry(settings.fps)
+    # the profiler is kept while it is turned off, so the frames it timed can still be written out at the end
+    record_timeline = trace_path is not None or csv_path is not None
+    profiler = FrameProfiler(settings.fps * 5, record_timeline) if profile or record_timeline else None
+    settings.profiler = profiler
+    replayer = None
+    if replay_path is not None:
+        replayer = Replay.Replayer(replay_path)
+        replayer.apply(settings)
+    game = Game(settings)
+    recorder = Replay.Recorder(record_path, game) if record_path is not None else None
+    player = game.player
+    for ghost in game.ghosts:
+        ghost.img = settings.sprites.ghosts[ghost.name]
+
+    # the last 10 seconds of the game, which holding backspace winds back through (not while recording or replaying,
+    # a recording only has the input of the game as it was played forwards)
+    history = SnapshotRing(settings.fps * 10)
+    rewinding = False
+
+    running = True
+    settings.sounds.play_jingle(beginning_intro)
+
+    while running:
+        if settings.profiler is not None:
+            settings.profiler.begin_frame()
+        direction_command = player.direction_command
+        enter = False
+        toggle_profiler = False
+
+        # player controls - wasd or arrow keys - should function like joystick controls
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_RIGHT or event.key == pygame.K_d:
+                    direction_command = 0
+                if event.key == pygame.K_LEFT or event.key == pygame.K_a:
+                    direction_command = 1
+                if event.key == pygame.K_UP or event.key == pygame.K_w:
+                    direction_command = 2
+                if event.key == pygame.K_DOWN or event.key == pygame.K_s:
+                    direction_command = 3
+                if event.key == pygame.K_RETURN:
+                    enter = True
+                if event.key == pygame.K_F3:
+                    toggle_profiler = True
+                if event.key == pygame.K_BACKSPACE and recorder is None and replayer is None:
+                    rewinding = True
+            if event.type == pygame.KEYUP:
+                if event.key == pygame.K_BACKSPACE:
+                    rewinding = False
+                if (event.key == pygame.K_RIGHT or event.key == pygame.K_d) and direction_command == 0:
+                    direction_command = player.direction
+                if (event.key == pygame.K_LEFT or event.key == pygame.K_a) and direction_command == 1:
+                    direction_command = player.direction
+                if (event.key == pygame.K_UP or event.key == pygame.K_w) and direction_command == 2:
+                    direction_command = player.direction
+                if (event.key == pygame.K_DOWN or event.key == pygame.K_s) and direction_command == 3:
+                    direction_command = player.direction
+        if settings.profiler is not None:
+            settings.profiler.mark("events")
+
+        settings.clock.tick(settings.fps)
+        if settings.profiler is not None:
+            settings.profiler.mark("frame_wait")
+
+        # Advance the game logic by one frame, then play the sounds it triggered
+        if replayer is not None:
+            replayer.step(game)
+            running = running and not replayer.finished
+            if settings.profiler is not None:
+                settings.profiler.mark("replay")
+        elif recorder is not None:
+            recorder.step(direction_command, enter)
+            if settings.profiler is not None:
+                settings.profiler.mark("replay")
+        elif rewinding:
+            # the dots eaten since the snapshot are back, so the level layers are built again
+            if history.rewind(game):
+                settings.level_layers = None
+            if settings.profiler is not None:
+                settings.profiler.mark("history")
+        else:
+            history.push(game)
+            if settings.profiler is not None:
+                settings.profiler.mark("history")
+            game.step(direction_command, enter)
+        if not rewinding:
+            play_sounds(settings)
+        if settings.profiler is not None:
+            settings.profiler.mark("sounds")
+
+        # Drawing game objects onto the screen and displaying them
+        if settings.dirty_rect_rendering:
+            draw_frame_dirty(game, settings)
+        else:
+            draw_frame(game, settings)
+
+        if settings.profiler is not None:
+            settings.profiler.end_frame()
+        # profiling is only switched on or off between frames, so every frame it times is timed from the start
+        if toggle_profiler:
+            if settings.profiler is None:
+                profiler = profiler or FrameProfiler(settings.fps * 5)
+                settings.profiler = profiler
+            else:
+                settings.profiler = None
+
+    if recorder is not None:
+        recorder.close()
+    if replayer is not None:
+        print("replay matched the recording" if replayer.mismatch is None else
+              f"replay no longer matched the recording at tick {replayer.mismatch}")
+    if profiler is not None and profiler.frame:
+        print(profiler.report())
+        if trace_path is not None:
+            profiler.write_chrome_trace(trace_path)
+        if csv_path is not None:
+            profiler.write_csv(csv_path)
+    if settings.telemetry is not None:
+        print(settings.telemetry.report())
+        settings.telemetry.write_json(telemetry_path)
+
+
+# Draws everything onto the screen and displays the whole frame
+def draw_frame(game, settings):
+    profiler = settings.profiler
+    draw_level(settings)
+    if profiler is not None:
+        profiler.mark("draw_level")
+    draw_sprites(game, settings)
+    if profiler is not None:
+        profiler.mark("draw_sprites")
+    draw_misc(game.player, settings)
+    if profiler is not None:
+        profiler.mark("draw_misc")
+        settings.profiler_hud.draw(settings, profiler)
+        profiler.mark("hud")
+    else:
+        settings.profiler_hud.rect = None
+    pygame.display.flip()
+    if profiler is not None:
+        profiler.mark("flip")
+
+
+# Draws pacman and the ghosts
+def draw_sprites(game, settings):
+    draw_player(game.player, settings)
+    for ghost in game.ghosts:
+        draw_ghost(ghost, settings)
+    if settings.swarm is not None:
+        draw_swarm(settings)
+
+
+# Displays the swarm's ghosts, in one batch of blits - each looks like the classic ghost it started with, and is
+# scared or dead the same way as in draw_ghost
+def draw_swarm(settings):
+    swarm = settings.swarm
+    sprites = settings.sprites
+    images = [sprites.ghosts[name] for name in GHOST_NAMES]
+    blits = []
+    for ghost in range(len(swarm)):
+        if swarm.dead[ghost]:
+            area = sprites.dead
+        elif settings.power_up and not swarm.been_eaten[ghost]:
+            area = sprites.scared
+        else:
+            area = images[ghost % 4]
+        blits.append((sprites.surface, (swarm.x[ghost] - 23, swarm.y[ghost] - 23), area))
+    settings.screen.blits(blits, False)
+
+
+# Screen areas covered by pacman and the ghosts
+def sprite_rects(game):
+    rects = [pygame.Rect((game.player.visual_x, game.player.visual_y), game.settings.sprites.player[0][0].size)]
+    for ghost in game.ghosts:
+        rects.append(pygame.Rect((ghost.x_visual, ghost.y_visual), ghost.img.size))
+    swarm = game.settings.swarm
+    if swarm is not None:
+        size = game.settings.sprites.dead.size
+        for ghost in range(len(swarm)):
+            rects.append(pygame.Rect((swarm.x[ghost] - 23, swarm.y[ghost] - 23), size))
+    return rects
+
+
+class DirtyRectTracker:
+    """What was displayed last frame, for dirty-rect rendering - the level layers drawn, the areas the sprites were
+    drawn in, and the score and lives shown in the HUD"""
+
+    def __init__(self):
+        self.layers = None
+        self.sprite_rects = []
+        self.score = None
+        self.lives = None
+
+
+# Draws a frame by only redrawing the areas that changed since the last one - where the sprites were and are now,
+# eaten dots, the blinking power-ups and the HUD when the score or lives change - and only sends those areas to the
+# display. A new level or the game won/lost pop-up is drawn and displayed in full
+def draw_frame_dirty(game, settings):
+    tracker = settings.dirty_rects
+    layers = update_level_layers(settings)
+
+    if tracker.layers is not layers or settings.game_lost or settings.game_won:
+        draw_frame(game, settings)
+    else:
+        profiler = settings.profiler
+        num1 = ((settings.height - 50) // 33)
+        num2 = (settings.width // 30)
+        screen_rect = settings.screen.get_rect()
+
+        dirty = list(tracker.sprite_rects)
+        for i, j in settings.cleared_cells + layers.power_ups:
+            dirty.append(pygame.Rect(j * num2, i * num1, num2, num1))
+        # the HUD is blended onto the screen, so it can only be drawn again after its area has been cleared
+        hud_changed = settings.score != tracker.score or game.player.lives != tracker.lives
+        if hud_changed:
+            dirty.append(pygame.Rect(0, settings.height - 50, settings.width, 50))
+        # as is the profiler overlay, which is also cleared away once profiling is turned off
+        if settings.profiler_hud.rect is not None:
+            dirty.append(settings.profiler_hud.rect)
+            settings.profiler_hud.rect = None
+        dirty = [rect.clip(screen_rect) for rect in dirty]
+
+        # put the board back under the changed areas, then draw everything that sits on top of it
+        for rect in dirty:
+            settings.screen.blit(layers.walls, rect, rect)
+            settings.screen.blit(layers.dots, rect, rect)
+        draw_power_ups(settings, layers)
+        if profiler is not None:
+            profiler.mark("draw_level")
+        draw_sprites(game, settings)
+        if profiler is not None:
+            profiler.mark("draw_sprites")
+        if hud_changed:
+            draw_misc(game.player, settings)
+
+        dirty += [rect.clip(screen_rect) for rect in sprite_rects(game)]
+        if profiler is not None:
+            profiler.mark("draw_misc")
+            dirty.append(settings.profiler_hud.draw(settings, profiler))
+            profiler.mark("hud")
+        pygame.display.update(dirty)
+        if profiler is not None:
+            profiler.mark("flip")
+
+    tracker.layers = layers
+    tracker.sprite_rects = sprite_rects(game)
+    tracker.score = settings.score
+    tracker.lives = game.player.lives
+
+
+class ProfilerHud:
+    """The frame profiler's rolling percentiles, drawn over the top left corner of the game. The table is only
+    rendered again a few times a second and blitted from 'surface' in between, so showing it costs about one blit a
+    frame. 'rect' is the area it was last drawn in (None if it wasn't drawn on the last frame)"""
+
+    def __init__(self):
+        self.font = pygame.font.Font("freesansbold.ttf", 12)
+        self.surface = None
+        self.rendered_frame = 0
+        self.rect = None
+
+    # Draws the table onto the screen (rendering it again if it is due) and returns the area it covers
+    def draw(self, settings, profiler):
+        if self.surface is None or profiler.frame - self.rendered_frame >= settings.fps // 4:
+            self.render(profiler)
+            self.rendered_frame = profiler.frame
+        self.rect = settings.screen.blit(self.surface, (5, 5))
+        return self.rect
+
+    # Renders the percentiles of each phase - a row per phase, with the whole frame last
+    def render(self, profiler):
+        rows = [("phase", "p50", "p95", "p99")]
+        for phase, p50, p95, p99, _ in profiler.summary():
+            rows.append((phase, f"{p50:.2f}", f"{p95:.2f}", f"{p99:.2f}"))
+        line_height = self.font.get_linesize()
+        self.surface = pygame.Surface((250, line_height * len(rows) + 8), pygame.SRCALPHA)
+        self.surface.fill((0, 0, 0, 190))
+        # the phase name left aligned, the times (in ms) right aligned in their columns
+        for row, values in enumerate(rows):
+            y = 4 + row * line_height
+            self.surface.blit(self.font.render(values[0], True, "white"), (6, y))
+            for column, value in enumerate(values[1:]):
+                text = self.font.render(value, True, "yellow" if row else "white")
+                self.surface.blit(text, (150 + column * 45 - text.get_width(), y))
+
+
+class LevelLayers:
+    """Cached surfaces the game board is drawn from, built once per level. 'walls' holds the black background, walls
+    and ghost gate, which never change. 'dots' holds the small dots over a colorkey background and has a dot erased
+    whenever one is eaten. Power-ups blink, so they are blitted from 'power_up' each frame they are visible"""
+
+    def __init__(self, settings):
+        self.level = settings.level
+
+        self.walls = pygame.Surface((settings.width, settings.height)).convert()
+        self.walls.fill("black")
+        self.dots = pygame.Surface((settings.width, settings.height)).convert()
+        self.dots.fill("black")
+        self.dots.set_colorkey("black")
+        self.power_up = pygame.Surface((settings.width // 30, (settings.height - 50) // 33)).convert()
+        self.power_up.fill("black")
+        self.power_up.set_colorkey("black")
+        draw_tile(self.power_up, settings, 0, 0, 2)
+
+        # (row, column) of the power-ups that haven't been eaten yet
+        self.power_ups = []
+        for cell, value in enumerate(settings.level.cells):
+            i, j = divmod(cell, settings.level.cols)
+            if value == 1:
+                draw_tile(self.dots, settings, i, j, value)
+            elif value == 2:
+                self.power_ups.append((i, j))
+            elif value >= 3:
+                draw_tile(self.walls, settings, i, j, value)
+
+    # Removes the dots/power-ups the game logic reported as eaten during the last frame
+    def erase_cleared_cells(self, settings):
+        num1 = ((settings.height - 50) // 33)
+        num2 = (settings.width // 30)
+        for i, j in settings.cleared_cells:
+            self.dots.fill("black", (j * num2, i * num1, num2, num1))
+            if (i, j) in self.power_ups:
+                self.power_ups.remove((i, j))
+
+
+# Returns the level's cached layers, building them when a new level has been loaded and erasing eaten dots
+def update_level_layers(settings):
+    if settings.level_layers is None or settings.level_layers.level is not settings.level:
+        settings.level_layers = LevelLayers(settings)
+    settings.level_layers.erase_cleared_cells(settings)
+    return settings.level_layers
+
+
+# Draws the game board from the level's cached layers
+def draw_level(settings):
+    layers = update_level_layers(settings)
+    settings.screen.blit(layers.walls, (0, 0))
+    settings.screen.blit(layers.dots, (0, 0))
+    draw_power_ups(settings, layers)
+
+
+# Draws the power-ups that haven't been eaten, when they are blinked on
+def draw_power_ups(settings, layers):
+    if settings.counter > settings.fps // 2:
+        num1 = ((settings.height - 50) // 33)
+        num2 = (settings.width // 30)
+        for i, j in layers.power_ups:
+            settings.screen.blit(layers.power_up, (j * num2, i * num1))
+
+
+# Draws the grid value for a single cell of the game board (values from 'Levels.py') onto 'surface'
+def draw_tile(surface, settings, i, j, value):
+    num1 = ((settings.height - 50) // 33)
+    num2 = (settings.width // 30)
+
+    # Draw a small circle if a 1 (small dot)
+    if value == 1:
+        pygame.draw.circle(surface, "white", (j * num2 + (.5 * num2), i * num1 + (.5 * num1)), 4)
+
+    # Draw a larger circle if a 2 (power-up)
+    if value == 2:
+        pygame.draw.circle(surface, "white", (j * num2 + (.5 * num2), i * num1 + (.5 * num1)), 10)
+
+    # Draw a white horizontal line if a 3 (Ghost door)
+    if value == 3:
+        pygame.draw.line(surface, "white", (j * num2, i * num1 + (.5 * num1)),
+                         (j * num2 + num2, i * num1 + (.5 * num1)), settings.line_width)
+
+    # Draw vertical line if a 4 (wall)
+    if value == 4:
+        pygame.draw.line(surface, settings.level_color, (j * num2 + (.5 * num2), i * num1),
+                         (j * num2 + (.5 * num2), i * num1 + num1), settings.line_width)
+
+    # Draw a horizontal line if a 5 (wall)
+    if value == 5:
+        pygame.draw.line(surface, settings.level_color, (j * num2, i * num1 + (.5 * num1)),
+                         (j * num2 + num2, i * num1 + (.5 * num1)), settings.line_width)
+
+    # Draw the top right of a circle if a 6 (wall corner)
+    if value == 6:
+        pygame.draw.arc(surface, settings.level_color,
+                        ((j * num2 - (num2 * .5)), (i * num1 + (.5 * num1)), num2 + 2, num1),
+                        0, math.pi / 2.0, settings.line_width)
+
+    # Draw the top left of a circle if a 7 (wall corner)
+    if value == 7:
+        pygame.draw.arc(surface, settings.level_color,
+                        ((j * num2 + (num2 * .5)), (i * num1 + (.5 * num1)), num2, num1),
+                        math.pi / 2, math.pi, settings.line_width)
+
+    # Draw the bottom left of a circle if an 8 (wall corner)
+    if value == 8:
+        pygame.draw.arc(surface, settings.level_color,
+                        ((j * num2 + (num2 * .5)), (i * num1 - (.5 * num1)), num2, num1 + 2),
+                        math.pi, 3 * math.pi / 2.0, settings.line_width)
+
+    # Draw the bottom right of a circle (wall corner)
+    if value == 9:
+        pygame.draw.arc(surface, settings.level_color,
+                        ((j * num2 - (num2 * .5)), (i * num1 - (.5 * num1)), num2 + 2, num1 + 2),
+                        3 * math.pi / 2.0, 2 * math.pi, settings.line_width - 1)
+
+
+# Draws misc items on the screen, such as game over/won pop-ups, lives remaining, and the current score
+def draw_misc(player, settings):
+    # Display the score
+    score_text = settings.font.render(f"Score: {settings.score}", True, "white")
+    settings.screen.blit(score_text, (10, 845))
+
+    # Display the amount of remaining lives
+    for i in range(player.lives):
+        settings.screen.blit(settings.sprites.surface, (625 + i * 40, 835), settings.sprites.life)
+
+    if settings.game_lost:
+        pygame.draw.rect(settings.screen, settings.level_color, [50, 225, 650, 250], 0, 10)
+        pygame.draw.rect(settings.screen, "black", [75, 250, 600, 200], 0, 10)
+        game_lost_text = settings.font.render("Game Over! Press Enter to play again!", True, "white")
+        settings.screen.blit(game_lost_text, (175, 325))
+
+    if settings.game_won:
+        pygame.draw.rect(settings.screen, settings.level_color, [50, 225, 650, 250], 0, 10)
+        pygame.draw.rect(settings.screen, "black", [75, 250, 600, 200], 0, 10)
+        game_won_text = settings.font.render("You Won! Press Enter to go to next level!", True, "white")
+        settings.screen.blit(game_won_text, (175, 325))
+
+
+# Command line options - 'python PacmanGame.py --record game.rec' records the game to a file,
+# 'python PacmanGame.py --replay game.rec' plays a recorded game back, and 'python PacmanGame.py --profile' shows how
+# long each part of a frame takes ('--trace' and '--timeline-csv' write out the timings of every frame).
+# '--pathfinding-stats stats.json' measures the work done by each ghost's pathfinding, '--swarm 100' adds 100
+# ghosts to the game and '--dirty-rects' switches to the renderer that only redraws what changed
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Pacman")
+    parser.add_argument("--record", help="file to record the game to")
+    parser.add_argument("--replay", help="recorded game to play back")
+    parser.add_argument("--profile", action="store_true", help="start with the frame profiler on (F3 toggles it)")
+    parser.add_argument("--trace", help="file to write the profiled frames to as a Chrome trace (starts the "
+                                        "profiler)")
+    parser.add_argument("--timeline-csv", help="file to write the profiled frames to as CSV (starts the profiler)")
+    parser.add_argument("--pathfinding-stats", help="file to write the ghosts' pathfinding statistics to as JSON")
+    parser.add_argument("--swarm", type=int, default=0, help="number of extra ghosts to add to the classic four")
+    parser.add_argument("--dirty-rects", action="store_true", help="only redraw the parts of the window that changed "
+                                                                   "each frame")
+    arguments = parser.parse_args()
+    # recordings only hold the settings of a classic game
+    if arguments.swarm and (arguments.record or arguments.replay):
+        parser.error("--swarm can't be combined with --record or --replay")
+    return (arguments.record, arguments.replay, arguments.profile, arguments.trace, arguments.timeline_csv,
+            arguments.pathfinding_stats, arguments.swarm, arguments.dirty_rects)
+
+
+if __name__ == "__main__":
+    # Initial call to main game loop
+    main(*parse_arguments())
+
+    # Closing pygame module
+    pygame.quit()
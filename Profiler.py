@@ -0,0 +1,109 @@
+import csv
+import json
+from collections import deque
+from time import perf_counter_ns
+
+# Per-phase frame timing. The code being timed calls 'mark(phase)' as each phase of a frame ends, and the time since
+# the previous mark is put down to that phase - so timing a frame costs one clock read per phase, and nothing at all
+# where the profiler is turned off ('settings.profiler' is None, which every mark checks first). The game logic marks
+# its phases inside 'Game.step' (timers, player, ghost_targets, ghosts) and the front end marks the rest of the frame.
+
+
+class FrameProfiler:
+    """Times each phase of every frame between 'begin_frame' and 'end_frame', keeping the last 'window' frames of
+    each phase for rolling percentiles. With 'record' every mark is also kept in 'timeline' as (frame, phase, start,
+    duration) in nanoseconds, for export as a Chrome trace ('write_chrome_trace', open it in chrome://tracing or
+    Perfetto) or a CSV with one row per frame ('write_csv')"""
+
+    def __init__(self, window=300, record=False):
+        self.window = window
+        # phase -> durations of the phase over the last 'window' frames, in order of the phases first being marked
+        self.history = dict()
+        self.frames = deque(maxlen=window)
+        self.current = dict()
+        self.timeline = [] if record else None
+        self.frame = 0
+        self.frame_start = 0
+        self.last = 0
+
+    # Starts timing a new frame
+    def begin_frame(self):
+        self.frame_start = self.last = perf_counter_ns()
+
+    # Ends the current phase
+    def mark(self, phase):
+        now = perf_counter_ns()
+        duration = now - self.last
+        self.current[phase] = self.current.get(phase, 0) + duration
+        if self.timeline is not None:
+            self.timeline.append((self.frame, phase, self.last, duration))
+        self.last = now
+
+    # Ends the frame - anything after the last mark is put down to 'other'
+    def end_frame(self):
+        self.mark("other")
+        for phase in self.current:
+            if phase not in self.history:
+                self.history[phase] = deque(maxlen=self.window)
+        # phases that didn't run this frame took no time
+        for phase, durations in self.history.items():
+            durations.append(self.current.get(phase, 0))
+        self.frames.append(self.last - self.frame_start)
+        self.current.clear()
+        self.frame += 1
+
+    # Returns [(phase, 50th, 95th and 99th percentile, mean)] in milliseconds over the last 'window' frames, ending
+    # with the whole frame
+    def summary(self):
+        rows = []
+        for phase, durations in list(self.history.items()) + [("frame", self.frames)]:
+            if not durations:
+                continue
+            ordered = sorted(durations)
+            rows.append((phase, percentile(ordered, 50) / 1e6, percentile(ordered, 95) / 1e6,
+                         percentile(ordered, 99) / 1e6, sum(ordered) / len(ordered) / 1e6))
+        return rows
+
+    # Returns the summary as a printable table
+    def report(self):
+        lines = [f"{'phase':16}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'mean ms':>9}"]
+        for phase, p50, p95, p99, mean in self.summary():
+            lines.append(f"{phase:16}{p50:>9.3f}{p95:>9.3f}{p99:>9.3f}{mean:>9.3f}")
+        lines.append(f"(over the last {len(self.frames)} of {self.frame} frames)")
+        return "\n".join(lines)
+
+    # Writes the recorded timeline as a Chrome trace (JSON trace event format) - one event per frame, and the phases
+    # of the frame nested under it
+    def write_chrome_trace(self, path):
+        events = []
+        frame_starts = dict()
+        frame_ends = dict()
+        for frame, phase, start, duration in self.timeline or ():
+            frame_starts.setdefault(frame, start)
+            frame_ends[frame] = start + duration
+            events.append({"name": phase, "cat": "phase", "ph": "X", "ts": start / 1000, "dur": duration / 1000,
+                           "pid": 1, "tid": 1, "args": {"frame": frame}})
+        for frame, start in frame_starts.items():
+            events.append({"name": "frame", "cat": "frame", "ph": "X", "ts": start / 1000,
+                           "dur": (frame_ends[frame] - start) / 1000, "pid": 1, "tid": 1, "args": {"frame": frame}})
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+    # Writes the recorded timeline as a CSV - a row per frame with its start time and the milliseconds spent in each
+    # phase
+    def write_csv(self, path):
+        phases = list(self.history)
+        rows = dict()
+        for frame, phase, start, duration in self.timeline or ():
+            row = rows.setdefault(frame, {"frame": frame, "start_ms": start / 1e6, "frame_ms": 0.0})
+            row[phase] = row.get(phase, 0.0) + duration / 1e6
+            row["frame_ms"] += duration / 1e6
+        with open(path, "w", newline="") as file:
+            writer = csv.DictWriter(file, ["frame", "start_ms", "frame_ms"] + phases, restval=0.0)
+            writer.writeheader()
+            writer.writerows(rows.values())
+
+
+# Value at 'percent' percent of the way through the sorted list 'ordered' (nearest rank)
+def percentile(ordered, percent):
+    return ordered[min(len(ordered) - 1, len(ordered) * percent // 100)]
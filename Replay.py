@@ -0,0 +1,221 @@
+import hashlib
+import struct
+import sys
+import time
+import GameLogic
+import LevelPack
+import Levels
+
+# Recording and replaying games. The game logic has no randomness and no clock of its own - a game is decided by the
+# settings it starts with and the input given to each 'Game.step' - so a game is recorded as just its settings and
+# the ticks its input changed on, and replaying that input reproduces it tick for tick. Replays can run rendered in
+# the front end ('python PacmanGame.py --replay <file>') or headless at full speed ('python Replay.py <file>'). Hashes
+# of the game state are recorded every HASH_INTERVAL ticks and at the end, and checked during a replay, so a replay
+# that drifts from the original game is caught at the first checkpoint it fails.
+#
+# Log layout (all numbers little-endian):
+#   header   magic, digest of the levels played (see 'LevelPack.levels_digest'), starting level id, fps, ghost
+#            pathfinding mode, player speed, ghost speed, power-up duration (seconds), death duration (frames), and
+#            the number of ticks between state hashes
+#   records  (kind, tick) followed by the record's data - INPUT: the direction command given from that tick on
+#            (0-3) or ENTER, HASH: the state hash after that tick, END: the final score and state hash, once the
+#            recording has been closed
+
+MAGIC = b"PACREC1\0"
+HEADER = struct.Struct("<8s20sHH16sHHHHH")
+RECORD = struct.Struct("<BI")
+INPUT, HASH, END = range(3)
+INPUT_DATA = struct.Struct("<B")
+HASH_DATA = struct.Struct("<8s")
+END_DATA = struct.Struct("<q8s")
+# Input record value of a press of enter
+ENTER = 255
+
+# Ticks between the state hashes recorded in a log
+HASH_INTERVAL = 60
+
+
+# Digest of the levels a game is played on - the level pack's, or that of the built-in levels
+def levels_digest(settings):
+    if settings.level_pack is not None:
+        return settings.level_pack.digest
+    return LevelPack.levels_digest(Levels.level_layouts, Levels.level_colors)
+
+
+# Returns an 8 byte hash of everything in the game that decides how it carries on - positions, directions, timers,
+# flags, paths, score and the tiles left on the level
+def state_hash(game):
+    player, blinky, inky, pinky, clyde, settings = game.entities()
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(struct.pack("<9q", player.actual_x, player.actual_y, player.direction, player.direction_command,
+                              player.lives, player.eaten_ghosts, settings.score, settings.level_id,
+                              settings.counter))
+    digest.update(struct.pack("<5q3?", settings.power_counter, settings.startup_counter, settings.death_counter,
+                              settings.player_speed, settings.ghost_speed, settings.power_up, settings.game_lost,
+                              settings.game_won))
+    digest.update(settings.state.encode())
+    for ghost in (blinky, inky, pinky, clyde):
+        digest.update(struct.pack("<3q2?", ghost.x_actual, ghost.y_actual, ghost.speed, ghost.dead, ghost.been_eaten))
+        for x, y in ghost.path or ():
+            digest.update(struct.pack("<2h", x, y))
+        digest.update(b"\xff")
+    digest.update(settings.level.cells)
+    return digest.digest()
+
+
+class Recorder:
+    """Records a game to the log file at 'path' as it is played - call 'step' in place of 'game.step', and 'close'
+    once the game is over. The header is written straight away, from the game's settings as they are before its
+    first tick"""
+
+    def __init__(self, path, game, hash_interval=HASH_INTERVAL):
+        self.game = game
+        self.hash_interval = hash_interval
+        self.tick = 0
+        self.direction_command = None
+        settings = game.settings
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, levels_digest(settings), settings.level_id, settings.fps,
+                                    settings.ghost_pathfinding.encode(), settings.player_speed, settings.ghost_speed,
+                                    settings.power_up_duration, settings.death_duration, hash_interval))
+
+    # Advances the game by one frame, the same as 'Game.step', and logs the input if it changed
+    def step(self, direction_command=None, enter=False):
+        if direction_command is not None and direction_command != self.direction_command:
+            self.direction_command = direction_command
+            self.file.write(RECORD.pack(INPUT, self.tick) + INPUT_DATA.pack(direction_command))
+        if enter:
+            self.file.write(RECORD.pack(INPUT, self.tick) + INPUT_DATA.pack(ENTER))
+
+        self.game.step(direction_command, enter)
+        self.tick += 1
+        if self.tick % self.hash_interval == 0:
+            self.file.write(RECORD.pack(HASH, self.tick) + HASH_DATA.pack(state_hash(self.game)))
+
+    # Writes the final score and state and closes the log
+    def close(self):
+        self.file.write(RECORD.pack(END, self.tick) + END_DATA.pack(self.game.settings.score,
+                                                                     state_hash(self.game)))
+        self.file.close()
+
+
+class Replayer:
+    """A recorded game read back from the log file at 'path'. 'apply' sets a game's settings up the way the recording
+    started, then 'step' plays the recorded input into the game one tick at a time (until 'finished'), checking the
+    game against the recorded hashes. 'mismatch' is the first tick the game didn't match the recording on (None while
+    it does)"""
+
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            data = file.read()
+        (magic, self.digest, self.level_id, self.fps, pathfinding, self.player_speed, self.ghost_speed,
+         self.power_up_duration, self.death_duration, self.hash_interval) = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a game recording")
+        self.ghost_pathfinding = pathfinding.rstrip(b"\0").decode()
+
+        # input by tick, hashes by tick, and the (tick, score, hash) the recording ended on
+        self.inputs = dict()
+        self.hashes = dict()
+        self.end = None
+        position = HEADER.size
+        while position < len(data):
+            kind, tick = RECORD.unpack_from(data, position)
+            position += RECORD.size
+            if kind == INPUT:
+                self.inputs.setdefault(tick, []).append(INPUT_DATA.unpack_from(data, position)[0])
+                position += INPUT_DATA.size
+            elif kind == HASH:
+                self.hashes[tick] = HASH_DATA.unpack_from(data, position)[0]
+                position += HASH_DATA.size
+            elif kind == END:
+                self.end = (tick,) + END_DATA.unpack_from(data, position)
+                position += END_DATA.size
+            else:
+                raise ValueError(f"{path} has an unknown record at byte {position - RECORD.size}")
+
+        self.tick = 0
+        self.direction_command = None
+        self.mismatch = None
+
+    # Total ticks in the recording - those up to the last hash if the recording was never closed (the game crashed)
+    def __len__(self):
+        if self.end is not None:
+            return self.end[0]
+        return max(self.hashes, default=0)
+
+    # True once every recorded tick has been played
+    @property
+    def finished(self):
+        return self.tick >= len(self)
+
+    # Sets 'settings' up the way the recorded game started - before the Game is created from them. The levels must
+    # be the ones the game was recorded on
+    def apply(self, settings):
+        if levels_digest(settings) != self.digest:
+            raise ValueError("the recording was made on different levels")
+        settings.fps = self.fps
+        settings.ghost_pathfinding = self.ghost_pathfinding
+        settings.player_speed = self.player_speed
+        settings.ghost_speed = self.ghost_speed
+        settings.power_up_duration = self.power_up_duration
+        settings.death_duration = self.death_duration
+        if settings.level_id != self.level_id:
+            settings.level_id = self.level_id
+            GameLogic.load_level(settings)
+
+    # Returns the (direction_command, enter) recorded for the next tick
+    def next_input(self):
+        enter = False
+        for value in self.inputs.get(self.tick, ()):
+            if value == ENTER:
+                enter = True
+            else:
+                self.direction_command = value
+        return self.direction_command, enter
+
+    # Plays the next recorded tick into 'game', then checks it against the recording if there is a hash for the tick
+    def step(self, game):
+        game.step(*self.next_input())
+        self.tick += 1
+        expected = self.hashes.get(self.tick)
+        if self.end is not None and self.tick == self.end[0]:
+            expected = self.end[2]
+            if game.settings.score != self.end[1] and self.mismatch is None:
+                self.mismatch = self.tick
+        if expected is not None and state_hash(game) != expected and self.mismatch is None:
+            self.mismatch = self.tick
+
+
+# Replays the recording at 'path' headless, as fast as possible, on 'level_pack' (the pack of the built-in levels by
+# default). Returns the Replayer and the finished Game
+def replay_headless(path, level_pack=None):
+    replayer = Replayer(path)
+    settings = GameLogic.GameSettings(level_pack if level_pack is not None else LevelPack.load_cached_pack())
+    replayer.apply(settings)
+    game = GameLogic.Game(settings)
+    while not replayer.finished:
+        replayer.step(game)
+    return replayer, game
+
+
+def main(paths):
+    failed = 0
+    for path in paths:
+        start = time.perf_counter()
+        replayer, game = replay_headless(path)
+        elapsed = time.perf_counter() - start
+        if replayer.mismatch is not None:
+            result = f"MISMATCH at tick {replayer.mismatch}"
+            failed += 1
+        elif replayer.end is None:
+            result = "ok up to the last hash (the recording was never closed)"
+        else:
+            result = "ok"
+        print(f"{path}: {replayer.tick} ticks in {elapsed:.2f} s ({replayer.tick / max(elapsed, 1e-9):.0f} ticks/s), "
+              f"score {game.settings.score} - {result}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
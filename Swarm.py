@@ -0,0 +1,241 @@
+from array import array
+import GhostRules
+
+# Marks a swarm ghost with an empty path ('GhostSwarm.next_x') - the same as a classic ghost's path being []
+NO_PATH = -1
+
+
+class OccupancyIndex:
+    """Which ghosts are on which tile, so the collision checks look up the ghosts on pacman's tile instead of
+    comparing him with every ghost. Every ghost has an id - the classic ghosts are 0 to 3 (blinky, inky, pinky,
+    clyde) and swarm ghost n is 4 + n - and 'head[cell]' is the first ghost on a cell (-1 if none) and 'link[ghost]'
+    the next ghost on the same cell, in ascending id order. Ghosts off the grid (in the tunnels) aren't on any cell.
+    The index is only as current as its last 'rebuild'"""
+
+    def __init__(self):
+        self.head = array("i")
+        self.link = array("i")
+        # cell each ghost was put on by the last rebuild, -1 if it was off the grid
+        self.cells = array("i")
+        self.rows = 0
+        self.cols = 0
+
+    # Puts every ghost on the tile under its center - 'ghosts' are the classic ghosts and 'swarm' the
+    # 'GhostSwarm' playing with them (None if there is none)
+    def rebuild(self, ghosts, swarm, level):
+        count = len(ghosts) + (len(swarm) if swarm is not None else 0)
+        if self.rows != level.rows or self.cols != level.cols:
+            self.rows, self.cols = level.rows, level.cols
+            self.head = array("i", [-1]) * (self.rows * self.cols)
+        else:
+            # only the cells the ghosts were on can be taken
+            for cell in self.cells:
+                if cell >= 0:
+                    self.head[cell] = -1
+        if len(self.link) != count:
+            self.link = array("i", [-1]) * count
+            self.cells = array("i", [-1]) * count
+
+        # inserted from the highest id down, so each cell lists its ghosts in ascending order
+        if swarm is not None:
+            for ghost in range(len(swarm) - 1, -1, -1):
+                self.insert(len(ghosts) + ghost, swarm.x[ghost], swarm.y[ghost])
+        for ghost in range(len(ghosts) - 1, -1, -1):
+            self.insert(ghost, ghosts[ghost].x_center, ghosts[ghost].y_center)
+
+    # Puts ghost 'ghost' on the tile under the pixel (x, y)
+    def insert(self, ghost, x, y):
+        if 0 <= x < self.cols * 25 and 0 <= y < self.rows * 25:
+            cell = y // 25 * self.cols + x // 25
+            self.link[ghost] = self.head[cell]
+            self.head[cell] = ghost
+        else:
+            cell = -1
+        self.cells[ghost] = cell
+
+    # Returns the ids of the ghosts on the tile in row 'i', column 'j'
+    def on_tile(self, i, j):
+        ghosts = []
+        if 0 <= i < self.rows and 0 <= j < self.cols:
+            ghost = self.head[i * self.cols + j]
+            while ghost >= 0:
+                ghosts.append(ghost)
+                ghost = self.link[ghost]
+        return ghosts
+
+
+class GhostSwarm:
+    """Any number of extra ghosts, held as a struct of arrays - one compact array per field, indexed by ghost number,
+    instead of an object per ghost. Swarm ghost n plays the role of the classic ghost it starts with
+    ('GhostRules.GHOST_NAMES[n % 4]'): it chases pacman with that ghost's target, flees to that ghost's corner while
+    he has a power-up, and returns to the ghost box to respawn once eaten. It moves with its strategy ('strategy', see
+    'GhostRules.A_STAR_ONE', 'A_STAR_TWO' and 'GREEDY') by the same rules as the classic ghosts (see 'GhostRules.py')
+    - the A* ghosts pick their next tile at tile centers while pacman is in bounds, and the greedy ghosts move like
+    clyde. Only the next tile of a path is kept, since that is all a ghost ever follows.
+
+    The swarm's ghosts are in the game's occupancy index ('settings.ghost_index') along with the classic ghosts.
+    Ghosts bunch up (they all start on four tiles and chase the same targets), so each frame's path lookups are
+    memoized by (tile, target tile, heuristic), and clyde's moves by position, target and speed - a crowd on one tile
+    costs a single search"""
+
+    def __init__(self, settings, count, strategies=None):
+        self.settings = settings
+        self.count = count
+        if strategies is None:
+            strategies = [GhostRules.GHOST_STRATEGIES[ghost % 4] for ghost in range(count)]
+        self.strategy = bytearray(strategies)
+        # center pixel of each ghost, and of the next tile on its path (NO_PATH if it has none)
+        self.x = array("h", bytes(2 * count))
+        self.y = array("h", bytes(2 * count))
+        self.next_x = array("h", [NO_PATH]) * count
+        self.next_y = array("h", [NO_PATH]) * count
+        self.speed = bytearray(count)
+        self.dead = bytearray(count)
+        self.been_eaten = bytearray(count)
+        # dead ghosts whose path ran out (back in the box) - respawned by 'GameLogic.check_collisions' once pacman
+        # isn't on their tile
+        self.waiting = set()
+        # (tile, goal tile, heuristic one) -> next tile, and (x, y, target, pixels) -> where clyde's moves end up,
+        # for the frame being moved
+        self.memo = dict()
+        self.reset()
+
+    def __len__(self):
+        return self.count
+
+    # Puts every ghost back on its spawn tile at normal speed, with no path
+    def reset(self):
+        settings = self.settings
+        for ghost in range(self.count):
+            x, y = settings.spawns[1 + ghost % 4]
+            self.x[ghost] = (settings.width // 30) * x + 13
+            self.y[ghost] = ((settings.height - 50) // 33) * y + 13
+            self.speed[ghost] = settings.ghost_speed
+        self.next_x[:] = array("h", [NO_PATH]) * self.count
+        self.next_y[:] = array("h", [NO_PATH]) * self.count
+        self.dead[:] = bytes(self.count)
+        self.been_eaten[:] = bytes(self.count)
+        self.waiting.clear()
+
+    # Slows every ghost that isn't dead down when pacman picks up a power-up, the same as the classic ghosts
+    def start_power_up(self):
+        settings = self.settings
+        speed = settings.ghost_speed - 2 if settings.ghost_speed - 2 > 1 else 1
+        self.been_eaten[:] = bytes(self.count)
+        for ghost in range(self.count):
+            if not self.dead[ghost]:
+                self.speed[ghost] = speed
+
+    # Back to normal speed when the power-up runs out
+    def end_power_up(self):
+        self.been_eaten[:] = bytes(self.count)
+        self.speed[:] = bytes([self.settings.ghost_speed]) * self.count
+
+    # Pacman eats 'ghost' - like clyde, greedy ghosts switch to A* (heuristic two) right away to return to the box
+    def eat(self, ghost):
+        self.been_eaten[ghost] = 1
+        self.dead[ghost] = 1
+        self.speed[ghost] = self.settings.ghost_speed
+        if self.strategy[ghost] == GhostRules.GREEDY:
+            self.update_path(ghost, GhostRules.ghost_box_target(self.settings), False)
+        elif self.next_x[ghost] == NO_PATH:
+            self.waiting.add(ghost)
+
+    # Sets the next tile of 'ghost' on its way to the pixel 'target', picked with the pathfinding mode chosen in the
+    # settings - shared by every ghost on the same tile heading for the same tile this frame
+    def update_path(self, ghost, target, use_heuristic_one):
+        nav = self.settings.nav
+        start = nav.index((self.x[ghost] // 25, self.y[ghost] // 25))
+        goal = nav.index((target[0] // 25, target[1] // 25))
+        next_tile = None
+        if start is not None and goal is not None:
+            key = (start, goal, use_heuristic_one)
+            if key in self.memo:
+                next_tile = self.memo[key]
+            else:
+                next_tile = self.memo[key] = GhostRules.next_tile(self.settings, start, goal, use_heuristic_one)
+
+        if next_tile is None:
+            self.next_x[ghost] = self.next_y[ghost] = NO_PATH
+            if self.dead[ghost]:
+                self.waiting.add(ghost)
+        else:
+            x, y = nav.tile(next_tile)
+            self.next_x[ghost], self.next_y[ghost] = x * 25 + 13, y * 25 + 13
+            self.waiting.discard(ghost)
+
+    # Moves every ghost by its speed in pixels - 'chase' are the targets of the four roles (see
+    # 'GhostRules.chase_targets'), 'corners' their flee targets and 'box' the center of the ghost box.
+    # 'player_in_bounds' is False while pacman is in the tunnels, which keeps the A* ghosts on their current paths
+    def move(self, chase, corners, box, player_in_bounds):
+        settings = self.settings
+        self.memo.clear()
+        for ghost in range(self.count):
+            role = ghost % 4
+            target = GhostRules.ghost_target(chase[role], corners[role], box, settings.power_up, self.dead[ghost],
+                                             self.been_eaten[ghost])
+            strategy = self.strategy[ghost]
+            if strategy != GhostRules.GREEDY:
+                self.follow_path(ghost, target, self.speed[ghost], strategy == GhostRules.A_STAR_ONE,
+                                 player_in_bounds, False)
+            elif self.dead[ghost]:
+                # back to the box with A* (heuristic two), the path updated every pixel like clyde's
+                self.follow_path(ghost, target, self.speed[ghost], False, False, True)
+            else:
+                self.move_greedy(ghost, target, self.speed[ghost])
+
+    # Moves 'ghost' 'pixels' pixels along its path to 'target'. The path is updated at tile centers if 'at_centers',
+    # or before every run of pixels if 'every_pixel' (see 'Ghost.follow_path' and clyde's way back to the box)
+    def follow_path(self, ghost, target, pixels, use_heuristic_one, at_centers, every_pixel):
+        x, y, next_x, next_y = self.x, self.y, self.next_x, self.next_y
+        while pixels > 0:
+            if every_pixel or at_centers and x[ghost] % 25 == 13 and y[ghost] % 25 == 13:
+                self.update_path(ghost, target, use_heuristic_one)
+            if next_x[ghost] == NO_PATH:
+                return
+            run = GhostRules.path_run(x[ghost], y[ghost], next_x[ghost], next_y[ghost], pixels, at_centers,
+                                      every_pixel)
+            direction = GhostRules.path_direction(x[ghost], y[ghost], next_x[ghost], next_y[ghost])
+            if direction is not None:
+                x[ghost] += GhostRules.STEP_X[direction] * run
+                y[ghost] += GhostRules.STEP_Y[direction] * run
+            pixels -= run
+
+    # Moves 'ghost' 'pixels' pixels closer to 'target' with clyde's greedy movement
+    def move_greedy(self, ghost, target, pixels):
+        key = (self.x[ghost], self.y[ghost], target, pixels)
+        if key in self.memo:
+            self.x[ghost], self.y[ghost] = self.memo[key]
+            return
+
+        x, y = self.x[ghost], self.y[ghost]
+        while pixels > 0:
+            valid_directions = GhostRules.greedy_directions(x - 13, y - 13, self.settings)
+            direction = GhostRules.greedy_direction(x, y, target, valid_directions)
+            if direction is None:
+                break
+            if direction < 2:
+                run = GhostRules.greedy_run(direction, x - 13, abs(target[0] - x), pixels)
+            else:
+                run = GhostRules.greedy_run(direction, y - 13, abs(target[1] - y), pixels)
+            x += GhostRules.STEP_X[direction] * run
+            y += GhostRules.STEP_Y[direction] * run
+            pixels -= run
+        self.x[ghost], self.y[ghost] = self.memo[key] = x, y
+
+    # Returns the state of every ghost as bytes, for 'Game.save'
+    def save(self):
+        return (self.x.tobytes(), self.y.tobytes(), self.next_x.tobytes(), self.next_y.tobytes(),
+                bytes(self.speed), bytes(self.dead), bytes(self.been_eaten))
+
+    # Puts back the state returned by 'save'
+    def restore(self, state):
+        x, y, next_x, next_y, speed, dead, been_eaten = state
+        self.x = array("h", x)
+        self.y = array("h", y)
+        self.next_x = array("h", next_x)
+        self.next_y = array("h", next_y)
+        self.speed[:] = speed
+        self.dead[:] = dead
+        self.been_eaten[:] = been_eaten
+        self.waiting = {ghost for ghost in range(self.count) if dead[ghost] and self.next_x[ghost] == NO_PATH}
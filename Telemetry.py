@@ -0,0 +1,236 @@
+import json
+from time import perf_counter_ns
+import Navigation
+
+# Pathfinding telemetry - how much work each ghost's pathfinding does under real gameplay. Set 'settings.telemetry'
+# to a PathfindingTelemetry and every path a ghost picks (see 'Ghost.update_path') is timed and measured: the tiles
+# the search expanded, the largest its frontier got, and the length of the path next to the shortest possible one
+# (from the level's routing table). Clyde's greedy movement has no search, so each frame of it is timed instead, and
+# it counts as a search when he picks a new direction - on reaching a tile center or a new tile, where the A* ghosts
+# replan. Every tile he steps onto is checked against the routing table - a step that doesn't bring him closer to his
+# target is a step off the shortest path. Everything is kept per ghost and per level, as totals and power-of-two
+# histograms. With 'settings.telemetry' left at None (the default) none of this runs.
+
+# Number of histogram buckets - bucket n counts the values v with v.bit_length() == n, so bucket 0 holds zeros and
+# bucket n > 0 holds [2 ** (n - 1), 2 ** n)
+BUCKETS = 40
+
+
+class SearchStats:
+    """Totals and histograms of the paths one ghost picked on one level. 'searches' counts every path update (the
+    ghost replanning at a tile center) and 'methods' splits them by the pathfinding that answered - 'a_star',
+    'incremental', 'routing_table', 'flow_field', or 'greedy' for clyde picking a direction at a tile center or on a
+    new tile. Path lengths are only known for full searches (A* and incremental), lookups only return the next
+    tile"""
+
+    def __init__(self):
+        self.searches = 0
+        self.methods = dict()
+        self.frames = 0
+        self.expanded = 0
+        self.expanded_histogram = [0] * BUCKETS
+        self.frontier_peak = 0
+        self.frontier_histogram = [0] * BUCKETS
+        self.time_ns = 0
+        self.time_histogram = [0] * BUCKETS
+        # searches that returned a path, the summed lengths of those paths and of the shortest paths, and how many
+        # of them were longer than the shortest path
+        self.paths = 0
+        self.path_tiles = 0
+        self.optimal_tiles = 0
+        self.suboptimal_paths = 0
+        self.unreachable = 0
+        # tiles clyde stepped onto, and how many of those steps brought him closer to his target
+        self.greedy_steps = 0
+        self.greedy_progress = 0
+        # frames of greedy movement, and the time spent on all of them (searches or not)
+        self.greedy_frames = 0
+        self.greedy_time_ns = 0
+
+    # Adds the totals and histograms of 'other' to these
+    def merge(self, other):
+        self.searches += other.searches
+        for method, count in other.methods.items():
+            self.methods[method] = self.methods.get(method, 0) + count
+        self.frames += other.frames
+        self.expanded += other.expanded
+        self.frontier_peak = max(self.frontier_peak, other.frontier_peak)
+        self.time_ns += other.time_ns
+        for name in ("expanded_histogram", "frontier_histogram", "time_histogram"):
+            histogram = getattr(self, name)
+            for bucket, count in enumerate(getattr(other, name)):
+                histogram[bucket] += count
+        self.paths += other.paths
+        self.path_tiles += other.path_tiles
+        self.optimal_tiles += other.optimal_tiles
+        self.suboptimal_paths += other.suboptimal_paths
+        self.unreachable += other.unreachable
+        self.greedy_steps += other.greedy_steps
+        self.greedy_progress += other.greedy_progress
+        self.greedy_frames += other.greedy_frames
+        self.greedy_time_ns += other.greedy_time_ns
+
+    # Returns the statistics as a dict of plain values (what 'write_json' writes). 'fps' turns frames into seconds
+    # of play for the replan rate
+    def summary(self, fps):
+        seconds = self.frames / fps
+        return {"searches": self.searches, "methods": dict(self.methods), "frames": self.frames,
+                "replans_per_second": self.searches / seconds if seconds else None,
+                "mean_expanded": self.expanded / self.searches if self.searches else 0.0,
+                "expanded_histogram": trimmed(self.expanded_histogram),
+                "max_frontier": self.frontier_peak,
+                "frontier_histogram": trimmed(self.frontier_histogram),
+                "mean_search_us": self.time_ns / self.searches / 1000 if self.searches else 0.0,
+                "total_search_ms": self.time_ns / 1e6,
+                "search_ns_histogram": trimmed(self.time_histogram),
+                "paths": self.paths, "unreachable": self.unreachable,
+                "path_vs_optimal": self.path_tiles / self.optimal_tiles if self.optimal_tiles else None,
+                "suboptimal_paths": self.suboptimal_paths,
+                "greedy_steps": self.greedy_steps,
+                "greedy_progress": self.greedy_progress / self.greedy_steps if self.greedy_steps else None,
+                "greedy_frames": self.greedy_frames,
+                "mean_greedy_frame_us": self.greedy_time_ns / self.greedy_frames / 1000 if self.greedy_frames else 0.0}
+
+
+class PathfindingTelemetry:
+    """Collects SearchStats for every (ghost, level id) as the game is played - attach it as 'settings.telemetry'.
+    'stats(ghost)' returns a ghost's statistics over every level (or over one, with 'level_id'), 'summary' all of
+    them as plain dicts, 'report' a printable table and 'write_json' dumps the summary to a file. 'fps' is the
+    frame rate the game runs at, which turns frames into seconds for the replans per second"""
+
+    def __init__(self, fps=60):
+        self.fps = fps
+        self.entries = dict()
+        # frames played on each level, and the tile each ghost was last seen on by 'record_greedy', per (ghost, level
+        # id) - tile indexes belong to the level's graph
+        self.frames = dict()
+        self.last_tiles = dict()
+        # [expanded, frontier peak] filled in by the search being measured
+        self.search = [0, 0]
+
+    # SearchStats of 'ghost' (a name) on 'level_id', created on first use
+    def entry(self, ghost, level_id):
+        key = (ghost, level_id)
+        if key not in self.entries:
+            self.entries[key] = SearchStats()
+        return self.entries[key]
+
+    # Counts a frame of play on 'level_id' - called once per 'Game.step'
+    def count_frame(self, level_id):
+        self.frames[level_id] = self.frames.get(level_id, 0) + 1
+
+    # Updates 'ghost's path through 'ghost.find_path', measuring the search
+    def measure_search(self, ghost, use_heuristic_one):
+        settings = ghost.settings
+        nav = settings.nav
+        start = nav.index((ghost.x_center // 25, ghost.y_center // 25))
+        goal = nav.index((ghost.target[0] // 25, ghost.target[1] // 25))
+        search = self.search
+        search[0] = search[1] = 0
+
+        begin = perf_counter_ns()
+        method = ghost.find_path(use_heuristic_one, search)
+        duration = perf_counter_ns() - begin
+
+        stats = self.entry(ghost.name, settings.level_id)
+        stats.searches += 1
+        stats.methods[method] = stats.methods.get(method, 0) + 1
+        stats.expanded += search[0]
+        stats.expanded_histogram[min(search[0].bit_length(), BUCKETS - 1)] += 1
+        stats.frontier_peak = max(stats.frontier_peak, search[1])
+        stats.frontier_histogram[min(search[1].bit_length(), BUCKETS - 1)] += 1
+        stats.time_ns += duration
+        stats.time_histogram[min(duration.bit_length(), BUCKETS - 1)] += 1
+
+        if method not in ("a_star", "incremental") or start is None or goal is None:
+            return
+        optimal = settings.routing_table().get_distance(start, goal)
+        if optimal == Navigation.UNREACHABLE:
+            stats.unreachable += 1
+        else:
+            stats.paths += 1
+            stats.path_tiles += len(ghost.path)
+            stats.optimal_tiles += optimal
+            stats.suboptimal_paths += len(ghost.path) > optimal
+
+    # Records one frame of greedy movement by 'ghost' that took 'duration' nanoseconds - a search if it reached a tile
+    # center during the frame ('at_center') or is on a different tile than last frame - and whether the tile it moved
+    # onto (if it changed tile) is closer to its target than the one it left. Only moves to a neighboring tile are
+    # steps - jumps (back to the spawn tile after a reset, or from where its A* took it while it was dead) are not
+    def record_greedy(self, ghost, duration, at_center):
+        settings = ghost.settings
+        stats = self.entry(ghost.name, settings.level_id)
+        stats.greedy_frames += 1
+        stats.greedy_time_ns += duration
+
+        nav = settings.nav
+        tile = nav.index((ghost.x_center // 25, ghost.y_center // 25))
+        key = (ghost.name, settings.level_id)
+        last = self.last_tiles.get(key)
+        self.last_tiles[key] = tile
+        if at_center or tile != last:
+            stats.searches += 1
+            stats.methods["greedy"] = stats.methods.get("greedy", 0) + 1
+            stats.expanded_histogram[0] += 1
+            stats.frontier_histogram[0] += 1
+            stats.time_ns += duration
+            stats.time_histogram[min(duration.bit_length(), BUCKETS - 1)] += 1
+
+        goal = nav.index((ghost.target[0] // 25, ghost.target[1] // 25))
+        if tile == last or tile is None or last is None or goal is None or tile not in nav.neighbors[last]:
+            return
+        routes = settings.routing_table()
+        stats.greedy_steps += 1
+        stats.greedy_progress += routes.get_distance(tile, goal) < routes.get_distance(last, goal)
+
+    # SearchStats of 'ghost' on 'level_id', or merged over every level if None
+    def stats(self, ghost, level_id=None):
+        merged = SearchStats()
+        for (name, level), stats in self.entries.items():
+            if name == ghost and level_id in (None, level):
+                merged.merge(stats)
+                merged.frames += self.frames.get(level, 0)
+        return merged
+
+    # Returns {ghost: {"total": summary, "levels": {level id: summary}}} for every ghost that picked a path
+    def summary(self):
+        result = dict()
+        for ghost in sorted({name for name, _ in self.entries}, key=str):
+            levels = {level: self.stats(ghost, level).summary(self.fps)
+                      for name, level in sorted(self.entries, key=lambda key: key[1]) if name == ghost}
+            result[ghost] = {"total": self.stats(ghost).summary(self.fps), "levels": levels}
+        return result
+
+    # Returns the totals of every ghost as a printable table
+    def report(self):
+        lines = [f"{'ghost':8}{'method':22}{'searches':>10}{'/s':>7}{'expanded':>10}{'max open':>10}{'us':>8}"
+                 f"{'vs best':>9}"]
+        for ghost, summary in self.summary().items():
+            total = summary["total"]
+            methods = ", ".join(sorted(total["methods"]))
+            rate = f"{total['replans_per_second']:.1f}" if total["replans_per_second"] is not None else "-"
+            if total["path_vs_optimal"] is not None:
+                ratio = f"{total['path_vs_optimal']:.3f}"
+            elif total["greedy_progress"] is not None:
+                ratio = f"{total['greedy_progress']:.0%}"
+            else:
+                ratio = "-"
+            lines.append(f"{str(ghost):8}{methods:22}{total['searches']:>10}{rate:>7}{total['mean_expanded']:>10.1f}"
+                         f"{total['max_frontier']:>10}{total['mean_search_us']:>8.1f}{ratio:>9}")
+        lines.append("(expanded - mean tiles per search, us - mean microseconds per search, vs best - path length over "
+                     "the shortest path, or for greedy moves the share of steps that got closer)")
+        return "\n".join(lines)
+
+    # Writes the summary to the file at 'path' as JSON
+    def write_json(self, path):
+        with open(path, "w") as file:
+            json.dump({"fps": self.fps, "histogram_buckets": "bucket n counts values v with v.bit_length() == n",
+                       "ghosts": self.summary()}, file, indent=2)
+
+
+# A histogram without its empty buckets at the end
+def trimmed(histogram):
+    end = len(histogram)
+    while end and not histogram[end - 1]:
+        end -= 1
+    return histogram[:end]
@@ -0,0 +1,484 @@
+import numpy as np
+import GameLogic
+import GhostRules
+import Levels
+import Navigation
+
+# Many games of pacman stepped at once. Where 'GameLogic.Game' keeps one Pacman and four Ghost objects per game, a
+# VectorGame keeps every game's positions, directions, speeds, flags, timers and tiles in NumPy arrays with one row
+# per game, and applies each rule of 'GameLogic' to all of the games with array operations. The rules are the same,
+# down to the order pixels are moved and collisions are checked in, so game 'n' of a VectorGame goes through exactly
+# the same frames as a Game with its ghosts on the 'routing_table' pathfinding mode, given the same input. Needs NumPy
+
+# Game states, as indices into STATES (the names 'settings.state' uses)
+STARTING, PLAYING, DYING, GAME_OVER, LEVEL_WON = range(5)
+STATES = (GameLogic.STARTING, GameLogic.PLAYING, GameLogic.DYING, GameLogic.GAME_OVER, GameLogic.LEVEL_WON)
+
+# Ghosts, as indices into the second axis of the ghost arrays - also the order collisions are checked in
+BLINKY, INKY, PINKY, CLYDE = range(4)
+GHOSTS = ("blinky", "inky", "pinky", "clyde")
+
+# One pixel step along x and y for each direction - right, left, up, down
+STEP_X = np.array([1, -1, 0, 0])
+STEP_Y = np.array([0, 0, -1, 1])
+
+
+class VectorGame:
+    """'count' games of pacman, stepped together by 'step'. 'level_ids' is the level each game starts on (one for
+    all of them, or one per game), read from 'level_pack' (a 'LevelPack.LevelPack') if one is given, otherwise from
+    the layouts in 'Levels.py'. Every level is loaded up front and all levels must be the same size. The state of
+    game 'n' is row 'n' of the arrays - positions are the top left corner of pacman / each ghost ('actual_x' and
+    'actual_y' in GameLogic, the center is 13 pixels further), and 'cells' holds each game's tiles as in
+    'Levels.LevelGrid'. Sound events aren't kept, but 'caught_by' has the index of the ghost that caught pacman
+    during the last step (-1 if none did)"""
+
+    def __init__(self, count, level_ids=0, level_pack=None, player_speed=4, ghost_speed=None, death_duration=0):
+        self.count = count
+        self.level_pack = level_pack
+        # the same settings as GameSettings (and the same fixed 30 x 33 tile grid of 25 pixel tiles)
+        self.width = 750
+        self.height = 875
+        self.fps = 60
+        self.power_up_duration = 8
+        self.player_speed = player_speed
+        self.ghost_speed = ghost_speed if ghost_speed is not None else player_speed - 1
+        self.death_duration = death_duration
+        self.load_levels()
+
+        self.games = np.arange(count)
+        self.start_level = np.broadcast_to(np.asarray(level_ids), (count,)).copy()
+        # per game settings / level
+        self.level_id = np.zeros(count, np.int32)
+        self.cells = np.zeros((count, self.size), np.uint8)
+        self.dots_left = np.zeros(count, np.int32)
+        self.score = np.zeros(count, np.int64)
+        self.state = np.zeros(count, np.int8)
+        self.startup_counter = np.zeros(count, np.int32)
+        self.death_counter = np.zeros(count, np.int32)
+        self.counter = np.zeros(count, np.int32)
+        self.power_up = np.zeros(count, bool)
+        self.power_counter = np.zeros(count, np.int32)
+        self.game_lost = np.zeros(count, bool)
+        self.game_won = np.zeros(count, bool)
+        self.caught_by = np.full(count, -1, np.int8)
+        # pacman
+        self.player_x = np.zeros(count, np.int32)
+        self.player_y = np.zeros(count, np.int32)
+        self.direction = np.zeros(count, np.int8)
+        self.direction_command = np.zeros(count, np.int8)
+        self.valid_directions = np.zeros((count, 4), bool)
+        self.lives = np.zeros(count, np.int32)
+        self.eaten_ghosts = np.zeros(count, np.int32)
+        # ghosts - one column per ghost. The path is the one tile a routing table lookup gives (see
+        # 'Ghost.route_lookup'), 'has_path' is False where the path is empty
+        self.ghost_x = np.zeros((count, 4), np.int32)
+        self.ghost_y = np.zeros((count, 4), np.int32)
+        self.target_x = np.zeros((count, 4), np.int32)
+        self.target_y = np.zeros((count, 4), np.int32)
+        self.speed = np.zeros((count, 4), np.int32)
+        self.dead = np.zeros((count, 4), bool)
+        self.been_eaten = np.zeros((count, 4), bool)
+        self.path_x = np.zeros((count, 4), np.int32)
+        self.path_y = np.zeros((count, 4), np.int32)
+        self.has_path = np.zeros((count, 4), bool)
+        self.clyde_directions = np.zeros((count, 4), bool)
+        self.reset()
+
+    # Reads every level into stacked arrays - the tiles, which of them block pacman / the ghosts, the top left corner
+    # pacman and each ghost start on ('spawn_x[l]' and 'spawn_y[l]', pacman first), and the routing tables, all
+    # levels' next hops in one flat array (level 'l' starting at 'hop_base[l]', indexed as in 'Navigation.RoutingTable'
+    # with 'node_ids[l]' in place of 'nav.node_id')
+    def load_levels(self):
+        if self.level_pack is None:
+            grids = Levels.level_grids
+            navigation = [None] * len(grids)
+            spawns = [Levels.DEFAULT_SPAWNS] * len(grids)
+        else:
+            levels = [self.level_pack.level(level_id) for level_id in range(len(self.level_pack))]
+            grids = [level.grid for level in levels]
+            navigation = [level.navigation() for level in levels]
+            spawns = [level.spawns for level in levels]
+        self.level_count = len(grids)
+        self.rows, self.cols = grids[0].rows, grids[0].cols
+        self.size = self.rows * self.cols
+        if any((grid.rows, grid.cols) != (self.rows, self.cols) for grid in grids):
+            raise ValueError("every level of a VectorGame must be the same size")
+        # the board is laid out in pixels the same as GameLogic's, which only fits levels the size of the window
+        if (self.cols, self.rows) != (self.width // 25, (self.height - 50) // 25):
+            raise ValueError(f"levels must be {self.width // 25} x {(self.height - 50) // 25} tiles to fit the board")
+
+        # target of a dead ghost (the ghost box), and the corners each ghost flees to from a powered-up pacman - the
+        # same rules as the Game's (see 'GhostRules.py')
+        self.box_target = GhostRules.ghost_box_target(self)
+        corners = GhostRules.flee_targets(self)
+        self.corners_x = np.array([x for x, _ in corners])
+        self.corners_y = np.array([y for _, y in corners])
+
+        self.templates = np.array([np.frombuffer(grid.template, np.uint8) for grid in grids])
+        self.tile_flags = np.frombuffer(Levels.tile_flags, np.uint8)
+        flags = self.tile_flags[self.templates]
+        self.blocked = flags & GameLogic.PLAYER_BLOCKED != 0
+        self.walls = flags & Levels.WALL != 0
+        self.template_dots = np.count_nonzero(flags & (Levels.DOT | Levels.POWER_UP), axis=1)
+        self.spawn_x = np.array([[x * 25 for x, _ in level_spawns] for level_spawns in spawns])
+        self.spawn_y = np.array([[y * 25 for _, y in level_spawns] for level_spawns in spawns])
+
+        self.node_ids = np.full((self.level_count, self.size), -1, np.int32)
+        self.node_counts = np.zeros(self.level_count, np.int64)
+        self.hop_base = np.zeros(self.level_count, np.int64)
+        hops = []
+        for level, grid in enumerate(grids):
+            nav, routes = navigation[level] or (None, None)
+            if nav is None:
+                nav = Navigation.NavGraph(grid)
+            if routes is None:
+                routes = Navigation.RoutingTable(nav)
+            self.node_ids[level] = nav.node_id
+            self.node_counts[level] = len(nav.nodes)
+            self.hop_base[level] = sum(len(table) for table in hops)
+            hops.append(np.frombuffer(routes.next_hop, np.uint8))
+        self.next_hops = np.concatenate(hops).astype(np.int8)
+        self.next_hops[np.concatenate(hops) == Navigation.NO_ROUTE] = -1
+
+    # Starts a new game in every game selected by 'mask' (all of them by default), on its starting level
+    def reset(self, mask=None):
+        mask = np.ones(self.count, bool) if mask is None else np.asarray(mask, bool)
+        self.level_id[mask] = self.start_level[mask]
+        self.load_level(mask)
+        self.score[mask] = 0
+        self.state[mask] = STARTING
+        self.startup_counter[mask] = 0
+        self.death_counter[mask] = 0
+        self.counter[mask] = 0
+        self.power_up[mask] = False
+        self.power_counter[mask] = 0
+        self.game_lost[mask] = False
+        self.game_won[mask] = False
+        self.caught_by[mask] = -1
+        self.reset_player(mask)
+        self.direction_command[mask] = 0
+        self.valid_directions[mask] = False
+        self.lives[mask] = 3
+        self.eaten_ghosts[mask] = 0
+        self.reset_ghosts(mask)
+        self.target_x[mask] = 0
+        self.target_y[mask] = 0
+        self.has_path[mask] = False
+        self.clyde_directions[mask] = False
+
+    # Puts the tiles of level 'level_id' back in place (every dot uneaten) in the games selected by 'mask'
+    def load_level(self, mask):
+        self.cells[mask] = self.templates[self.level_id[mask]]
+        self.dots_left[mask] = self.template_dots[self.level_id[mask]]
+
+    # Sends pacman back to the start in the games selected by 'mask'
+    def reset_player(self, mask):
+        self.player_x[mask] = self.spawn_x[self.level_id[mask], 0]
+        self.player_y[mask] = self.spawn_y[self.level_id[mask], 0]
+        self.direction[mask] = 0
+
+    # Sets ghosts back to default settings / positions in the games selected by 'mask'
+    def reset_ghosts(self, mask):
+        self.ghost_x[mask] = self.spawn_x[self.level_id[mask], 1:]
+        self.ghost_y[mask] = self.spawn_y[self.level_id[mask], 1:]
+        self.speed[mask] = self.ghost_speed
+        self.dead[mask] = False
+        self.been_eaten[mask] = False
+
+    # Loading next level on game win/loss in the games selected by 'mask' - what pressing enter does
+    def press_enter(self, mask):
+        lost = mask & self.game_lost
+        won = mask & ~self.game_lost & self.game_won
+        self.level_id[lost] = -1
+        self.lives[lost] = 3
+        self.score[lost] = 0
+        self.level_id[won & (self.level_id >= self.level_count - 1)] = -1
+        self.load_next_level(lost | won)
+
+    # resets the game board to the next appropriate level on a game win/loss
+    def load_next_level(self, mask):
+        self.level_id[mask] += 1
+        self.load_level(mask)
+        self.game_lost[mask] = False
+        self.game_won[mask] = False
+        self.reset_player(mask)
+        self.power_up[mask] = False
+        self.power_counter[mask] = self.fps * self.power_up_duration
+        self.startup_counter[mask] = 0
+        self.state[mask] = STARTING
+        self.reset_ghosts(mask)
+
+    # Advances every game by one frame. 'direction_commands' holds the direction held in each game (0-3, right/left/
+    # up/down - negative leaves the previous command in place) and 'enter' whether enter was pressed in each game.
+    # Either can be left out, and either can be a single value for all games - the same as 'Game.step' for each game
+    def step(self, direction_commands=None, enter=None):
+        count = self.count
+        self.caught_by[:] = -1
+        if enter is not None:
+            self.press_enter(np.broadcast_to(np.asarray(enter, bool), (count,)))
+        if direction_commands is not None:
+            commands = np.broadcast_to(np.asarray(direction_commands), (count,))
+            given = commands >= 0
+            self.direction_command[given] = commands[given]
+
+        # moving player to other side when they go off-screen through the side hallways
+        off_right = self.player_x - 10 > self.width
+        off_left = ~off_right & (self.player_x - 10 < -50)
+        self.player_x[off_right] = -37
+        self.player_x[off_left] = self.width + 7
+
+        # start-up pause timer for beginning/end of the game, and the timer for the death sequence
+        self.state[(self.state == STARTING) & (self.startup_counter >= self.fps * 5)] = PLAYING
+        self.startup_counter[self.state == STARTING] += 1
+        dying = self.state == DYING
+        self.death_counter[dying] += 1
+        self.finish_player_death(dying & (self.death_counter >= self.death_duration))
+        playing = self.state == PLAYING
+
+        # counter for animations / flicker
+        self.counter = np.where(self.counter < self.fps, self.counter + 1, 0)
+
+        # timer for when a powerup is picked up - and resetting settings when the power-up ends
+        duration = self.fps * self.power_up_duration
+        running = self.power_up & (self.power_counter < duration)
+        ended = self.power_up & ~running
+        self.power_counter[running] += 1
+        self.power_counter[ended] = 0
+        self.power_up[ended] = False
+        self.eaten_ghosts[ended] = 0
+        self.been_eaten[ended] = False
+        self.speed[ended] = self.ghost_speed
+
+        # Player movement - one pixel for each count of player speed, with a collision check after every pixel
+        for _ in range(self.player_speed):
+            valid = self.player_directions()
+            self.valid_directions[playing] = valid[playing]
+            turning = playing & valid[self.games, self.direction_command]
+            self.direction[turning] = self.direction_command[turning]
+            moving = playing & ~self.game_lost & ~self.game_won & (self.state != DYING)
+            stepping = moving & valid[self.games, self.direction]
+            self.player_x += STEP_X[self.direction] * stepping
+            self.player_y += STEP_Y[self.direction] * stepping
+            self.check_collisions(moving)
+
+        # Ghost movement
+        self.update_ghost_targets()
+        moving = playing & (self.state != DYING)
+        column = (self.player_x + 13) // 25
+        player_in_bounds = (0 <= column) & (column < self.cols)
+        # blinky, inky and pinky update their path whenever they line up with a tile center (and pacman is in bounds)
+        for ghost in (BLINKY, INKY, PINKY):
+            for pixel in range(self.speed[:, ghost].max(initial=0)):
+                ghost_moving = moving & (pixel < self.speed[:, ghost])
+                centered = (self.ghost_x[:, ghost] % 25 == 0) & (self.ghost_y[:, ghost] % 25 == 0)
+                self.route_lookup(ghost, ghost_moving & player_in_bounds & centered)
+                self.path_move(ghost, ghost_moving)
+        # clyde moves greedily towards his target, unless he is dead and heads back to the ghost box along a route
+        for pixel in range(self.speed[:, CLYDE].max(initial=0)):
+            ghost_moving = moving & (pixel < self.speed[:, CLYDE])
+            alive = ghost_moving & ~self.dead[:, CLYDE]
+            self.clyde_directions[alive] = self.update_clyde_directions()[alive]
+            self.move_clyde(alive)
+            self.route_lookup(CLYDE, ghost_moving & self.dead[:, CLYDE])
+            self.path_move(CLYDE, ghost_moving & self.dead[:, CLYDE])
+
+    # (count, 4) array of which adjacent cells pacman can move to in each game (see 'Pacman.update_valid_directions')
+    def player_directions(self):
+        x, y = self.player_x, self.player_y
+        i = y // 25
+        j = x // 25
+        out_of_bounds = (j < 1) | (j > 28)
+        cell = np.where(out_of_bounds, 0, i * self.cols + j)
+        blocked = self.blocked
+        level = self.level_id
+        x_aligned = x % 25 == 0
+        y_aligned = y % 25 == 0
+        valid = np.empty((self.count, 4), bool)
+        valid[:, 3] = ~blocked[level, cell + self.cols] & x_aligned
+        valid[:, 2] = (~blocked[level, cell - self.cols] & x_aligned) | ((self.direction == 2) & (y > i * 25))
+        valid[:, 0] = ~blocked[level, cell + 1] & y_aligned
+        valid[:, 1] = (~blocked[level, cell - 1] & y_aligned) | ((self.direction == 1) & (x > j * 25))
+        valid[out_of_bounds] = (True, True, False, False)
+        return valid
+
+    # (count, 4) array of the directions clyde can move in in each game (see 'Ghost.update_valid_clyde_directions')
+    def update_clyde_directions(self):
+        x, y = self.ghost_x[:, CLYDE], self.ghost_y[:, CLYDE]
+        i = y // 25
+        j = x // 25
+        out_of_bounds = (j < 1) | (j > 28)
+        cell = np.where(out_of_bounds, self.cols, i * self.cols + j)
+        walls = self.walls
+        level = self.level_id
+        x_aligned = x % 25 == 0
+        y_aligned = y % 25 == 0
+        valid = np.empty((self.count, 4), bool)
+        valid[:, 3] = ~walls[level, cell + self.cols] & x_aligned
+        valid[:, 2] = (~walls[level, cell - self.cols] & x_aligned) | (y > i * 25)
+        valid[:, 0] = ~walls[level, cell + 1] & y_aligned
+        valid[:, 1] = (~walls[level, cell - 1] & y_aligned) | (x > j * 25)
+        valid[out_of_bounds] = (True, True, False, False)
+        return valid
+
+    # Moves clyde one pixel closer to his target in the games selected by 'mask' (see 'Ghost.move_clyde')
+    def move_clyde(self, mask):
+        x, y = self.ghost_x[:, CLYDE], self.ghost_y[:, CLYDE]
+        target_x, target_y = self.target_x[:, CLYDE], self.target_y[:, CLYDE]
+        valid = self.clyde_directions
+        up = target_y < y + 13
+        right = target_x > x + 13
+        left = target_x < x + 13
+        down = target_y > y + 13
+        direction = np.select([up & valid[:, 2], right & valid[:, 0], left & valid[:, 1], down & valid[:, 3]],
+                              [2, 0, 1, 3], -1)
+        moving = mask & (direction >= 0)
+        self.ghost_x[:, CLYDE] += STEP_X[direction] * moving
+        self.ghost_y[:, CLYDE] += STEP_Y[direction] * moving
+
+    # Sets the path of 'ghost' to the next tile of a shortest route to its target in the games selected by 'mask',
+    # looked up in the routing tables (see 'Ghost.route_lookup')
+    def route_lookup(self, ghost, mask):
+        if not mask.any():
+            return
+        games = np.flatnonzero(mask)
+        level = self.level_id[games]
+        x = (self.ghost_x[games, ghost] + 13) // 25
+        y = (self.ghost_y[games, ghost] + 13) // 25
+        goal_x = self.target_x[games, ghost] // 25
+        goal_y = self.target_y[games, ghost] // 25
+        on_grid = ((0 <= x) & (x < self.cols) & (0 <= y) & (y < self.rows) &
+                   (0 <= goal_x) & (goal_x < self.cols) & (0 <= goal_y) & (goal_y < self.rows))
+        start = np.where(on_grid, x * self.rows + y, 0)
+        goal = np.where(on_grid, goal_x * self.rows + goal_y, 0)
+        start_node = self.node_ids[level, start]
+        goal_node = self.node_ids[level, goal]
+        routed = on_grid & (start_node >= 0) & (goal_node >= 0)
+        hop = self.hop_base[level] + goal_node * self.node_counts[level] + start_node
+        direction = np.where(routed, self.next_hops[np.where(routed, hop, 0)], -1)
+
+        found = direction >= 0
+        self.has_path[games, ghost] = found
+        self.path_x[games, ghost] = x + STEP_X[direction] * found
+        self.path_y[games, ghost] = y + STEP_Y[direction] * found
+
+    # Moves 'ghost' one pixel towards the first tile of its path in the games selected by 'mask' (see
+    # 'Ghost.a_star_move')
+    def path_move(self, ghost, mask):
+        moving = mask & self.has_path[:, ghost]
+        step_x = np.sign(self.path_x[:, ghost] * 25 - self.ghost_x[:, ghost])
+        step_y = np.where(step_x == 0, np.sign(self.path_y[:, ghost] * 25 - self.ghost_y[:, ghost]), 0)
+        self.ghost_x[:, ghost] += step_x * moving
+        self.ghost_y[:, ghost] += step_y * moving
+
+    # Updates the ghosts targets in every game (see 'GameLogic.update_ghost_targets')
+    def update_ghost_targets(self):
+        center_x = self.player_x + 13
+        center_y = self.player_y + 13
+        walls = self.walls
+        level = self.level_id
+        self.target_x[:] = center_x[:, None]
+        self.target_y[:] = center_y[:, None]
+
+        # inky targets in-between blinky and pacman - unless the tile the check looks at is a wall (the check reads
+        # the same flat index as GameLogic, out of bounds or not)
+        middle_x = (self.ghost_x[:, BLINKY] + 13 + center_x) // 2
+        middle_y = (self.ghost_y[:, BLINKY] + 13 + center_y) // 2
+        right_out, down_out = middle_x // 25 > 28, middle_y // 25 > 28
+        blocked = right_out | down_out | walls[level, down_out * self.cols + right_out]
+        self.target_x[:, INKY] = np.where(blocked, center_x, middle_x)
+        self.target_y[:, INKY] = np.where(blocked, center_y, middle_y)
+
+        # pinky targets 4 tiles ahead of pacman, unless that is out of bounds or a wall
+        ahead_x = center_x + 100 * STEP_X[self.direction]
+        ahead_y = center_y + 100 * STEP_Y[self.direction]
+        column, row = ahead_x // 25, ahead_y // 25
+        out = np.choose(self.direction, [column > 28, column < 1, row < 1, row > 28])
+        blocked = out | walls[level, (row * self.cols + column) % self.size]
+        self.target_x[:, PINKY] = np.where(blocked, center_x, ahead_x)
+        self.target_y[:, PINKY] = np.where(blocked, center_y, ahead_y)
+
+        # fleeing to a corner while pacman has a power-up, back to the ghost box when dead
+        fleeing = self.power_up[:, None] & ~self.been_eaten
+        self.target_x[:] = np.where(fleeing, self.corners_x, self.target_x)
+        self.target_y[:] = np.where(fleeing, self.corners_y, self.target_y)
+        self.target_x[self.dead] = self.box_target[0]
+        self.target_y[self.dead] = self.box_target[1]
+
+    # Performs all collision checks in the games selected by 'mask', such as getting a dot or power-up, or colliding
+    # with a ghost (see 'GameLogic.check_collisions')
+    def check_collisions(self, mask):
+        if not mask.any():
+            return
+        center_x = self.player_x + 13
+        j = center_x // 25
+        i = (self.player_y + 13) // 25
+        in_bounds = mask & (0 < center_x) & (center_x < self.width)
+        rows = self.games
+        cell = np.where(in_bounds, i * self.cols + j, 0)
+        flags = self.tile_flags[self.cells[rows, cell]]
+
+        dot = in_bounds & (flags & Levels.DOT != 0)
+        power = in_bounds & (flags & Levels.POWER_UP != 0)
+        eaten = dot | power
+        self.cells[rows[eaten], cell[eaten]] = 0
+        self.dots_left -= eaten
+        self.score += 10 * dot + 50 * power
+
+        # power-up picked up - the ghosts that aren't dead are slowed down by 2, but to no less than 1
+        self.power_up |= power
+        self.power_counter[power] = 0
+        self.eaten_ghosts[power] = 0
+        self.been_eaten[power] = False
+        slowed = power[:, None] & ~self.dead
+        self.speed[slowed] = self.ghost_speed - 2 if self.ghost_speed - 2 > 1 else 1
+
+        # Check if all dots are gone
+        won = in_bounds & (self.dots_left <= 0)
+        self.game_won |= won
+        self.state[won] = LEVEL_WON
+
+        # collisions with each ghost, in order - a ghost that is caught is eaten, any other catches pacman
+        for ghost in range(4):
+            hit = (in_bounds & (i == (self.ghost_y[:, ghost] + 13) // 25) &
+                   (j == (self.ghost_x[:, ghost] + 13) // 25))
+            caught = hit & self.power_up & ~self.been_eaten[:, ghost]
+            self.eaten_ghosts[caught] += 1
+            self.score[caught] += 200 * 2 ** self.eaten_ghosts[caught]
+            self.been_eaten[caught, ghost] = True
+            self.dead[caught, ghost] = True
+            self.speed[caught, ghost] = self.ghost_speed
+            if ghost == CLYDE and caught.any():
+                # switch to a route back to the box
+                self.update_ghost_targets()
+                self.route_lookup(CLYDE, caught)
+            self.player_death(hit & ~caught & ~self.dead[:, ghost], ghost)
+
+        # Check if ghosts have made it back to their target in the box, and aren't currently colliding with pacman
+        on_ghost = (i[:, None] == (self.ghost_y + 13) // 25) & (j[:, None] == (self.ghost_x + 13) // 25)
+        self.dead[mask[:, None] & self.dead & ~self.has_path & ~on_ghost] = False
+
+    # Starts the death sequence in the games selected by 'mask', where pacman was caught by 'ghost'
+    def player_death(self, mask, ghost):
+        mask = mask & (self.state != DYING) & (self.state != GAME_OVER) & (self.state != STARTING)
+        self.caught_by[mask] = ghost
+        self.state[mask] = DYING
+        self.death_counter[mask] = 0
+        if self.death_duration <= 0:
+            self.finish_player_death(mask)
+
+    # End of the death sequence - takes a life and resets the level, or ends the game if no extra lives remaining
+    def finish_player_death(self, mask):
+        if not mask.any():
+            return
+        self.lives[mask] -= 1
+        over = mask & (self.lives < 0)
+        self.game_lost[over] = True
+        self.state[over] = GAME_OVER
+        self.startup_counter[over] = 0
+
+        reset = mask & ~over
+        self.state[reset] = STARTING
+        self.startup_counter[reset] = 0
+        self.power_up[reset] = False
+        self.reset_player(reset)
+        self.reset_ghosts(reset)
@@ -0,0 +1,58 @@
+import LevelPack
+import Levels
+import MazeGenerator
+import Navigation
+
+
+# The built-in levels read back out of a pack are the levels they were written from - tiles, color and spawn tiles -
+# and their navigation (the graph and the routing table, used straight out of the pack) is what the level builds
+def test_pack_round_trip(tmp_path):
+    path = str(tmp_path / "levels.pack")
+    spawns = [LevelPack.DEFAULT_SPAWNS, ((1, 1), (2, 1), (3, 1), (4, 1), (5, 1)), ((15, 24),) * 5]
+    LevelPack.write_pack(path, Levels.level_layouts, Levels.level_colors, spawns)
+    pack = LevelPack.LevelPack(path)
+    assert len(pack) == len(Levels.level_layouts)
+    assert pack.digest == LevelPack.levels_digest(Levels.level_layouts, Levels.level_colors)
+
+    for level_id, layout in enumerate(Levels.level_layouts):
+        level = pack.level(level_id)
+        grid = Levels.LevelGrid(layout)
+        assert level.grid.template == grid.template
+        assert (level.grid.rows, level.grid.cols) == (grid.rows, grid.cols)
+        assert level.grid.count_dots() == grid.count_dots()
+        assert level.color == Levels.level_colors[level_id]
+        assert level.spawns == tuple(spawns[level_id])
+
+        nav, routes = level.navigation()
+        built = Navigation.NavGraph(grid)
+        built_routes = Navigation.RoutingTable(built)
+        assert nav.nodes == built.nodes
+        assert nav.neighbors == built.neighbors
+        assert list(routes.distance) == list(built_routes.distance)
+        assert bytes(routes.next_hop) == bytes(built_routes.next_hop)
+        # read once, then shared
+        assert pack.level(level_id) is level
+        assert level.navigation() == (nav, routes)
+
+
+# A pack written without routing tables (generated mazes, as 'generate_pack' writes them) has the same levels and
+# graphs, with no routing table
+def test_pack_without_routing_tables(tmp_path):
+    path = str(tmp_path / "mazes.pack")
+    layouts = MazeGenerator.generate_layouts(4, seed=7)
+    MazeGenerator.generate_pack(path, 4, seed=7)
+    pack = LevelPack.LevelPack(path)
+    assert len(pack) == len(layouts)
+
+    for level_id, layout in enumerate(layouts):
+        level = pack.level(level_id)
+        grid = Levels.LevelGrid(layout)
+        assert level.grid.template == grid.template
+        assert level.spawns == LevelPack.DEFAULT_SPAWNS
+        assert level.distance is None and level.next_hop is None
+
+        nav, routes = level.navigation()
+        built = Navigation.NavGraph(grid)
+        assert routes is None
+        assert nav.nodes == built.nodes
+        assert nav.neighbors == built.neighbors
@@ -0,0 +1,57 @@
+import random
+import pytest
+import Levels
+
+
+# The (row, column) of every tile of 'level' that still has a dot, or a dot or power-up if 'include_power_ups'
+def scan(level, include_power_ups=True):
+    kinds = Levels.DOT | Levels.POWER_UP if include_power_ups else Levels.DOT
+    return [(i, j) for i in range(level.rows) for j in range(level.cols)
+            if Levels.tile_flags[level.get(i, j)] & kinds]
+
+
+# Number of the tiles in 'tiles' in rows top to bottom - 1, columns left to right - 1
+def count_in(tiles, top, left, bottom, right):
+    return sum(1 for i, j in tiles if top <= i < bottom and left <= j < right)
+
+
+# As the dots of a level are eaten in a random order, the dot layer's counts, region counts and nearest dots match a
+# scan of the whole grid - nearest by distance, since several tiles can be equally close
+@pytest.mark.parametrize("level_id", range(len(Levels.level_grids)))
+def test_dot_layer_matches_grid_scan(level_id):
+    rng = random.Random(level_id)
+    level = Levels.level_grids[level_id].copy()
+    remaining = scan(level)
+    rng.shuffle(remaining)
+
+    while True:
+        tiles = scan(level)
+        dots = scan(level, False)
+        assert level.count_dots() == len(tiles)
+
+        middle_row, middle_column = level.rows // 2, level.cols // 2
+        assert level.dots.quadrant_counts() == (count_in(tiles, 0, 0, middle_row, middle_column),
+                                                count_in(tiles, 0, middle_column, middle_row, level.cols),
+                                                count_in(tiles, middle_row, 0, level.rows, middle_column),
+                                                count_in(tiles, middle_row, middle_column, level.rows, level.cols))
+        top, bottom = sorted(rng.randrange(level.rows + 1) for _ in range(2))
+        left, right = sorted(rng.randrange(level.cols + 1) for _ in range(2))
+        assert level.dots.count_in(top, left, bottom, right) == count_in(tiles, top, left, bottom, right)
+
+        # tiles off the grid (the side hallways) included
+        for _ in range(5):
+            i, j = rng.randrange(level.rows), rng.randrange(-2, level.cols + 2)
+            column = min(max(j, 0), level.cols - 1)
+            for include_power_ups, candidates in ((True, tiles), (False, dots)):
+                nearest = level.dots.nearest(i, j, include_power_ups)
+                if not candidates:
+                    assert nearest is None
+                    continue
+                assert nearest in candidates
+                assert (abs(nearest[0] - i) + abs(nearest[1] - column) ==
+                        min(abs(row - i) + abs(col - column) for row, col in candidates))
+
+        if not remaining:
+            break
+        i, j = remaining.pop()
+        level.clear(i * level.cols + j)
@@ -0,0 +1,44 @@
+import random
+import pytest
+import BatchRunner
+import GameLogic
+
+
+# State of everything that moves or scores in 'game'
+def state(game):
+    player, settings = game.player, game.settings
+    return ((player.actual_x, player.actual_y, player.direction, player.lives, settings.score, settings.state,
+             settings.level_id, bytes(settings.level.cells)) +
+            tuple((ghost.x_actual, ghost.y_actual, ghost.dead, ghost.speed) for ghost in game.ghosts))
+
+
+# Plays 'frames' frames of a seeded game at the given speeds, with pacman heading for the nearest dot, and returns
+# the state after each. The start-up pause is skipped to get more play out of the frames
+def play(frames, seed, player_speed, ghost_speed):
+    settings = GameLogic.GameSettings()
+    settings.player_speed = player_speed
+    settings.ghost_speed = ghost_speed
+    game = GameLogic.Game(settings)
+    policy = BatchRunner.DotPolicy(random.Random(seed))
+    states = []
+    for _ in range(frames):
+        if settings.state == GameLogic.STARTING:
+            settings.startup_counter = settings.fps * 5
+        game.step(policy(game), settings.game_won or settings.game_lost)
+        states.append(state(game))
+    return states
+
+
+# Moving pacman and the ghosts a straight run of pixels at a time plays exactly the same as moving them one pixel at
+# a time (every run cut down to a single pixel)
+@pytest.mark.parametrize("player_speed, ghost_speed", [(4, 3), (9, 7)])
+def test_straight_runs_match_single_pixels(monkeypatch, player_speed, ghost_speed):
+    runs = play(2000, 1, player_speed, ghost_speed)
+
+    monkeypatch.setattr(GameLogic.Pacman, "straight_run", lambda self, settings, limit: 0)
+    monkeypatch.setattr(GameLogic.Ghost, "path_run", lambda self, limit, at_centers, every_pixel: 1)
+    monkeypatch.setattr(GameLogic.Ghost, "greedy_run", lambda self, limit: 1)
+    pixels = play(2000, 1, player_speed, ghost_speed)
+
+    for frame, (expected, actual) in enumerate(zip(pixels, runs)):
+        assert actual == expected, f"frame {frame}"
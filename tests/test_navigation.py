@@ -0,0 +1,71 @@
+import random
+import pytest
+import GameLogic
+import Levels
+import Navigation
+import Telemetry
+
+
+# A* (both heuristics) between every pair of walkable tiles of the first level finds a path exactly as long as the
+# routing table's distance, made of neighboring tiles - or none where the table has no route
+@pytest.mark.parametrize("use_heuristic_one", [True, False])
+def test_a_star_paths_are_shortest(use_heuristic_one):
+    nav = Navigation.NavGraph(Levels.level_grids[0])
+    routes = Navigation.RoutingTable(nav)
+    for start in nav.nodes:
+        for goal in nav.nodes:
+            path = nav.a_star(start, goal, use_heuristic_one)
+            distance = routes.get_distance(start, goal)
+            if distance == Navigation.UNREACHABLE:
+                assert path is None
+                continue
+            assert len(path) == distance
+            previous = start
+            for tile in path:
+                assert tile in nav.neighbors[previous]
+                previous = tile
+            assert previous == goal
+
+
+# The incremental planner, following a ghost that moves along its own path while its goal wanders (a tile at a time,
+# with the odd jump), returns paths exactly as long as the routing table's distance
+@pytest.mark.parametrize("use_heuristic_one", [True, False])
+def test_incremental_paths_are_shortest(use_heuristic_one):
+    rng = random.Random(1)
+    nav = Navigation.NavGraph(Levels.level_grids[0])
+    routes = Navigation.RoutingTable(nav)
+    planner = Navigation.IncrementalPlanner(nav, use_heuristic_one)
+    tiles = [index for index in nav.nodes if nav.neighbors[index]]
+    start, goal = rng.choice(tiles), rng.choice(tiles)
+    for _ in range(3000):
+        path = planner.find_path(start, goal)
+        distance = routes.get_distance(start, goal)
+        if distance == Navigation.UNREACHABLE:
+            assert path is None
+        else:
+            assert len(path) == distance
+            if path:
+                start = path[0]
+        if rng.random() < 0.02:
+            goal = rng.choice(tiles)
+        elif rng.random() < 0.5:
+            step = rng.choice(nav.neighbors[goal])
+            goal = step if nav.neighbors[step] else goal
+        if rng.random() < 0.01:
+            start = rng.choice(tiles)
+
+
+# In a seeded game on the incremental pathfinding mode, the telemetry finds no path a ghost picked longer than the
+# shortest one
+def test_incremental_game_paths_are_shortest():
+    rng = random.Random(1)
+    settings = GameLogic.GameSettings()
+    settings.ghost_pathfinding = "incremental"
+    settings.telemetry = Telemetry.PathfindingTelemetry()
+    game = GameLogic.Game(settings)
+    for _ in range(3000):
+        game.step(rng.randrange(4) if rng.random() < 0.05 else None, settings.game_won or settings.game_lost)
+    for ghost in ("blinky", "inky", "pinky"):
+        stats = settings.telemetry.stats(ghost)
+        assert stats.methods.get("incremental", 0) > 0
+        assert stats.suboptimal_paths == 0
@@ -0,0 +1,73 @@
+import random
+import pytest
+import BatchRunner
+import GameLogic
+import LevelPack
+import Levels
+import Replay
+
+
+# The pack of the built-in levels, written once for the module's tests
+@pytest.fixture(scope="module")
+def level_pack(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("levels") / "levels.pack")
+    LevelPack.write_pack(path, Levels.level_layouts, Levels.level_colors)
+    return LevelPack.LevelPack(path)
+
+
+# Records 'frames' frames of a seeded game to 'path', with pacman heading for the nearest dot (pressing enter once
+# the game is over) and a state hash every tick. Returns the hash after each tick
+def record(path, frames, seed, ghost_pathfinding, level_id):
+    settings = GameLogic.GameSettings()
+    settings.ghost_pathfinding = ghost_pathfinding
+    settings.death_duration = 30
+    settings.level_id = level_id
+    GameLogic.load_level(settings)
+    game = GameLogic.Game(settings)
+    recorder = Replay.Recorder(path, game, hash_interval=1)
+    policy = BatchRunner.DotPolicy(random.Random(seed))
+    hashes = []
+    for _ in range(frames):
+        recorder.step(policy(game), settings.game_won or settings.game_lost)
+        hashes.append(Replay.state_hash(game))
+    recorder.close()
+    return hashes
+
+
+# Replaying a recording goes through exactly the states of the recorded game, tick for tick, on every pathfinding mode
+@pytest.mark.parametrize("ghost_pathfinding", ["a_star", "routing_table", "flow_field", "incremental"])
+def test_replay_matches_recording(tmp_path, level_pack, ghost_pathfinding):
+    path = str(tmp_path / "game.rec")
+    hashes = record(path, 2500, 1, ghost_pathfinding, 1)
+
+    replayer = Replay.Replayer(path)
+    assert len(replayer) == len(hashes)
+    settings = GameLogic.GameSettings(level_pack)
+    replayer.apply(settings)
+    assert (settings.level_id, settings.ghost_pathfinding) == (1, ghost_pathfinding)
+    game = GameLogic.Game(settings)
+    for tick, expected in enumerate(hashes):
+        replayer.step(game)
+        assert Replay.state_hash(game) == expected, f"tick {tick}"
+    assert replayer.finished
+    assert replayer.mismatch is None
+    assert game.settings.score == replayer.end[1]
+
+
+# A replay that drifts from the recording is caught - here pacman stops turning halfway through
+def test_replay_catches_drift(tmp_path, level_pack):
+    path = str(tmp_path / "game.rec")
+    hashes = record(path, 1200, 2, "a_star", 0)
+
+    replayer = Replay.Replayer(path)
+    replayer.inputs = {tick: inputs for tick, inputs in replayer.inputs.items() if tick < 600}
+    settings = GameLogic.GameSettings(level_pack)
+    replayer.apply(settings)
+    game = GameLogic.Game(settings)
+    drifted = None
+    while not replayer.finished:
+        replayer.step(game)
+        if drifted is None and Replay.state_hash(game) != hashes[replayer.tick - 1]:
+            drifted = replayer.tick
+    assert drifted is not None
+    assert replayer.mismatch == drifted
@@ -0,0 +1,78 @@
+import random
+import pytest
+import BatchRunner
+import GameLogic
+import Replay
+
+
+# Everything in 'game' that decides how it carries on, the swarm and the dots left included
+def state(game):
+    settings = game.settings
+    swarm = settings.swarm.save() if settings.swarm is not None else None
+    dots = settings.level.dots
+    return Replay.state_hash(game), swarm, dots.dots, dots.power_ups, dots.count, settings.level_id
+
+
+# A seeded game with pacman heading for the nearest dot, its start-up pause skipped
+def new_game(ghost_pathfinding, swarm_size):
+    settings = GameLogic.GameSettings()
+    settings.ghost_pathfinding = ghost_pathfinding
+    settings.swarm_size = swarm_size
+    settings.death_duration = 30
+    settings.startup_counter = settings.fps * 5
+    return GameLogic.Game(settings), BatchRunner.DotPolicy(random.Random(1))
+
+
+# The input the policy gives 'game' this frame
+def next_input(game, policy):
+    settings = game.settings
+    return policy(game), settings.game_won or settings.game_lost
+
+
+# Stepping a game from a restored snapshot with the same input goes through exactly the same states as the first
+# time - on the pathfinding modes whose searches are all saved, with and without a swarm
+@pytest.mark.parametrize("ghost_pathfinding", ["a_star", "routing_table", "flow_field"])
+@pytest.mark.parametrize("swarm_size", [0, 24])
+def test_restore_then_step_matches(ghost_pathfinding, swarm_size):
+    game, policy = new_game(ghost_pathfinding, swarm_size)
+    for _ in range(8):
+        snapshot = game.save()
+        saved = state(game)
+        inputs, states = [], []
+        for _ in range(250):
+            inputs.append(next_input(game, policy))
+            game.step(*inputs[-1])
+            states.append(state(game))
+
+        game.restore(snapshot)
+        assert state(game) == saved
+        for frame, (direction_command, enter) in enumerate(inputs):
+            game.step(direction_command, enter)
+            assert state(game) == states[frame], f"frame {frame}"
+
+
+# Rewinding through a SnapshotRing gives back the state the game was in that many ticks ago (or as far back as the
+# ring goes), and replaying the input from there comes back to the same states
+def test_snapshot_ring_rewinds():
+    game, policy = new_game("routing_table", 8)
+    ring = GameLogic.SnapshotRing(30)
+    inputs, states = [], []
+    for _ in range(1500):
+        ring.push(game)
+        states.append(state(game))
+        inputs.append(next_input(game, policy))
+        game.step(*inputs[-1])
+    states.append(state(game))
+    assert len(ring) == 30
+
+    for ticks in (1, 7, 40):
+        back = len(inputs) - min(ticks, len(ring))
+        assert ring.rewind(game, ticks)
+        assert state(game) == states[back]
+        for tick in range(back, len(inputs)):
+            ring.push(game)
+            game.step(*inputs[tick])
+            assert state(game) == states[tick + 1], f"tick {tick}"
+
+    ring.clear()
+    assert not ring.rewind(game)
@@ -0,0 +1,74 @@
+import random
+import pytest
+import BatchRunner
+import GameLogic
+import MazeGenerator
+import LevelPack
+
+np = pytest.importorskip("numpy")
+VectorGame = pytest.importorskip("VectorGame")
+
+
+# State of game 'n' of 'vector' in the same form as 'state' gives a Game's
+def vector_state(vector, n):
+    ghosts = tuple((int(vector.ghost_x[n, ghost]), int(vector.ghost_y[n, ghost]), bool(vector.dead[n, ghost]),
+                    bool(vector.been_eaten[n, ghost]), int(vector.speed[n, ghost]))
+                   for ghost in range(4))
+    return ((int(vector.player_x[n]), int(vector.player_y[n]), int(vector.direction[n]), int(vector.lives[n]),
+             int(vector.score[n]), int(vector.dots_left[n]), int(vector.level_id[n]),
+             VectorGame.STATES[vector.state[n]], bool(vector.power_up[n]), int(vector.power_counter[n]),
+             int(vector.caught_by[n]), vector.cells[n].tobytes()) + ghosts)
+
+
+# State of everything that moves or scores in 'game'
+def state(game):
+    player, settings = game.player, game.settings
+    caught_by = -1 if settings.caught_by is None else VectorGame.GHOSTS.index(settings.caught_by)
+    ghosts = tuple((ghost.x_actual, ghost.y_actual, bool(ghost.dead), bool(ghost.been_eaten), ghost.speed)
+                   for ghost in game.ghosts)
+    return ((player.actual_x, player.actual_y, player.direction, player.lives, settings.score, settings.dots_left,
+             settings.level_id, settings.state, bool(settings.power_up), settings.power_counter, caught_by,
+             bytes(settings.level.cells)) + ghosts)
+
+
+# Plays 'count' games for 'frames' frames both as a VectorGame and as separate Games (on the routing table), with
+# pacman heading for the nearest dot or, now and then, turning at random, and checks they match after every frame
+def play(count, frames, seed, level_pack=None, death_duration=0):
+    rng = random.Random(seed)
+    level_ids = [rng.randrange(len(level_pack) if level_pack is not None else 3) for _ in range(count)]
+    vector = VectorGame.VectorGame(count, level_ids, level_pack, death_duration=death_duration)
+    games = []
+    for level_id in level_ids:
+        settings = GameLogic.GameSettings(level_pack)
+        settings.ghost_pathfinding = "routing_table"
+        settings.death_duration = death_duration
+        settings.level_id = level_id
+        GameLogic.load_level(settings)
+        games.append(GameLogic.Game(settings))
+    policies = [BatchRunner.DotPolicy(random.Random(seed * 100 + n)) for n in range(count)]
+
+    for frame in range(frames):
+        commands, enters = [], []
+        for game, policy in zip(games, policies):
+            settings = game.settings
+            command = rng.randrange(4) if rng.random() < 0.05 else policy(game)
+            enter = settings.game_won or settings.game_lost and rng.random() > 0.9
+            game.step(command, enter)
+            commands.append(-1 if command is None else command)
+            enters.append(enter)
+        vector.step(np.array(commands), np.array(enters))
+        for n, game in enumerate(games):
+            assert vector_state(vector, n) == state(game), f"frame {frame}, game {n}"
+
+
+# The built-in levels, with pacman dying at once or through the death sequence
+@pytest.mark.parametrize("seed, death_duration", [(1, 0), (2, 90)])
+def test_vector_game_matches_game(seed, death_duration):
+    play(8, 1500, seed, death_duration=death_duration)
+
+
+# Generated mazes out of a level pack
+def test_vector_game_matches_game_on_packed_mazes(tmp_path):
+    path = str(tmp_path / "mazes.pack")
+    MazeGenerator.generate_pack(path, 3, seed=5)
+    play(6, 1200, 3, LevelPack.LevelPack(path))